@@ -17,6 +17,12 @@ from django.urls import reverse
 from typing import Dict, Any
 
 from apps.votes.models import Vote
+from apps.posts.feeds import (
+    FEED_PAGE_TEMPLATE,
+    RECENT_ORDERING,
+    is_feed_page_request,
+    paginate_feed,
+)
 from apps.posts.models import Post
 from apps.comments.models import Comment
 
@@ -36,6 +42,22 @@ def _get_base_stats(profile_user: User) -> Dict[str, int]:
     }
 
 
+def _render_post_section(
+    request: HttpRequest, profile_user: User, posts, template_name: str, section: str
+) -> HttpResponse:
+    """Render one keyset page of a profile post listing (or just the next page for HTMX)."""
+    feed = paginate_feed(request, posts.select_related("thread", "author"), RECENT_ORDERING)
+    if is_feed_page_request(request):
+        return render(request, FEED_PAGE_TEMPLATE, feed)
+    context: Dict[str, Any] = {
+        "profile_user": profile_user,
+        "section": section,
+        **feed,
+        **_get_base_stats(profile_user),
+    }
+    return render(request, template_name, context)
+
+
 def user_detail(request: HttpRequest, username: str) -> HttpResponseRedirect:
     """Legacy route kept for backward compatibility -> redirect to posts section."""
     return HttpResponseRedirect(reverse("user-posts", kwargs={"username": username}))
@@ -44,14 +66,8 @@ def user_detail(request: HttpRequest, username: str) -> HttpResponseRedirect:
 def user_posts(request: HttpRequest, username: str) -> HttpResponse:
     profile_user = _get_profile_user(username)
     # Filter posts by author's posts BUT enforce viewer visibility rules
-    visible_posts = Post.objects.visible_to_user(request.user).filter(author=profile_user, is_deleted=False).order_by("-created_at")
-    context: Dict[str, Any] = {
-        "profile_user": profile_user,
-        "posts": visible_posts,
-        "section": "posts",
-        **_get_base_stats(profile_user),
-    }
-    return render(request, "account/profile_posts.html", context)
+    visible_posts = Post.objects.visible_to_user(request.user).filter(author=profile_user, is_deleted=False)
+    return _render_post_section(request, profile_user, visible_posts, "account/profile_posts.html", "posts")
 
 
 def user_comments(request: HttpRequest, username: str) -> HttpResponse:
@@ -60,7 +76,7 @@ def user_comments(request: HttpRequest, username: str) -> HttpResponse:
     visible_post_ids = Post.objects.visible_to_user(request.user).values_list("id", flat=True)
     comments = (
         Comment.objects.filter(author=profile_user, post_id__in=visible_post_ids, is_deleted=False)
-        .select_related("post", "author")
+        .select_related("post", "author__profile")
         .order_by("-created_at")
     )
     context: Dict[str, Any] = {
@@ -80,14 +96,8 @@ def user_upvoted(request: HttpRequest, username: str) -> HttpResponse:
         .order_by("-created_at")
         .values_list("object_id", flat=True)
     )
-    posts = Post.objects.visible_to_user(request.user).filter(id__in=upvote_ids, is_deleted=False).order_by("-created_at")
-    context: Dict[str, Any] = {
-        "profile_user": profile_user,
-        "upvoted_posts": posts,
-        "section": "upvoted",
-        **_get_base_stats(profile_user),
-    }
-    return render(request, "account/profile_upvoted.html", context)
+    posts = Post.objects.visible_to_user(request.user).filter(id__in=upvote_ids, is_deleted=False)
+    return _render_post_section(request, profile_user, posts, "account/profile_upvoted.html", "upvoted")
 
 
 def user_downvoted(request: HttpRequest, username: str) -> HttpResponse:
@@ -98,14 +108,8 @@ def user_downvoted(request: HttpRequest, username: str) -> HttpResponse:
         .order_by("-created_at")
         .values_list("object_id", flat=True)
     )
-    posts = Post.objects.visible_to_user(request.user).filter(id__in=downvote_ids, is_deleted=False).order_by("-created_at")
-    context: Dict[str, Any] = {
-        "profile_user": profile_user,
-        "downvoted_posts": posts,
-        "section": "downvoted",
-        **_get_base_stats(profile_user),
-    }
-    return render(request, "account/profile_downvoted.html", context)
+    posts = Post.objects.visible_to_user(request.user).filter(id__in=downvote_ids, is_deleted=False)
+    return _render_post_section(request, profile_user, posts, "account/profile_downvoted.html", "downvoted")
 
 
 @login_required
@@ -0,0 +1,388 @@
+"""Seeded synthetic dataset for local load and performance work.
+
+``DatasetGenerator`` fills an empty database with users spread over
+``User.DEPARTMENTS`` and admission series, organizations whose membership sizes
+follow a Zipf curve, threads, posts with a mix of visibilities, deep comment
+trees and Zipf-distributed votes. The same ``DatasetConfig`` (including the seed)
+always produces the same rows.
+
+Rows are written with ``bulk_create`` in batches. Primary keys are assigned up
+front so that memberships, comment paths and votes can reference rows without
+reading them back; derived data (counters, hot scores, the search index and
+timelines) is rebuilt once at the end by the regular maintenance commands.
+"""
+
+import itertools
+import random
+import time
+from array import array
+from bisect import bisect
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.accounts.models import Profile, User
+from apps.campus.importer import archive_timestamps
+from apps.campus.models import Organization, OrganizationMembership
+from apps.campus.templatetags.campus_sidebar import invalidate_sidebars
+from apps.campus.typeahead import invalidate_typeahead
+from apps.comments.models import MAX_COMMENT_DEPTH, PATH_SEGMENT_WIDTH, Comment, encode_path_segment
+from apps.posts.models import Post
+from apps.threads.models import Thread, ThreadMembership
+from apps.votes.models import Vote
+from shared.slugs import allocate_slugs, slug_base
+
+USERNAME_PREFIX = "synth"
+# Every synthetic account shares this password
+PASSWORD = "synthetic-password"
+
+USER_TYPES = (("student", 85), ("alumni", 7), ("faculty", 6), ("staff", 2))
+VISIBILITY_MIX = (("public", 50), ("organization", 30), ("thread", 20))
+SERIES_YEARS = 6
+# The largest organization has this share of all users; the rest follow the Zipf curve
+LARGEST_ORGANIZATION_SHARE = 0.4
+TOP_LEVEL_COMMENT_SHARE = 0.3
+# Replies continuing the newest branch rather than a random comment; gives deep chains
+REPLY_TO_NEWEST = 0.6
+COMMENT_VOTE_SHARE = 0.2
+UPVOTE_SHARE = 0.8
+
+FIRST_NAMES = (
+    "Arif", "Nusrat", "Tanvir", "Farhana", "Rakib", "Sadia", "Imran", "Mitu", "Shafayet", "Jannat",
+    "Hasan", "Tasnim", "Mahir", "Ayesha", "Sabbir", "Raisa", "Fahim", "Lamia", "Nayeem", "Orin",
+)
+LAST_NAMES = (
+    "Ahmed", "Hossain", "Islam", "Rahman", "Khan", "Chowdhury", "Sarker", "Uddin", "Akter", "Karim",
+)
+ORGANIZATION_SUBJECTS = (
+    "Robotics", "Programming", "Debate", "Photography", "Chess", "Cultural", "Science", "Career",
+    "Entrepreneurship", "Music", "Film", "Astronomy", "Environment", "Sports", "Language", "Blood Donation",
+)
+ORGANIZATION_KINDS = (("Club", "club"), ("Society", "society"), ("Association", "association"))
+THREAD_TOPICS = (
+    "Announcements", "General", "Events", "Projects", "Help Desk", "Resources", "Jobs & Internships",
+    "Workshops", "Showcase", "Meetups", "Contests", "Off Topic",
+)
+WORDS = (
+    "ruet campus lab semester exam project robot circuit design code contest team seminar workshop "
+    "library hall deadline result thesis supervisor course assignment lecture notes sensor motor arduino "
+    "python data model paper presentation registration fee schedule venue volunteer photo festival"
+).split()
+
+
+@dataclass
+class DatasetConfig:
+    users: int = 1000
+    organizations: int = 20
+    threads: int = 100
+    posts: int = 5000
+    comments: int = 20000
+    votes: int = 50000
+    seed: int = 42
+    zipf: float = 1.1
+    days: int = 365
+    batch_size: int = 2000
+
+
+class DatasetExists(Exception):
+    pass
+
+
+def zipf_weights(n: int, exponent: float) -> list[float]:
+    return [1 / rank**exponent for rank in range(1, n + 1)]
+
+
+def _next_pk(model) -> int:
+    return (model.objects.aggregate(Max("pk"))["pk__max"] or 0) + 1
+
+
+class DatasetGenerator:
+    def __init__(self, config: DatasetConfig, log=None):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.now = timezone.now()
+        self.created = Counter()
+        self.log = log or (lambda message: None)
+
+    def generate(self) -> Counter:
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise DatasetExists("Synthetic data already exists; flush the database first.")
+        started = time.monotonic()
+        models = (Profile, Organization, OrganizationMembership, Thread, ThreadMembership, Post, Comment, Vote)
+        with archive_timestamps(models):
+            self._users()
+            self._organizations()
+            self._threads()
+            self._posts()
+            self._comments()
+            self._votes()
+        self._rebuild_derived_data()
+        self.log(f"Generated {sum(self.created.values())} rows in {time.monotonic() - started:.1f}s")
+        return self.created
+
+    # Helpers
+
+    def _insert(self, model, rows, slug_source: str | None = None) -> None:
+        """``bulk_create`` the objects yielded by ``rows`` in batches, allocating slugs per batch."""
+        rows = iter(rows)
+        while batch := list(itertools.islice(rows, self.config.batch_size)):
+            if slug_source:
+                bases = [
+                    slug_base(getattr(obj, slug_source), model.slug_fallback, model.slug_max_length) for obj in batch
+                ]
+                for obj, slug in zip(batch, allocate_slugs(model.objects.all(), bases)):
+                    obj.slug = slug
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            self.created[model._meta.label] += len(batch)
+        self.log(f"{model._meta.label}: {self.created[model._meta.label]}")
+
+    def _past(self, days: float | None = None) -> datetime:
+        return self.now - timedelta(days=self.rng.uniform(0, days if days is not None else self.config.days))
+
+    def _zipf_picker(self, n: int):
+        """Draw indexes below ``n``, low ones far more often."""
+        cumulative = list(itertools.accumulate(zipf_weights(n, self.config.zipf)))
+        total = cumulative[-1]
+        return lambda: min(bisect(cumulative, self.rng.random() * total), n - 1)
+
+    def _text(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high))).capitalize() + "."
+
+    def _timestamps(self, created_at) -> dict:
+        return {"created_at": created_at, "updated_at": created_at}
+
+    # Rows
+
+    def _users(self) -> None:
+        config, rng = self.config, self.rng
+        password = make_password(PASSWORD)
+        self.first_user = _next_pk(User)
+        departments = self._zipf_picker(len(User.DEPARTMENTS))
+        first_series = self.now.year - SERIES_YEARS
+        user_types, type_weights = zip(*USER_TYPES)
+        rolls = Counter()
+
+        def users():
+            for index in range(config.users):
+                department = departments()
+                user_type = rng.choices(user_types, type_weights)[0]
+                series = student_id = None
+                if user_type in ("student", "alumni"):
+                    series = str(first_series + rng.randrange(SERIES_YEARS))
+                    rolls[series, department] += 1
+                    if rolls[series, department] < 1000:
+                        student_id = f"{series[2:]}{department:02d}{rolls[series, department]:03d}"
+                username = f"{USERNAME_PREFIX}{index}"
+                yield User(
+                    pk=self.first_user + index,
+                    username=username,
+                    email=f"{username}@example.com",
+                    password=password,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    user_type=user_type,
+                    department=User.DEPARTMENTS[department][0],
+                    series=series,
+                    student_id=student_id,
+                    is_verified=rng.random() < 0.7,
+                    date_joined=self._past(SERIES_YEARS * 365),
+                )
+
+        self._insert(User, users())
+        self._insert(
+            Profile,
+            (Profile(user_id=self.first_user + i, **self._timestamps(self.now)) for i in range(config.users)),
+        )
+
+    def _organizations(self) -> None:
+        config, rng = self.config, self.rng
+        first = _next_pk(Organization)
+        largest = max(3, int(config.users * LARGEST_ORGANIZATION_SHARE))
+        self.org_members = []
+        organizations, names = [], set(Organization.objects.values_list("name", flat=True))
+        for index, weight in enumerate(zipf_weights(config.organizations, config.zipf)):
+            subject = rng.choice(ORGANIZATION_SUBJECTS)
+            kind, org_type = rng.choice(ORGANIZATION_KINDS)
+            name = f"RUET {subject} {kind}"
+            if name in names:
+                name = f"{name} {index + 1}"
+            names.add(name)
+            organizations.append(
+                Organization(
+                    pk=first + index,
+                    name=name,
+                    description=self._text(10, 40),
+                    org_type=org_type,
+                    **self._timestamps(self._past()),
+                )
+            )
+            size = min(config.users, max(3, int(largest * weight)))
+            self.org_members.append(array("q", rng.sample(range(config.users), size)))
+        self._insert(Organization, organizations, "name")
+
+        def memberships():
+            for index, members in enumerate(self.org_members):
+                for position, member in enumerate(members):
+                    role = "president" if position == 0 else "moderator" if position < 3 else "member"
+                    yield OrganizationMembership(
+                        user_id=self.first_user + member,
+                        organization_id=first + index,
+                        role=role,
+                        status="active" if position < 3 or rng.random() < 0.95 else "pending",
+                        **self._timestamps(self._past()),
+                    )
+
+        self._insert(OrganizationMembership, memberships())
+        self.first_organization = first
+
+    def _threads(self) -> None:
+        config, rng = self.config, self.rng
+        first = _next_pk(Thread)
+        pick_org = self._zipf_picker(config.organizations)
+        # Every organization gets a thread before the Zipf curve hands out the rest
+        owners = [i % config.organizations if i < config.organizations else pick_org() for i in range(config.threads)]
+        self.thread_org = array("q", owners)
+        self.thread_members = []
+        threads = []
+        for index, org in enumerate(owners):
+            members = self.org_members[org]
+            threads.append(
+                Thread(
+                    pk=first + index,
+                    title=rng.choice(THREAD_TOPICS),
+                    description=self._text(5, 20),
+                    organization_id=self.first_organization + org,
+                    created_by_id=self.first_user + members[0],
+                    **self._timestamps(self._past()),
+                )
+            )
+            share = rng.uniform(0.3, 0.9)
+            self.thread_members.append(array("q", (m for m in members if rng.random() < share)) or members[:1])
+        self._insert(Thread, threads, "title")
+
+        def memberships():
+            for index, members in enumerate(self.thread_members):
+                for member in members:
+                    yield ThreadMembership(
+                        user_id=self.first_user + member,
+                        thread_id=first + index,
+                        status="active",
+                        **self._timestamps(self._past()),
+                    )
+
+        self._insert(ThreadMembership, memberships())
+        self.first_thread = first
+
+    def _posts(self) -> None:
+        config, rng = self.config, self.rng
+        self.first_post = _next_pk(Post)
+        pick_thread = self._zipf_picker(config.threads)
+        visibilities, visibility_weights = zip(*VISIBILITY_MIX)
+        self.post_thread = array("q")
+        self.post_created = array("d")
+
+        def posts():
+            for index in range(config.posts):
+                thread = pick_thread()
+                created_at = self._past()
+                self.post_thread.append(thread)
+                self.post_created.append(created_at.timestamp())
+                post = Post(
+                    pk=self.first_post + index,
+                    title=self._text(3, 10)[:-1],
+                    content="\n\n".join(self._text(15, 80) for _ in range(rng.randint(1, 4))),
+                    visibility=rng.choices(visibilities, visibility_weights)[0],
+                    thread_id=self.first_thread + thread,
+                    author_id=self.first_user + rng.choice(self.thread_members[thread]),
+                    **self._timestamps(created_at),
+                )
+                post.hot_score = post.compute_hot_score(now=self.now)
+                yield post
+
+        self._insert(Post, posts(), "title")
+
+    def _comments(self) -> None:
+        config, rng = self.config, self.rng
+        pk = _next_pk(Comment)
+        pick_post = self._zipf_picker(config.posts)
+        order = list(range(config.posts))
+        rng.shuffle(order)
+        # Popularity ranks are shuffled so that busy posts are spread over threads and time
+        per_post = Counter(order[pick_post()] for _ in range(config.comments))
+
+        def comments():
+            nonlocal pk
+            for post, count in sorted(per_post.items()):
+                members = self.thread_members[self.post_thread[post]]
+                created = self.post_created[post]
+                tree = []  # (pk, path, level) of this post's comments so far
+                by_pk = {}
+                for _ in range(count):
+                    parent = None
+                    if tree and rng.random() >= TOP_LEVEL_COMMENT_SHARE:
+                        parent = tree[-1] if rng.random() < REPLY_TO_NEWEST else rng.choice(tree)
+                        while parent[2] >= MAX_COMMENT_DEPTH - 1:
+                            parent = by_pk[int(parent[1][-2 * PATH_SEGMENT_WIDTH:-PATH_SEGMENT_WIDTH], 36)]
+                    path = (parent[1] if parent else "") + encode_path_segment(pk)
+                    level = parent[2] + 1 if parent else 0
+                    created = min(created + rng.uniform(60, 6 * 3600), self.now.timestamp())
+                    tree.append((pk, path, level))
+                    by_pk[pk] = tree[-1]
+                    yield Comment(
+                        pk=pk,
+                        post_id=self.first_post + post,
+                        author_id=self.first_user + rng.choice(members),
+                        parent_id=parent[0] if parent else None,
+                        content=self._text(3, 40),
+                        level=level,
+                        path=path,
+                        **self._timestamps(datetime.fromtimestamp(created, tz=dt_timezone.utc)),
+                    )
+                    pk += 1
+
+        self.first_comment = pk
+        self._insert(Comment, comments())
+        self.comment_count = pk - self.first_comment
+
+    def _votes(self) -> None:
+        config = self.config
+        comment_votes = int(config.votes * COMMENT_VOTE_SHARE) if self.comment_count else 0
+        targets = (
+            (Post, self.first_post, config.posts, config.votes - comment_votes),
+            (Comment, self.first_comment, self.comment_count, comment_votes),
+        )
+        for model, first, count, total in targets:
+            if count and total:
+                self._insert(Vote, self._votes_for(ContentType.objects.get_for_model(model), first, count, total))
+
+    def _votes_for(self, content_type, first: int, count: int, total: int):
+        rng = self.rng
+        pick = self._zipf_picker(count)
+        order = list(range(count))
+        rng.shuffle(order)
+        per_target = Counter(order[pick()] for _ in range(total))
+        for target, votes in sorted(per_target.items()):
+            for voter in rng.sample(range(self.config.users), min(votes, self.config.users)):
+                yield Vote(
+                    user_id=self.first_user + voter,
+                    content_type=content_type,
+                    object_id=first + target,
+                    vote_type=1 if rng.random() < UPVOTE_SHARE else -1,
+                    **self._timestamps(self._past(30)),
+                )
+
+    def _rebuild_derived_data(self) -> None:
+        for command in ("reconcile_counters", "rebuild_search_index", "rebuild_timelines"):
+            self.log(f"Running {command}")
+            call_command(command, stdout=StringIO())
+        invalidate_typeahead()
+        invalidate_sidebars()
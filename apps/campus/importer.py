@@ -0,0 +1,345 @@
+"""Bulk import of organizations, threads, posts and comments from JSONL archives.
+
+Every input line is one JSON object with a ``type`` (``organization``,
+``thread``, ``post`` or ``comment``), an optional ``uuid`` and the model fields.
+References point at the ``uuid`` of an earlier record or of a row already in
+the database, and at usernames for people::
+
+    {"type": "thread", "uuid": "...", "organization": "<org uuid>", "created_by": "alice", "title": "..."}
+    {"type": "comment", "uuid": "...", "post": "<post uuid>", "parent": "<comment uuid>", "author": "bob", ...}
+
+Records are buffered per type and written with ``bulk_create`` once a buffer is
+full, all buffers in dependency order, so memory is bounded by the batch size.
+Slugs and comment paths are computed in memory; comment ids are allocated
+ahead of the insert so a path can end with its own id. ``bulk_create`` sends no
+``post_save`` signals: counters, the search index, timelines and cached lists are
+brought up to date once in ``finish``. Records whose uuid already exists are
+skipped, so an interrupted import can be run again.
+
+Comment ids are taken from the current maximum, so nothing else may insert
+comments while an import runs.
+"""
+
+import json
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.campus.reconciliation import counter_specs
+from apps.campus.search_index import SEARCH_INDEXES, rebuild_index
+from apps.campus.templatetags.campus_sidebar import invalidate_sidebars
+from apps.campus.typeahead import invalidate_typeahead
+from apps.comments.models import MAX_COMMENT_DEPTH, PATH_SEGMENT_WIDTH, Comment, encode_path_segment
+from apps.posts.models import Post
+from apps.posts.timeline import backfill_timeline
+from apps.threads.models import Thread, ThreadMembership
+from shared.reconciliation import reconcile
+from shared.slugs import allocate_slugs, slug_base
+
+BATCH_SIZE = 1000
+
+# Written in this order, so every record can reference those of earlier types
+RECORD_TYPES = ("organization", "thread", "post", "comment")
+MODELS = {"organization": Organization, "thread": Thread, "post": Post, "comment": Comment}
+REQUIRED = {
+    "organization": ("name",),
+    "thread": ("title", "organization", "created_by"),
+    "post": ("title", "thread", "author"),
+    "comment": ("content", "post", "author"),
+}
+# Plain fields copied from a record when present; model defaults apply otherwise
+FIELDS = {
+    "organization": ("name", "description", "org_type", "is_active"),
+    "thread": ("title", "description", "thread_type", "is_pinned", "is_locked"),
+    "post": ("title", "content", "post_type", "visibility", "is_pinned", "is_locked"),
+    "comment": ("content",),
+}
+RECOUNTED = ("thread.post_count", "post.comment_count")
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    created: Counter = field(default_factory=Counter)
+    skipped: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def __str__(self):
+        total = sum(self.created.values())
+        lines = [
+            f"{kind}: {self.created[kind]} created, {self.created[kind] / max(self.elapsed, 1e-9):.0f}/s"
+            for kind in RECORD_TYPES
+        ]
+        lines += [f"skipped ({reason}): {count}" for reason, count in sorted(self.skipped.items())]
+        lines.append(f"{total} rows in {self.elapsed:.1f}s ({total / max(self.elapsed, 1e-9):.0f} rows/s)")
+        return "\n".join(lines)
+
+
+def parse_record(line: str) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        raise InvalidRecord("invalid json") from exc
+    if not isinstance(record, dict) or record.get("type") not in RECORD_TYPES:
+        raise InvalidRecord("unknown type")
+    missing = [key for key in REQUIRED[record["type"]] if not record.get(key)]
+    if missing:
+        raise InvalidRecord(f"missing {missing[0]}")
+    _parse_references(record)
+    _parse_created_at(record)
+    _clean_fields(record)
+    return record
+
+
+def _parse_references(record: dict) -> None:
+    try:
+        record["uuid"] = uuid.UUID(record["uuid"]) if record.get("uuid") else uuid.uuid4()
+        for key in ("organization", "thread", "post", "parent"):
+            if record["type"] != key and record.get(key):
+                record[key] = uuid.UUID(record[key])
+    except (TypeError, ValueError, AttributeError) as exc:
+        raise InvalidRecord("invalid uuid") from exc
+
+
+def _parse_created_at(record: dict) -> None:
+    if not record.get("created_at"):
+        record["created_at"] = None
+        return
+    try:
+        # None for a malformed value, ValueError for an impossible date such as month 13
+        created_at = parse_datetime(record["created_at"])
+    except (TypeError, ValueError) as exc:
+        raise InvalidRecord("invalid created_at") from exc
+    if created_at is None:
+        raise InvalidRecord("invalid created_at")
+    record["created_at"] = timezone.make_aware(created_at) if timezone.is_naive(created_at) else created_at
+
+
+def _clean_fields(record: dict) -> None:
+    """Convert and validate the copied fields, choices included, as a model form would."""
+    model = MODELS[record["type"]]
+    for name in FIELDS[record["type"]]:
+        if name in record:
+            try:
+                record[name] = model._meta.get_field(name).clean(record[name], None)
+            except ValidationError as exc:
+                raise InvalidRecord(f"invalid {name}") from exc
+
+
+def _timestamps(record: dict) -> dict:
+    created_at = record["created_at"] or timezone.now()
+    return {"created_at": created_at, "updated_at": created_at}
+
+
+@contextmanager
+def archive_timestamps(models=None):
+    """Let ``bulk_create`` keep the given ``created_at``/``updated_at`` values of ``models``.
+
+    ``models`` defaults to every model in ``MODELS``.
+    """
+    if models is None:
+        models = MODELS.values()
+    fields = [model._meta.get_field(name) for model in models for name in ("created_at", "updated_at")]
+    saved = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _pks_by_uuid(model, uuids) -> dict:
+    return dict(model.objects.filter(uuid__in=set(uuids)).values_list("uuid", "pk"))
+
+
+def _users(records, key: str) -> dict:
+    return dict(User.objects.filter(username__in={r[key] for r in records}).values_list("username", "pk"))
+
+
+class ArchiveImporter:
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.buffers = {kind: [] for kind in RECORD_TYPES}
+        self.report = ImportReport()
+        self.next_comment_pk = None
+        self.thread_ids = set()
+
+    def skip(self, reason: str) -> None:
+        self.report.skipped[reason] += 1
+
+    def add(self, record: dict) -> None:
+        buffer = self.buffers[record["type"]]
+        buffer.append(record)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def import_lines(self, lines) -> ImportReport:
+        with archive_timestamps():
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    self.add(parse_record(line))
+                except InvalidRecord as exc:
+                    self.skip(str(exc))
+            self.flush()
+        self.finish()
+        return self.report
+
+    def flush(self) -> None:
+        for kind in RECORD_TYPES:
+            records, self.buffers[kind] = self.buffers[kind], []
+            records = self._new(kind, records) if records else []
+            if records:
+                with transaction.atomic():
+                    objects = getattr(self, f"_build_{kind}s")(records)
+                    MODELS[kind].objects.bulk_create(objects, batch_size=self.batch_size)
+                self.report.created[kind] += len(objects)
+
+    def _new(self, kind: str, records: list[dict]) -> list[dict]:
+        """Drop records already imported, by uuid, and repeats within the batch."""
+        existing = set(_pks_by_uuid(MODELS[kind], [r["uuid"] for r in records]))
+        new = []
+        for record in records:
+            if record["uuid"] in existing:
+                self.skip("already imported")
+                continue
+            existing.add(record["uuid"])
+            new.append(record)
+        return new
+
+    def _fields(self, kind: str, record: dict) -> dict:
+        return {
+            "uuid": record["uuid"],
+            **_timestamps(record),
+            **{name: record[name] for name in FIELDS[kind] if name in record},
+        }
+
+    def _build_organizations(self, records):
+        names = set(Organization.objects.filter(name__in={r["name"] for r in records}).values_list("name", flat=True))
+        organizations = []
+        for record in records:
+            if record["name"] in names:
+                self.skip("duplicate organization name")
+                continue
+            names.add(record["name"])
+            organizations.append(Organization(**self._fields("organization", record)))
+        self._assign_slugs(Organization, organizations, "name")
+        return organizations
+
+    def _build_threads(self, records):
+        organizations = _pks_by_uuid(Organization, [r["organization"] for r in records])
+        users = _users(records, "created_by")
+        threads = []
+        for record in records:
+            if record["organization"] not in organizations or record["created_by"] not in users:
+                self.skip("unknown reference")
+                continue
+            threads.append(
+                Thread(
+                    organization_id=organizations[record["organization"]],
+                    created_by_id=users[record["created_by"]],
+                    **self._fields("thread", record),
+                )
+            )
+        self._assign_slugs(Thread, threads, "title")
+        return threads
+
+    def _build_posts(self, records):
+        threads = _pks_by_uuid(Thread, [r["thread"] for r in records])
+        users = _users(records, "author")
+        posts = []
+        for record in records:
+            if record["thread"] not in threads or record["author"] not in users:
+                self.skip("unknown reference")
+                continue
+            post = Post(
+                thread_id=threads[record["thread"]], author_id=users[record["author"]], **self._fields("post", record)
+            )
+            post.hot_score = post.compute_hot_score()
+            posts.append(post)
+            self.thread_ids.add(post.thread_id)
+        self._assign_slugs(Post, posts, "title")
+        return posts
+
+    def _build_comments(self, records):
+        posts = _pks_by_uuid(Post, [r["post"] for r in records])
+        users = _users(records, "author")
+        batch_uuids = {r["uuid"] for r in records}
+        # uuid -> (pk, path, level, post_id) of every possible parent
+        parents = {
+            row[0]: row[1:]
+            for row in Comment.objects.filter(
+                uuid__in={r["parent"] for r in records if r.get("parent")} - batch_uuids
+            ).values_list("uuid", "pk", "path", "level", "post_id")
+        }
+        if self.next_comment_pk is None:
+            self.next_comment_pk = (Comment.objects.aggregate(Max("pk"))["pk__max"] or 0) + 1
+
+        comments = []
+        for record in records:
+            post_id, author_id = posts.get(record["post"]), users.get(record["author"])
+            parent = parents.get(record.get("parent")) if record.get("parent") else (None, "", -1, post_id)
+            if post_id is None or author_id is None or parent is None or parent[3] != post_id:
+                self.skip("unknown reference")
+                continue
+            parent_pk, path, level, _ = parent
+            # Replies beyond the maximum depth continue the deepest allowed branch
+            while level >= MAX_COMMENT_DEPTH - 1:
+                path, level = path[:-PATH_SEGMENT_WIDTH], level - 1
+                parent_pk = int(path[-PATH_SEGMENT_WIDTH:], 36)
+            pk = self.next_comment_pk
+            self.next_comment_pk += 1
+            path += encode_path_segment(pk)
+            comments.append(
+                Comment(
+                    pk=pk,
+                    post_id=post_id,
+                    author_id=author_id,
+                    parent_id=parent_pk,
+                    level=level + 1,
+                    path=path,
+                    **self._fields("comment", record),
+                )
+            )
+            parents[record["uuid"]] = (pk, path, level + 1, post_id)
+        return comments
+
+    def _assign_slugs(self, model, objects, source: str) -> None:
+        bases = [slug_base(getattr(obj, source), model.slug_fallback, model.slug_max_length) for obj in objects]
+        for obj, slug in zip(objects, allocate_slugs(model.objects.all(), bases)):
+            obj.slug = slug
+
+    def finish(self) -> None:
+        """Bring everything the skipped signals maintain up to date, once."""
+        for spec in counter_specs():
+            if spec.label in RECOUNTED:
+                reconcile(spec)
+        for name in ("organizations", "threads", "posts"):
+            rebuild_index(SEARCH_INDEXES[name])
+        members = ThreadMembership.objects.filter(thread_id__in=self.thread_ids, status="active")
+        for user_id, thread_id in members.values_list("user_id", "thread_id").iterator(chunk_size=1000):
+            backfill_timeline(user_id, thread_id)
+        invalidate_typeahead()
+        invalidate_sidebars()
+        self.report.finished = time.monotonic()
@@ -0,0 +1,236 @@
+"""HTTP load test against a running server.
+
+``LoadTest`` logs in synthetic users (see ``apps.campus.dataset``) by writing
+their sessions straight into the session store, then runs one worker thread per
+user. Each worker draws a route from ``ROUTES`` by weight and sends the request
+over its own connection, for a fixed duration. Targets (post, thread and
+organization slugs, search words) are sampled from the database once up front,
+so the server has to share it.
+
+Results hold the request rate, error count and p50/p95/p99 latency of every
+route name; ``compare`` sets two saved results side by side. A redirect counts as
+an error unless the route answers with one, and a redirect to the login page
+always does. The sessions are deleted when the run ends.
+"""
+
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.shortcuts import resolve_url
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from apps.accounts.models import User
+from apps.campus.dataset import USERNAME_PREFIX, WORDS
+from apps.campus.models import Organization
+from apps.posts.models import Post
+from apps.threads.models import Thread
+
+PERCENTILES = (50, 95, 99)
+SAMPLE_SIZE = 200
+TIMEOUT = 30
+SLOWER_RATIO = 1.1
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    weight: int
+    # (targets, rng) -> (path, form data or None, extra headers)
+    build: Callable
+    method: str = "GET"
+    # Whether the route answers with a redirect, as form posts without HTMX do
+    redirects: bool = False
+
+
+def _home(tab: str | None = None):
+    return lambda targets, rng: (reverse("campus-home") + (f"?tab={tab}" if tab else ""), None, {})
+
+
+def _detail(name: str, pick: Callable):
+    return lambda targets, rng: (reverse(name, args=[pick(targets, rng)]), None, {})
+
+
+def _search(targets, rng):
+    return reverse("campus-search"), {"query": rng.choice(WORDS)[: rng.randint(2, 5)]}, {"HX-Request": "true"}
+
+
+def _vote(targets, rng):
+    form = {"model": "post", "object_id": rng.choice(targets.posts)[0], "action": rng.choice(("up", "down"))}
+    return reverse("vote"), form, {}
+
+
+# Roughly the share of traffic each page gets from a logged-in user
+ROUTES = (
+    Route("campus-home", 25, _home()),
+    Route("campus-home:popular", 10, _home("popular")),
+    Route("post-detail", 30, _detail("post-detail", lambda targets, rng: rng.choice(targets.posts)[1])),
+    Route("thread-detail", 10, _detail("thread-detail", lambda targets, rng: rng.choice(targets.threads))),
+    Route("org-detail", 5, _detail("org-detail", lambda targets, rng: rng.choice(targets.organizations))),
+    Route("campus-search", 10, _search, "POST"),
+    Route("vote", 10, _vote, "POST", redirects=True),
+)
+
+
+@dataclass
+class Targets:
+    posts: list
+    threads: list
+    organizations: list
+
+    @classmethod
+    def sample(cls, rng: random.Random) -> "Targets":
+        posts = list(Post.objects.filter(visibility="public").order_by("-pk").values_list("pk", "slug")[:SAMPLE_SIZE])
+        threads = list(Thread.objects.order_by("-post_count").values_list("slug", flat=True)[:SAMPLE_SIZE])
+        organizations = list(Organization.objects.values_list("slug", flat=True)[:SAMPLE_SIZE])
+        if not (posts and threads and organizations):
+            raise ValueError("Load testing needs public posts, threads and organizations; run generate_dataset.")
+        rng.shuffle(posts)
+        return cls(posts, threads, organizations)
+
+
+def login_sessions(count: int) -> list[str]:
+    """Session keys of up to ``count`` synthetic users, logged in without the login form."""
+    backend = settings.AUTHENTICATION_BACKENDS[0]
+    keys = []
+    for user in User.objects.filter(username__startswith=USERNAME_PREFIX).order_by("pk")[:count]:
+        session = SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = backend
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        keys.append(session.session_key)
+    if not keys:
+        raise ValueError("No synthetic users to log in; run generate_dataset.")
+    return keys
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(p / 100 * len(ordered)))) - 1]
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    """Per-route rate, errors and latency percentiles (ms) from ``{route: [(seconds, ok), ...]}``."""
+    routes = {}
+    for name, results in sorted(samples.items()):
+        latencies = sorted(seconds * 1000 for seconds, _ in results)
+        routes[name] = {
+            "requests": len(results),
+            "errors": sum(1 for _, ok in results if not ok),
+            "rps": round(len(results) / elapsed, 2),
+            **{f"p{p}": round(percentile(latencies, p), 2) for p in PERCENTILES},
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {"elapsed": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 2), "routes": routes}
+
+
+def compare(before: dict, after: dict) -> list[str]:
+    """One line per route with the p95 and rate of both runs."""
+    lines = []
+    for name in sorted(set(before["routes"]) | set(after["routes"])):
+        old, new = before["routes"].get(name), after["routes"].get(name)
+        if not (old and new):
+            lines.append(f"{name}: only in {'the baseline' if old else 'this run'}")
+            continue
+        marker = " (slower)" if new["p95"] > old["p95"] * SLOWER_RATIO else ""
+        lines.append(
+            f"{name}: p95 {old['p95']:.1f} -> {new['p95']:.1f} ms, {old['rps']:.1f} -> {new['rps']:.1f} req/s{marker}"
+        )
+    return lines
+
+
+class LoadTest:
+    def __init__(self, base_url: str, *, concurrency: int = 10, duration: float = 30, seed: int = 42):
+        parts = urlsplit(base_url)
+        self.scheme, self.netloc = parts.scheme or "http", parts.netloc
+        self.concurrency = concurrency
+        self.duration = duration
+        self.seed = seed
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+        self.login_path = urlsplit(resolve_url(settings.LOGIN_URL)).path
+
+    def run(self) -> dict:
+        rng = random.Random(self.seed)
+        targets = Targets.sample(rng)
+        sessions = login_sessions(self.concurrency)
+        self.deadline = time.monotonic() + self.duration
+        started = time.perf_counter()
+        workers = [
+            threading.Thread(target=self._work, args=(session, targets, random.Random(self.seed + index)))
+            for index, session in enumerate(sessions)
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            Session.objects.filter(session_key__in=sessions).delete()
+        return {
+            "concurrency": len(sessions),
+            "seed": self.seed,
+            **summarize(self.samples, time.perf_counter() - started),
+        }
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return connection_class(self.netloc, timeout=TIMEOUT)
+
+    def _succeeded(self, route: Route, response) -> bool:
+        if response.status < 300:
+            return True
+        if not route.redirects or response.status >= 400:
+            return False
+        # An expired or rejected session sends every page to the login form
+        return urlsplit(response.getheader("Location", "")).path != self.login_path
+
+    def _work(self, session: str, targets: Targets, rng: random.Random) -> None:
+        csrf = get_random_string(32)
+        cookies = f"{settings.SESSION_COOKIE_NAME}={session}; {settings.CSRF_COOKIE_NAME}={csrf}"
+        connection = self._connect()
+        weights = [route.weight for route in ROUTES]
+        local = defaultdict(list)
+        while time.monotonic() < self.deadline:
+            route = rng.choices(ROUTES, weights)[0]
+            path, form, headers = route.build(targets, rng)
+            headers.update({"Cookie": cookies, "X-CSRFToken": csrf})
+            body = None
+            if form is not None:
+                body = urlencode(form)
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            started = time.perf_counter()
+            try:
+                connection.request(route.method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = self._succeeded(route, response)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = self._connect()
+                ok = False
+            local[route.name].append((time.perf_counter() - started, ok))
+        connection.close()
+        with self.lock:
+            for name, results in local.items():
+                self.samples[name].extend(results)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as results:
+        return json.load(results)
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from shared.benchmarks import ROUNDS, THRESHOLD, load_baseline, regressions, run_benchmarks, save_baseline
+
+
+class Command(BaseCommand):
+    help = "Run the model-layer micro-benchmarks on a test database and compare them with a baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Only run benchmarks whose name starts with one of these.")
+        parser.add_argument("--baseline", default=settings.BASE_DIR / "benchmarks.json")
+        parser.add_argument("--save", action="store_true", help="Store the results as the new baseline.")
+        parser.add_argument("--rounds", type=int, default=ROUNDS)
+        parser.add_argument(
+            "--threshold", type=float, default=THRESHOLD, help="Allowed slowdown before failing, 0.25 = 25%%."
+        )
+
+    def handle(self, *args, **options):
+        if options["rounds"] < 1:
+            raise CommandError("--rounds must be positive")
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmarks(options["names"], options["rounds"], log=self.stdout.write)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["save"]:
+            save_baseline(options["baseline"], {**load_baseline(options["baseline"]), **results})
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} results to {options['baseline']}."))
+            return
+        slower = regressions(load_baseline(options["baseline"]), results, options["threshold"])
+        if slower:
+            raise CommandError("Benchmarks regressed:\n" + "\n".join(slower))
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(results)} benchmarks within {options['threshold']:.0%} of the baseline.")
+        )
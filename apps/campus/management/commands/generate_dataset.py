@@ -0,0 +1,23 @@
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.campus.dataset import DatasetConfig, DatasetExists, DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = "Fill an empty database with a seeded synthetic dataset (see apps.campus.dataset)."
+
+    def add_arguments(self, parser):
+        for field in fields(DatasetConfig):
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=field.type, default=field.default)
+
+    def handle(self, *args, **options):
+        config = DatasetConfig(**{field.name: options[field.name] for field in fields(DatasetConfig)})
+        if config.batch_size < 1 or min(config.users, config.organizations, config.threads, config.posts) < 1:
+            raise CommandError("--users, --organizations, --threads, --posts and --batch-size must be positive")
+        try:
+            created = DatasetGenerator(config, log=self.stdout.write).generate()
+        except DatasetExists as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"Generated {sum(created.values())} rows with seed {config.seed}."))
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.campus.importer import BATCH_SIZE, ArchiveImporter
+
+
+class Command(BaseCommand):
+    help = "Bulk import organizations, threads, posts and comments from a JSONL archive (see apps.campus.importer)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL file to import, or - for standard input.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        importer = ArchiveImporter(batch_size=options["batch_size"])
+        if options["path"] == "-":
+            report = importer.import_lines(sys.stdin)
+        else:
+            try:
+                with open(options["path"], encoding="utf-8") as lines:
+                    report = importer.import_lines(lines)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {options['path']}: {exc}") from exc
+        self.stdout.write(str(report))
+        self.stdout.write(self.style.SUCCESS(f"Imported {sum(report.created.values())} rows."))
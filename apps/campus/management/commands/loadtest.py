@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.campus.loadtest import PERCENTILES, LoadTest, compare, load_results
+
+
+class Command(BaseCommand):
+    help = "Drive a weighted mix of requests against a running server (see apps.campus.loadtest)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the server under test.")
+        parser.add_argument("--concurrency", type=int, default=10, help="Logged-in users sending requests at once.")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--compare", help="Results JSON of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["duration"] <= 0:
+            raise CommandError("--concurrency and --duration must be positive")
+        try:
+            baseline = load_results(options["compare"]) if options["compare"] else None
+            results = LoadTest(
+                options["url"], concurrency=options["concurrency"], duration=options["duration"], seed=options["seed"]
+            ).run()
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self._write_table(results)
+        for line in compare(baseline, results) if baseline else []:
+            self.stdout.write(line)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(results, output, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f"{results['requests']} requests in {results['elapsed']}s ({results['rps']} req/s).")
+        )
+
+    def _write_table(self, results):
+        percentiles = "".join(f"{f'p{p}':>9}" for p in PERCENTILES)
+        self.stdout.write(f"{'route':<22}{'requests':>10}{'errors':>8}{'req/s':>9}{percentiles}  (ms)")
+        for name, route in results["routes"].items():
+            columns = f"{route['requests']:>10}{route['errors']:>8}{route['rps']:>9.1f}"
+            self.stdout.write(f"{name:<22}{columns}" + "".join(f"{route[f'p{p}']:>9.1f}" for p in PERCENTILES))
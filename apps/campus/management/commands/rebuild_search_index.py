@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.campus.search_index import SEARCH_INDEXES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search tables from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "indexes",
+            nargs="*",
+            help=f"Indexes to rebuild ({', '.join(SEARCH_INDEXES)}). Defaults to all.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["indexes"] or list(SEARCH_INDEXES)
+        unknown = set(names) - set(SEARCH_INDEXES)
+        if unknown:
+            raise CommandError(f"Unknown indexes: {', '.join(sorted(unknown))}")
+        for name in names:
+            count = rebuild_index(SEARCH_INDEXES[name])
+            self.stdout.write(f"{name}: {count} rows")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.campus.reconciliation import counter_specs
+from shared.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = "Verify denormalized counters against their source tables and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing.")
+        parser.add_argument(
+            "--since",
+            help="ISO timestamp; only check rows whose sources changed after it (e.g. the last run).",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            metavar="LABEL",
+            help="Counter to check, e.g. post.upvotes (repeatable). Defaults to all.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        since = self._since(options["since"])
+        specs = self._specs(options["only"])
+
+        total_drifted = 0
+        for spec in specs:
+            report = reconcile(spec, dry_run=options["dry_run"], since=since, batch_size=options["batch_size"])
+            total_drifted += report.drifted
+            self.stdout.write(str(report))
+
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total_drifted} drifted counters."))
+
+    def _since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f"Invalid --since timestamp: {value}")
+        return timezone.make_aware(since) if timezone.is_naive(since) else since
+
+    def _specs(self, only):
+        specs = counter_specs()
+        unknown = set(only) - {spec.label for spec in specs}
+        if unknown:
+            raise CommandError(f"Unknown counters: {', '.join(sorted(unknown))}")
+        return [spec for spec in specs if spec.label in only] if only else specs
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+FTS_OPTIONS = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+# (table, columns, source table, source filter)
+SEARCH_TABLES = [
+    ("search_posts", ("title", "content"), "posts", "WHERE is_deleted = 0"),
+    ("search_threads", ("title", "description"), "threads", "WHERE is_deleted = 0"),
+    ("search_organizations", ("name", "description"), "organizations", "WHERE is_deleted = 0"),
+    ("search_users", ("username", "first_name", "last_name", "student_id"), "users", ""),
+]
+
+
+def _operations():
+    for table, columns, source, where in SEARCH_TABLES:
+        sources = ", ".join(f"COALESCE({column}, '')" for column in columns)
+        yield migrations.RunSQL(
+            [
+                f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)}, {FTS_OPTIONS})",
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) SELECT id, {sources} FROM {source} {where}",
+            ],
+            f"DROP TABLE {table}",
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campus", "0001_initial"),
+        ("accounts", "0001_initial"),
+        ("posts", "0004_timelineentry"),
+        ("threads", "0003_alter_threadmembership_role"),
+    ]
+
+    operations = list(_operations())
@@ -1,10 +1,10 @@
 # apps/campus/models.py
 from django.db import models
-from django.utils.text import slugify
 from shared.models import BaseModel
+from shared.slugs import UniqueSlugMixin
 
 
-class Organization(BaseModel):
+class Organization(UniqueSlugMixin, BaseModel):
     """Clubs, societies, and organizations"""
 
     ORG_TYPES = [
@@ -17,6 +17,8 @@ class Organization(BaseModel):
 
     name = models.CharField(max_length=200, unique=True)
     slug = models.SlugField(max_length=250, unique=True, blank=True)
+    slug_source = "name"
+    slug_fallback = "organization"
     description = models.TextField()
     org_type = models.CharField(max_length=20, choices=ORG_TYPES)
     logo = models.ImageField(upload_to="org_logos/", null=True, blank=True)
@@ -32,11 +34,6 @@ class Organization(BaseModel):
             models.Index(fields=["slug"]),
         ]
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.name
 
@@ -0,0 +1,131 @@
+"""Denormalized counters of the site and how to recompute each one.
+
+The specs are ordered: ``Profile.reputation_score`` is derived from the post and
+comment vote counters, so those are reconciled first.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.accounts.models import Profile
+from apps.campus.models import Organization, OrganizationMembership
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.posts.ranking import refresh_hot_scores
+from apps.threads.models import Thread
+from apps.votes.models import Vote, VoteDelta
+from shared.reconciliation import CounterSpec
+
+
+def _count(queryset, group_by: str):
+    """Correlated ``COUNT(*)`` of ``queryset`` rows grouped by ``group_by``, 0 if none."""
+    total = queryset.order_by().values(group_by).annotate(total=Count("pk")).values("total")
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+def _aggregate(queryset, group_by: str, aggregate):
+    total = queryset.order_by().values(group_by).annotate(total=aggregate).values("total")
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+def _votes(model, value: int):
+    """Votes of ``value`` on each row, less the deltas staged by write-behind voting.
+
+    Staged votes are already in the votes table but not yet in the counter; a
+    flush moves them there atomically, so the expected counter never counts them
+    twice, whether or not a flush runs during the reconciliation.
+    """
+    field = "upvotes" if value == 1 else "downvotes"
+
+    def actual():
+        content_type = ContentType.objects.get_for_model(model)
+        votes = _count(
+            Vote.objects.filter(content_type=content_type, object_id=OuterRef("pk"), vote_type=value),
+            "object_id",
+        )
+        pending = _aggregate(
+            VoteDelta.objects.filter(content_type=content_type, object_id=OuterRef("pk")), "object_id", Sum(field)
+        )
+        return votes - pending
+
+    return actual
+
+
+def _votes_changed(model):
+    """Rows whose vote counters changed, or that got votes written directly, after ``since``.
+
+    Removed votes leave no row behind; the counter change they caused sets
+    ``counters_changed_at`` on the target instead.
+    """
+
+    def changed_since(since):
+        content_type = ContentType.objects.get_for_model(model)
+        voted = Vote.objects.filter(content_type=content_type, updated_at__gte=since).values("object_id")
+        return Q(counters_changed_at__gte=since) | Q(pk__in=voted)
+
+    return changed_since
+
+
+def _member_count():
+    return _count(OrganizationMembership.objects.filter(organization=OuterRef("pk"), status="active"), "organization")
+
+
+def _post_count():
+    return _count(Post.objects.filter(thread=OuterRef("pk"), is_deleted=False), "thread")
+
+
+def _comment_count():
+    return _count(Comment.objects.filter(post=OuterRef("pk"), is_deleted=False), "post")
+
+
+def _reputation():
+    """Net votes received on the user's live posts and comments."""
+    net = Sum("upvotes") - Sum("downvotes")
+    on_posts = _aggregate(Post.objects.filter(author=OuterRef("pk"), is_deleted=False), "author", net)
+    on_comments = _aggregate(Comment.objects.filter(author=OuterRef("pk"), is_deleted=False), "author", net)
+    return on_posts + on_comments
+
+
+def _reputation_changed(since):
+    authors = [
+        Q(pk__in=model.objects.filter(_votes_changed(model)(since) | Q(updated_at__gte=since)).values("author"))
+        for model in (Post, Comment)
+    ]
+    return authors[0] | authors[1]
+
+
+def counter_specs() -> list[CounterSpec]:
+    return [
+        CounterSpec(
+            "organization.member_count",
+            Organization,
+            "member_count",
+            _member_count,
+            lambda since: Q(
+                pk__in=OrganizationMembership.objects.filter(updated_at__gte=since).values("organization")
+            ),
+        ),
+        CounterSpec(
+            "thread.post_count",
+            Thread,
+            "post_count",
+            _post_count,
+            lambda since: Q(pk__in=Post.objects.filter(updated_at__gte=since).values("thread")),
+        ),
+        CounterSpec("post.upvotes", Post, "upvotes", _votes(Post, 1), _votes_changed(Post), refresh_hot_scores),
+        CounterSpec(
+            "post.downvotes", Post, "downvotes", _votes(Post, -1), _votes_changed(Post), refresh_hot_scores
+        ),
+        CounterSpec(
+            "post.comment_count",
+            Post,
+            "comment_count",
+            _comment_count,
+            lambda since: Q(pk__in=Comment.objects.filter(updated_at__gte=since).values("post")),
+            refresh_hot_scores,
+        ),
+        CounterSpec("comment.upvotes", Comment, "upvotes", _votes(Comment, 1), _votes_changed(Comment)),
+        CounterSpec("comment.downvotes", Comment, "downvotes", _votes(Comment, -1), _votes_changed(Comment)),
+        CounterSpec("profile.reputation_score", Profile, "reputation_score", _reputation, _reputation_changed),
+    ]
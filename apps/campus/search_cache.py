@@ -0,0 +1,167 @@
+"""Result caching, coalescing and supersession for search requests.
+
+Typing in the header search box sends a burst of overlapping HTMX requests.
+Results are cached for a short time under the normalized query and the viewer's
+visibility context, so "Robot", "robot " and "ROBOT" share one entry; a
+``version`` from the searched data retires entries once the data changes. On a
+miss, identical queries running at the same time wait for the first one instead
+of repeating its work. Every request from a client with a session takes a ticket
+from that session's sequence; a request whose client has sent a
+newer query by the time its result is ready, computed or waited for, is not
+rendered, as its response would be replaced anyway. The result is still cached.
+Clients without a session take no tickets: an address is shared by everyone
+behind the same NAT, who would cancel each other's searches.
+
+Only one worker process is covered by default. Results and tickets live in the
+default cache, a per-process LocMemCache unless configured otherwise, and
+coalescing waits on in-process events. With several workers a query served by
+another worker neither reuses the result nor supersedes the ticket; pointing
+the default cache at a shared backend (e.g. Redis) extends caching and
+supersession to all workers. The ``versions`` database cache is not used here:
+it would turn every keystroke into several database writes.
+"""
+
+import hashlib
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+
+from apps.campus.typeahead import WORD_RE
+from apps.posts.visibility import visibility_variant
+from shared.fragments import count_lookup
+
+SEARCH_CACHE_TIMEOUT = 30
+# How long a coalesced request waits for the first one before computing itself
+COALESCE_TIMEOUT = 5
+CLIENT_SEQUENCE_TIMEOUT = 60 * 5
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(WORD_RE.findall(query.lower()))
+
+
+def _record(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def search_stats() -> dict[str, int]:
+    """Search request counts of this process.
+
+    ``skipped`` did no search work; ``superseded`` were computed or waited for
+    but not rendered.
+    """
+    with _stats_lock:
+        stats = Counter(_stats)
+    return {
+        "requests": stats["request"],
+        "hits": stats["hit"],
+        "misses": stats["miss"],
+        "coalesced": stats["coalesced"],
+        "superseded": stats["superseded"],
+        "skipped": stats["hit"] + stats["coalesced"],
+    }
+
+
+def reset_search_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+# Supersession
+
+
+def _client_key(session_key: str) -> str:
+    return f"campus:search:client:{hashlib.md5(session_key.encode(), usedforsecurity=False).hexdigest()}"
+
+
+def take_ticket(request) -> tuple[str, int] | None:
+    """Register a new search from this client and return its ticket, if it has a session."""
+    if not request.session.session_key:
+        return None
+    key = _client_key(request.session.session_key)
+    cache.add(key, 0, CLIENT_SEQUENCE_TIMEOUT)
+    try:
+        return key, cache.incr(key)
+    except ValueError:
+        # Expired between add and incr
+        cache.set(key, 1, CLIENT_SEQUENCE_TIMEOUT)
+        return key, 1
+
+
+def is_superseded(ticket: tuple[str, int]) -> bool:
+    key, number = ticket
+    return cache.get(key, number) > number
+
+
+# Coalescing
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _coalesce(key: str, compute):
+    """Run ``compute`` once for concurrent callers passing the same ``key``."""
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        if flight.done.wait(COALESCE_TIMEOUT) and not flight.failed:
+            _record("coalesced")
+            return flight.result
+        return compute()
+    try:
+        flight.result = compute()
+        return flight.result
+    except BaseException:
+        flight.failed = True
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def cached_search(request, kind: str, query: str, compute, ticket=None, version=None):
+    """Return ``compute()`` for the normalized ``query``, sharing work where possible.
+
+    ``compute`` must return a picklable value; ``version`` lets writes to the
+    searched data retire cached results before they expire. Returns ``None`` when
+    ``ticket`` was superseded by a newer search from the same client while the
+    result was being computed or waited for.
+    """
+    _record("request")
+    variant = visibility_variant(request.user)
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    key = f"campus:search:{kind}:{version}:{variant}:{digest}"
+    result = cache.get(key)
+    count_lookup(result is not None)
+    if result is not None:
+        _record("hit")
+        return result
+
+    def compute_and_store():
+        _record("miss")
+        value = compute()
+        cache.set(key, value, SEARCH_CACHE_TIMEOUT)
+        return value
+
+    result = _coalesce(key, compute_and_store)
+    if ticket is not None and is_superseded(ticket):
+        _record("superseded")
+        return None
+    return result
@@ -0,0 +1,228 @@
+"""SQLite FTS5 full-text index for site search.
+
+Each searchable model has an FTS5 table holding a copy of its searchable text,
+keyed by ``rowid`` = the model's primary key. Signals keep the tables current (see
+``apps.campus.signals``) and ``rebuild_search_index`` repopulates them.
+``search`` narrows any queryset of the model to the rows matching a query and
+annotates ``search_rank``, the BM25 score (lower is better), so callers such as
+the post search can still apply ``Post.objects.visible_to_user`` in SQL.
+``search_page`` returns one keyset page of results with highlighted snippets
+that FTS5 cuts from the indexed text, so full post bodies are never loaded.
+Every write to an index bumps its version (``index_version``) in the shared
+``versions`` cache, which keys cached search results.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.posts.models import Post
+from apps.threads.models import Thread
+from shared.fragments import bump_version, get_version
+from shared.pagination import InvalidCursor, KeysetPage, decode_cursor, encode_cursor
+
+SEARCH_INDEX_VERSION = "campus-search-index"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_QUERY_TERMS = 8
+
+RESULTS_PER_PAGE = 10
+SNIPPET_TOKENS = 24
+# Private-use characters delimit matches, so they survive HTML escaping
+MARK_START, MARK_END = "\ue000", "\ue001"
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    table: str
+    model: type
+    fields: tuple[str, ...]
+    # BM25 weight of each field, e.g. titles count more than bodies
+    weights: tuple[float, ...]
+    # Long text field shown as a snippet; results never load it from the model table
+    excerpt_field: str | None = None
+
+    def indexable(self, obj) -> bool:
+        return not getattr(obj, "is_deleted", False)
+
+    def create_sql(self) -> str:
+        columns = ", ".join(self.fields)
+        return (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            f"{columns}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+
+SEARCH_INDEXES = {
+    "posts": SearchIndex("search_posts", Post, ("title", "content"), (10.0, 1.0), "content"),
+    "threads": SearchIndex("search_threads", Thread, ("title", "description"), (10.0, 1.0), "description"),
+    "organizations": SearchIndex(
+        "search_organizations", Organization, ("name", "description"), (10.0, 1.0), "description"
+    ),
+    "users": SearchIndex(
+        "search_users", User, ("username", "first_name", "last_name", "student_id"), (10.0, 5.0, 5.0, 10.0)
+    ),
+}
+
+
+def index_for_model(model) -> SearchIndex | None:
+    for index in SEARCH_INDEXES.values():
+        if index.model is model:
+            return index
+    return None
+
+
+def match_expression(text: str) -> str | None:
+    """Turn user input into an FTS5 query: every word must match as a prefix.
+
+    Words are quoted, so FTS5 operators typed by the user are matched literally.
+    """
+    terms = TOKEN_RE.findall(text.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search(queryset, text: str):
+    """Filter ``queryset`` to rows matching ``text``, best first, with ``search_rank``."""
+    index = index_for_model(queryset.model)
+    match = match_expression(text)
+    if match is None:
+        return queryset.none()
+    table = index.table
+    pk_column = f'"{index.model._meta.db_table}"."{index.model._meta.pk.column}"'
+    weights = ", ".join(str(weight) for weight in index.weights)
+    return (
+        queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", (match,)))
+        .annotate(
+            search_rank=RawSQL(
+                f"SELECT bm25({table}, {weights}) FROM {table} WHERE {table} MATCH %s AND rowid = {pk_column}",
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+        .order_by("search_rank", "-pk")
+    )
+
+
+def _highlight(text: str) -> str:
+    return mark_safe(escape(text).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+def _snippets(index: SearchIndex, match: str, pks) -> dict:
+    """``{pk: (highlighted first field, snippet of the excerpt field)}`` for ``pks``."""
+    table = index.table
+    columns = [f"highlight({table}, 0, %s, %s)"]
+    params = [MARK_START, MARK_END]
+    if index.excerpt_field:
+        columns.append(f"snippet({table}, {index.fields.index(index.excerpt_field)}, %s, %s, %s, {SNIPPET_TOKENS})")
+        params += [MARK_START, MARK_END, "…"]
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, {', '.join(columns)} FROM {table} "
+            f"WHERE {table} MATCH %s AND rowid IN ({placeholders})",
+            [*params, match, *pks],
+        )
+        return {row[0]: [_highlight(value) for value in row[1:]] for row in cursor.fetchall()}
+
+
+def _after_cursor(ranked, cursor: str | None):
+    """``ranked`` rows after the position ``cursor`` points at; all of them for a missing or bad cursor."""
+    if not cursor:
+        return ranked
+    try:
+        rank, pk = decode_cursor(cursor)
+        return ranked.filter(Q(search_rank__gt=float(rank)) | Q(search_rank=float(rank), pk__lt=int(pk)))
+    except (InvalidCursor, TypeError, ValueError):
+        return ranked
+
+
+def _load_results(queryset, index: SearchIndex, text: str, ranks: dict) -> list:
+    """The rows of ``ranks`` in rank order, annotated with their score and snippets."""
+    objects = queryset.filter(pk__in=list(ranks))
+    if index.excerpt_field:
+        objects = objects.defer(index.excerpt_field)
+    snippets = _snippets(index, match_expression(text), list(ranks))
+    results = sorted(objects, key=lambda obj: (ranks[obj.pk], -obj.pk))
+    for obj in results:
+        obj.search_score = -ranks[obj.pk]
+        obj.search_title, *excerpt = snippets.get(obj.pk, [None])
+        obj.search_excerpt = excerpt[0] if excerpt else None
+    return results
+
+
+def search_page(queryset, text: str, cursor: str | None = None, per_page: int = RESULTS_PER_PAGE) -> KeysetPage:
+    """One keyset page of ``queryset`` rows matching ``text``, best first.
+
+    Each result gets ``search_score`` (higher is more relevant), ``search_title``
+    and, where the index has an excerpt field, ``search_excerpt``. Ranking reads
+    only ids and scores; the page's rows are then loaded without the excerpt field.
+    """
+    ranked = _after_cursor(search(queryset, text), cursor)
+    rows = list(ranked.values_list("pk", "search_rank")[: per_page + 1])
+    if not rows:
+        return KeysetPage([], None)
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
+    return KeysetPage(_load_results(queryset, index_for_model(queryset.model), text, dict(rows)), next_cursor)
+
+
+def index_version(model) -> int:
+    """Version of the index of ``model``, changed by every write to it."""
+    return get_version(SEARCH_INDEX_VERSION, index_for_model(model).table)
+
+
+def _index_changed(index: SearchIndex) -> None:
+    bump_version(SEARCH_INDEX_VERSION, index.table)
+
+
+def index_object(obj) -> None:
+    """Insert or refresh ``obj`` in its index (removing it if no longer indexable)."""
+    index = index_for_model(type(obj))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {index.table} WHERE rowid = %s", [obj.pk])
+        if index.indexable(obj):
+            columns = ", ".join(index.fields)
+            placeholders = ", ".join(["%s"] * (len(index.fields) + 1))
+            cursor.execute(
+                f"INSERT INTO {index.table} (rowid, {columns}) VALUES ({placeholders})",
+                [obj.pk, *(getattr(obj, field) or "" for field in index.fields)],
+            )
+    _index_changed(index)
+
+
+def remove_object(model, pk) -> None:
+    index = index_for_model(model)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {index.table} WHERE rowid = %s", [pk])
+    _index_changed(index)
+
+
+def rebuild_index(index: SearchIndex) -> int:
+    """Repopulate one index from its source table in a single statement."""
+    meta = index.model._meta
+    columns = ", ".join(index.fields)
+    sources = ", ".join(f"COALESCE({meta.get_field(field).column}, '')" for field in index.fields)
+    where = " WHERE is_deleted = 0" if any(f.name == "is_deleted" for f in meta.fields) else ""
+    with connection.cursor() as cursor:
+        cursor.execute(index.create_sql())
+        cursor.execute(f"DELETE FROM {index.table}")
+        cursor.execute(
+            f"INSERT INTO {index.table} (rowid, {columns}) "
+            f"SELECT {meta.pk.column}, {sources} FROM {meta.db_table}{where}"
+        )
+        # Merge the b-tree segments written by the bulk insert
+        cursor.execute(f"INSERT INTO {index.table} ({index.table}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {index.table}")
+        count = cursor.fetchone()[0]
+    _index_changed(index)
+    return count
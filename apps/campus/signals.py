@@ -1,7 +1,15 @@
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from apps.campus.models import OrganizationMembership
+from apps.accounts.models import User
+from apps.campus.models import Organization, OrganizationMembership
+from apps.campus.search_index import index_for_model, index_object, remove_object
+from apps.campus.templatetags.campus_sidebar import SIDEBAR_VERSION, post_scope
+from apps.campus.typeahead import TYPEAHEAD_FIELDS, invalidate_typeahead
+from apps.posts.models import Post
+from apps.posts.visibility import invalidate_visibility_context
+from apps.threads.models import Thread
+from shared.fragments import bump_version
 
 
 @receiver([post_save, post_delete], sender=OrganizationMembership)
@@ -11,4 +19,66 @@ def update_member_count(sender, instance: OrganizationMembership, **kwargs):
         OrganizationMembership.objects.filter(organization=org, status="active").count()
     )
     org.member_count = active_count
-    org.save(update_fields=["member_count", "updated_at"])
\ No newline at end of file
+    org.save(update_fields=["member_count", "updated_at"])
+
+
+@receiver([post_save, post_delete], sender=OrganizationMembership)
+def invalidate_member_visibility(sender, instance: OrganizationMembership, **kwargs):
+    invalidate_visibility_context(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_sidebar(sender, instance, **kwargs):
+    bump_version(SIDEBAR_VERSION, "organizations")
+
+
+@receiver([post_save, post_delete], sender=Thread)
+def invalidate_thread_sidebar(sender, instance, **kwargs):
+    bump_version(SIDEBAR_VERSION, "threads")
+
+
+def _organization_id(post: Post, thread_id):
+    if thread_id == post.thread_id and Post.thread.is_cached(post):
+        return post.thread.organization_id
+    return Thread.objects.filter(pk=thread_id).values_list("organization_id", flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_sidebars(sender, instance: Post, **kwargs):
+    """Drop the sidebar post lists of the viewers who could see the post, before or after the write."""
+    scopes = {(instance.visibility, instance.thread_id), getattr(instance, "_loaded_scope", (None, None))}
+    for visibility, thread_id in scopes:
+        if thread_id is None:
+            continue
+        organization_id = _organization_id(instance, thread_id) if visibility == "organization" else None
+        bump_version(SIDEBAR_VERSION, post_scope(visibility, thread_id, organization_id))
+    instance._loaded_scope = (instance.visibility, instance.thread_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Thread)
+@receiver(post_save, sender=Organization)
+@receiver(post_save, sender=User)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    index = index_for_model(sender)
+    # Skip saves that cannot change indexed text, e.g. last_login on sign-in
+    if update_fields is not None and not {*index.fields, "is_deleted"} & set(update_fields):
+        return
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Thread)
+@receiver(post_delete, sender=Organization)
+@receiver(post_delete, sender=User)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_object(sender, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Thread)
+@receiver([post_save, post_delete], sender=Organization)
+@receiver([post_save, post_delete], sender=User)
+def refresh_typeahead(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {*TYPEAHEAD_FIELDS, "is_deleted"} & set(update_fields):
+        return
+    invalidate_typeahead()
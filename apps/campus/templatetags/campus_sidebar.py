@@ -1,65 +1,116 @@
+import hashlib
+
 from django import template
+from django.core.cache import cache
 
 from apps.campus.models import Organization
 from apps.threads.models import Thread
+from apps.posts.feeds import POPULAR_ORDERING
 from apps.posts.models import Post
+from apps.posts.visibility import get_visibility_context, visibility_variant
+from shared.fragments import bump_version, count_lookup, get_versions
 
 register = template.Library()
 
+# Sidebar lists are cached per visibility context under versions bumped by the
+# writes that can change them (see apps.campus.signals): organization writes for
+# the organization list, thread writes for the thread list, and post writes for
+# the post lists of the post's visibility scope only. "all" covers bulk loads.
+SIDEBAR_VERSION = "campus-sidebar"
+SIDEBAR_CACHE_TIMEOUT = 60 * 5
+# Vote counters and hot scores change without signals, so popular lists expire sooner
+POPULAR_CACHE_TIMEOUT = 60
+
+
+def post_scope(visibility: str, thread_id, organization_id) -> str:
+    """Version name of the post lists a post with this visibility can appear in."""
+    if visibility == "thread":
+        return f"posts-thread-{thread_id}"
+    if visibility == "organization":
+        return f"posts-org-{organization_id}"
+    return "posts-public"
+
+
+def invalidate_sidebars() -> None:
+    """Drop every cached sidebar list, e.g. after a bulk load that sent no signals."""
+    bump_version(SIDEBAR_VERSION, "all")
+
+
+def _viewer_scopes(user) -> list[str]:
+    scopes = ["posts-public"]
+    if user and user.is_authenticated:
+        visibility = get_visibility_context(user)
+        scopes += [post_scope("organization", None, pk) for pk in sorted(visibility.org_ids)]
+        scopes += [post_scope("thread", pk, None) for pk in sorted(visibility.thread_ids)]
+    return scopes
+
+
+def _cached(name: str, variant: str, limit: int, scopes, load, timeout: int = SIDEBAR_CACHE_TIMEOUT):
+    versions = repr(get_versions(SIDEBAR_VERSION, ["all", *scopes]))
+    digest = hashlib.md5(versions.encode(), usedforsecurity=False).hexdigest()
+    key = f"campus:sidebar:{name}:{variant}:{limit}:{digest}"
+    items = cache.get(key)
+    count_lookup(items is not None)
+    if items is None:
+        items = load()
+        cache.set(key, items, timeout)
+    return items
+
+
+def _viewer(context):
+    request = context.get("request")
+    return request.user if request else None
+
+
+def _visible_posts(user):
+    if user and user.is_authenticated:
+        return Post.objects.visible_to_user(user)
+    # For anonymous users, only show public posts
+    return Post.objects.filter(visibility="public")
+
+
+def _post_list(context, name: str, limit: int, load, timeout: int = SIDEBAR_CACHE_TIMEOUT):
+    """``load(visible posts)`` cached for the viewer's visibility context."""
+    user = _viewer(context)
+    # Thread writes are included: the lists show each post's thread
+    scopes = ["threads", *_viewer_scopes(user)]
+    return _cached(name, visibility_variant(user), limit, scopes, lambda: load(_visible_posts(user)), timeout)
+
 
 @register.inclusion_tag("campus/_sidebar_organizations.html", takes_context=True)
 def sidebar_organizations(context, limit: int = 10):
     organizations = Organization.objects.filter(is_active=True).order_by(
         "-member_count", "name"
-    )[:limit]
-    return {"organizations": organizations}
+    )
+    return {
+        "organizations": _cached(
+            "organizations", "global", limit, ["organizations"], lambda: list(organizations[:limit])
+        )
+    }
 
 
 @register.inclusion_tag("campus/_sidebar_threads.html", takes_context=True)
 def sidebar_threads(context, limit: int = 10):
     threads = Thread.objects.select_related("organization").order_by(
         "-is_pinned", "-updated_at"
-    )[:limit]
-    return {"threads": threads}
+    )
+    return {"threads": _cached("threads", "global", limit, ["threads"], lambda: list(threads[:limit]))}
 
 
 @register.inclusion_tag("campus/_sidebar_recent_posts.html", takes_context=True)
 def sidebar_recent_posts(context, limit: int = 5):
-    user = context.get("request").user if context.get("request") else None
-    if user and user.is_authenticated:
-        posts = (
-            Post.objects.visible_to_user(user)
-            .select_related("thread", "author")
-            .order_by("-created_at")[:limit]
-        )
-    else:
-        # For anonymous users, only show public posts
-        posts = (
-            Post.objects.filter(visibility="public")
-            .select_related("thread", "author")
-            .order_by("-created_at")[:limit]
-        )
-    return {"posts": posts}
+    def load(visible):
+        return list(visible.select_related("thread").order_by("-created_at")[:limit])
+
+    return {"posts": _post_list(context, "recent-posts", limit, load)}
 
 
 @register.inclusion_tag("campus/_sidebar_popular_posts.html", takes_context=True)
 def sidebar_popular_posts(context, limit: int = 5):
-    user = context.get("request").user if context.get("request") else None
-    if user and user.is_authenticated:
-        posts = (
-            Post.objects.visible_to_user(user)
-            .select_related("thread", "author")
-            .order_by(
-                "-upvotes", "downvotes", "-view_count", "-comment_count", "-created_at"
-            )[:limit]
-        )
-    else:
-        # For anonymous users, only show public posts
-        posts = (
-            Post.objects.filter(visibility="public")
-            .select_related("thread", "author")
-            .order_by(
-                "-upvotes", "downvotes", "-view_count", "-comment_count", "-created_at"
-            )[:limit]
-        )
-    return {"posts": posts}
+    def load(visible):
+        return list(visible.order_by(*POPULAR_ORDERING).values_list("pk", flat=True)[:limit])
+
+    # Only the order is cached: the rows, with their vote and comment counters, are read fresh
+    ids = _post_list(context, "popular-posts", limit, load, POPULAR_CACHE_TIMEOUT)
+    posts = Post.objects.select_related("thread").order_by().in_bulk(ids)
+    return {"posts": [posts[pk] for pk in ids if pk in posts]}
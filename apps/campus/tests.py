@@ -1,4 +1,38 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Template
+from django.test import LiveServerTestCase, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import Profile, User
+from apps.campus import search_index, typeahead
+from apps.campus.dataset import DatasetConfig, DatasetGenerator
+from apps.campus.loadtest import ROUTES, LoadTest, compare, percentile
+from apps.campus.models import Organization, OrganizationMembership
+from apps.campus.search_cache import cached_search, normalize_query, reset_search_stats, search_stats, take_ticket
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.threads.models import Thread
+from apps.votes.buffer import flush_vote_deltas
+from apps.votes.counters import apply_counter_delta, cast_vote
+from apps.votes.models import Vote, VoteDelta
+from shared.fragments import forget_local_versions
 
 # Create your tests here.
 
@@ -13,3 +47,492 @@ class AboutpageTest(TestCase):
     def test_aboutpage(self):
         response = self.client.get("/about/")
         self.assertEqual(response.status_code, 200)
+
+
+class ReconcileCountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.voter = User.objects.create_user(username="voter")
+        org = Organization.objects.create(name="Chess Club", description="Games", org_type="club")
+        cls.thread = Thread.objects.create(title="Openings", organization=org, created_by=cls.author)
+        cls.post = Post.objects.create(
+            title="Sicilian", content="Body", thread=cls.thread, author=cls.author, visibility="public"
+        )
+        cls.comment = Comment.objects.create(post=cls.post, author=cls.author, content="Najdorf")
+        for obj in (cls.post, cls.comment):
+            Vote.objects.create(
+                user=cls.voter, content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk, vote_type=1
+            )
+
+    def _corrupt(self):
+        Post.objects.filter(pk=self.post.pk).update(upvotes=7, comment_count=0)
+        Comment.objects.filter(pk=self.comment.pk).update(downvotes=3)
+        Thread.objects.filter(pk=self.thread.pk).update(post_count=0)
+        Profile.objects.filter(pk=self.author.pk).update(reputation_score=-5)
+
+    def _reconcile(self, *args):
+        out = StringIO()
+        call_command("reconcile_counters", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_writing(self):
+        self._corrupt()
+        output = self._reconcile("--dry-run")
+        self.assertIn("post.upvotes: scanned 1, drifted 1", output)
+        self.assertIn(f"pk={self.post.pk} 7->1", output)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes, 7)
+
+    def test_repairs_every_counter(self):
+        self._corrupt()
+        self._reconcile()
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.thread.refresh_from_db()
+        self.assertEqual((self.post.upvotes, self.post.comment_count), (1, 1))
+        self.assertEqual(self.comment.downvotes, 0)
+        self.assertEqual(self.thread.post_count, 1)
+        self.assertEqual(Profile.objects.get(pk=self.author.pk).reputation_score, 2)
+        self.assertIn("Repaired 0 drifted counters.", self._reconcile())
+
+    def test_staged_vote_deltas_are_not_drift(self):
+        self._reconcile()
+        fan = User.objects.create_user(username="fan")
+        post_ct = ContentType.objects.get_for_model(Post)
+        Vote.objects.create(user=fan, content_type=post_ct, object_id=self.post.pk, vote_type=1)
+        VoteDelta.objects.create(content_type=post_ct, object_id=self.post.pk, upvotes=1)
+        self.assertIn("Found 0 drifted counters.", self._reconcile("--dry-run", "--only", "post.upvotes"))
+        flush_vote_deltas()
+        self.assertIn("Found 0 drifted counters.", self._reconcile("--dry-run", "--only", "post.upvotes"))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes, 2)
+
+    def test_since_skips_untouched_rows(self):
+        self._corrupt()
+        output = self._reconcile("--since", (timezone.now() + timedelta(minutes=1)).isoformat())
+        self.assertIn("Repaired 0 drifted counters.", output)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes, 7)
+
+    def test_since_finds_switched_and_removed_votes(self):
+        day_ago = timezone.now() - timedelta(days=1)
+        for model in (Vote, Post, Comment):
+            model.objects.update(updated_at=day_ago)
+        since = timezone.now() - timedelta(hours=1)
+        # The voter switches the post's upvote to a downvote and takes the comment's upvote back
+        for target, value in ((self.post, -1), (self.comment, 1)):
+            content_type = ContentType.objects.get_for_model(target)
+            apply_counter_delta(target, cast_vote(self.voter, content_type, target.pk, value))
+        # ... and the counter writes drift
+        Post.objects.filter(pk=self.post.pk).update(upvotes=5)
+        Comment.objects.filter(pk=self.comment.pk).update(upvotes=4)
+
+        self._reconcile("--since", since.isoformat())
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual((self.post.upvotes, self.post.downvotes), (0, 1))
+        self.assertEqual(self.comment.upvotes, 0)
+        self.assertEqual(Profile.objects.get(pk=self.author.pk).reputation_score, -1)
+
+
+class SidebarCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = User.objects.create_user(username="member")
+        cls.org = Organization.objects.create(name="Debate Club", description="Talks", org_type="club")
+        OrganizationMembership.objects.create(organization=cls.org, user=cls.member, status="active")
+        cls.thread = Thread.objects.create(title="Motions", organization=cls.org, created_by=cls.member)
+        for visibility in ("public", "organization"):
+            Post.objects.create(
+                title=f"{visibility} post", content="Body", thread=cls.thread, author=cls.member, visibility=visibility
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def _render(self, user=None):
+        request = RequestFactory().get("/")
+        request.user = user or AnonymousUser()
+        return Template("{% load campus_sidebar %}{% sidebar_recent_posts 5 %}{% sidebar_organizations 10 %}").render(
+            Context({"request": request})
+        )
+
+    def test_cached_variants_match_visibility_and_skip_queries(self):
+        member = User.objects.get(pk=self.member.pk)
+        member_html = self._render(member)
+        anonymous_html = self._render()
+        self.assertIn("organization post", member_html)
+        self.assertNotIn("organization post", anonymous_html)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._render(), anonymous_html)
+            self.assertEqual(self._render(member), member_html)
+
+    def test_writes_invalidate(self):
+        self._render()
+        Post.objects.create(
+            title="Fresh motion", content="Body", thread=self.thread, author=self.member, visibility="public"
+        )
+        self.assertIn("Fresh motion", self._render())
+
+    def test_members_only_post_keeps_public_lists(self):
+        anonymous_html = self._render()
+        Post.objects.create(
+            title="Private motion", content="Body", thread=self.thread, author=self.member, visibility="thread"
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self._render(), anonymous_html)
+
+    def test_popular_posts_show_current_counters(self):
+        render = Template("{% load campus_sidebar %}{% sidebar_popular_posts 5 %}").render
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        render(Context({"request": request}))
+        Post.objects.filter(visibility="public").update(upvotes=41)
+        self.assertIn("41", render(Context({"request": request})))
+
+
+class SearchIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="ranger", first_name="Nadia", student_id="1903045")
+        org = Organization.objects.create(name="Astronomy Society", description="Telescopes", org_type="club")
+        cls.thread = Thread.objects.create(title="Meteor showers", organization=org, created_by=cls.user)
+        cls.title_hit = Post.objects.create(
+            title="Perseids tonight", content="Bring blankets", thread=cls.thread, author=cls.user, visibility="public"
+        )
+        cls.body_hit = Post.objects.create(
+            title="Gear list", content="Binoculars for the perseids", thread=cls.thread, author=cls.user,
+            visibility="public",
+        )
+        cls.private = Post.objects.create(
+            title="Perseids carpool", content="Members only", thread=cls.thread, author=cls.user,
+            visibility="organization",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _search(self, query, category, **params):
+        url = reverse("campus-search-results", args=[category])
+        return self.client.get(url, {"query": query, **params}).context
+
+    def test_ranks_matches_and_applies_visibility(self):
+        posts = self._search("perse", "posts")["results"]
+        self.assertEqual(posts, [self.title_hit, self.body_hit])
+        self.assertGreater(posts[0].search_score, posts[1].search_score)
+        self.assertEqual([u.pk for u in self._search("nad 1903", "users")["results"]], [self.user.pk])
+        organizations = self._search("astro", "organizations")["results"]
+        self.assertEqual([org.name for org in organizations], ["Astronomy Society"])
+
+    def test_signals_and_rebuild_keep_index_current(self):
+        self.thread.title = "Lunar eclipse"
+        self.thread.save()
+        self.assertEqual(self._search("meteor", "threads")["results"], [])
+        self.assertEqual(self._search("lunar", "threads")["results"], [self.thread])
+        self.body_hit.delete()
+        self.assertEqual(self._search("perseids", "posts")["results"], [self.title_hit])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        cache.clear()
+        self.assertEqual(self._search("perseids", "posts")["results"], [self.title_hit])
+        # FTS5 syntax typed by users is matched literally instead of raising
+        self.assertEqual(self._search('"OR* NEAR(', "posts")["results"], [])
+
+    def test_results_page_paginates_with_highlighted_snippets(self):
+        response = self.client.get(reverse("campus-search"), {"query": "perseids"})
+        self.assertContains(response, reverse("campus-search-results", args=["posts"]))
+        self.assertNotContains(response, "<mark>")
+
+        Post.objects.filter(pk=self.body_hit.pk).update(content="<b>Binoculars</b> for the perseids " + "sky " * 500)
+        call_command("rebuild_search_index", "posts", stdout=StringIO())
+        first = self._search("perseids", "posts", cursor="")
+        self.assertEqual(len(first["results"]), 2)
+        snippet = first["results"][1].search_excerpt
+        self.assertIn("<mark>perseids</mark>", snippet)
+        self.assertIn("&lt;b&gt;", snippet)
+        self.assertLess(len(snippet), 300)
+        self.assertIn("<mark>Perseids</mark>", first["results"][0].search_title)
+        # Ranking and snippets never read the post bodies from the posts table
+        self.assertIn("content", first["results"][0].get_deferred_fields())
+
+        public = Post.objects.filter(visibility="public")
+        page = search_index.search_page(public, "perseids", per_page=1)
+        self.assertEqual(page.object_list, [self.title_hit])
+        rest = search_index.search_page(public, "perseids", page.next_cursor, per_page=1)
+        self.assertEqual(rest.object_list, [self.body_hit])
+        self.assertIsNone(rest.next_cursor)
+
+
+@override_settings(TYPEAHEAD_REBUILD_ASYNC=False)
+class TypeaheadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="stargazer", first_name="Rafi", last_name="Karim")
+        cls.org = Organization.objects.create(name="Robotics Club", org_type="club")
+        Thread.objects.create(title="Robot arm build log", organization=cls.org, created_by=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        forget_local_versions()
+
+    def _typeahead(self, query):
+        return self.client.post(reverse("campus-search"), {"query": query}, HTTP_HX_REQUEST="true").context
+
+    def test_answers_from_memory(self):
+        self._typeahead("rob")
+        with self.assertNumQueries(0):
+            context = self._typeahead("rob")
+        self.assertEqual([org.name for org in context["organizations"]], ["Robotics Club"])
+        self.assertEqual([(t.title, t.organization.name) for t in context["threads"]],
+                         [("Robot arm build log", "Robotics Club")])
+        self.assertEqual(list(context["posts"]), [])
+        self.assertEqual([u.username for u in self._typeahead("karim raf")["users"]], ["stargazer"])
+        self.assertEqual(self._typeahead("rob zzz")["threads"], [])
+
+    def test_rebuilds_after_writes(self):
+        self.assertTrue(self._typeahead("robo")["organizations"])
+        self.org.name = "Drone Club"
+        self.org.save()
+        self.assertEqual(self._typeahead("robo")["organizations"], [])
+        self.assertEqual([t.organization.name for t in self._typeahead("arm")["threads"]], ["Drone Club"])
+        self.org.is_deleted = True
+        self.org.save(update_fields=["is_deleted"])
+        self.assertEqual(self._typeahead("drone")["organizations"], [])
+
+    def test_write_queues_rebuild_off_request(self):
+        self.assertTrue(self._typeahead("robo")["organizations"])
+        self.org.name = "Drone Club"
+        self.org.save()
+        patched = mock.patch.object(typeahead._executor, "submit")
+        with override_settings(TYPEAHEAD_REBUILD_ASYNC=True), patched as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                # The lookup answers from the previous index and only queues the rebuild
+                self.assertTrue(self._typeahead("robo")["organizations"])
+        func, version = submit.call_args.args
+        func(version)
+        self.assertEqual(self._typeahead("robo")["organizations"], [])
+
+
+@override_settings(TYPEAHEAD_REBUILD_ASYNC=False)
+class SearchCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name="Chess Club", org_type="club")
+
+    def setUp(self):
+        cache.clear()
+        reset_search_stats()
+        self.request = RequestFactory().post("/")
+        self.request.user = AnonymousUser()
+        self.request.session = SessionStore()
+        self.request.session.create()
+
+    def test_caches_normalized_query_per_visibility_context(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return ["result"]
+
+        self.assertEqual(cached_search(self.request, "test", normalize_query(" CHESS  club!"), compute), ["result"])
+        cached_search(self.request, "test", normalize_query("chess club"), compute)
+        self.assertEqual(len(calls), 1)
+        member = User.objects.create_user(username="member")
+        OrganizationMembership.objects.create(user=member, organization=self.org, status="active")
+        self.request.user = member
+        cached_search(self.request, "test", "chess club", compute)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(search_stats()["hits"], 1)
+
+    def test_coalesces_identical_in_flight_queries(self):
+        started, release, results = threading.Event(), threading.Event(), []
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return ["slow"]
+
+        leader = threading.Thread(target=lambda: results.append(cached_search(self.request, "test", "q", slow)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(
+            target=lambda: results.append(cached_search(self.request, "test", "q", lambda: ["again"]))
+        )
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(results, [["slow"], ["slow"]])
+        self.assertEqual(search_stats()["misses"], 1)
+
+    def test_drops_requests_superseded_while_searching(self):
+        ticket = take_ticket(self.request)
+
+        def compute():
+            # The client sends a newer query while this one is being searched
+            take_ticket(self.request)
+            return ["stale"]
+
+        self.assertIsNone(cached_search(self.request, "test", "q", compute, ticket))
+        self.assertEqual(search_stats()["superseded"], 1)
+        # The work is kept for the next request with the same query
+        again = cached_search(self.request, "test", "q", lambda: ["again"], take_ticket(self.request))
+        self.assertEqual(again, ["stale"])
+
+        response = self.client.post(reverse("campus-search"), {"query": "Chess"}, HTTP_HX_REQUEST="true")
+        self.assertContains(response, "Chess Club")
+
+    def test_results_follow_index_writes(self):
+        url = reverse("campus-search-results", args=["organizations"]) + "?query=chess"
+        self.assertNotContains(self.client.get(url), "Masters")
+        Organization.objects.create(name="Chess Masters", org_type="club")
+        self.assertContains(self.client.get(url), "<mark>Chess</mark> Masters")
+
+    def test_clients_without_session_take_no_ticket(self):
+        self.request.session = SessionStore()
+        self.assertIsNone(take_ticket(self.request))
+
+
+class ImportArchiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="archivist")
+        self.existing = Organization.objects.create(name="Debate Club", org_type="club")
+
+    def _import(self, records, batch_size=2):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as archive:
+            archive.write("\n".join(json.dumps(record) for record in records) + "\nnot json\n")
+        self.addCleanup(os.remove, archive.name)
+        out = StringIO()
+        call_command("import_archive", archive.name, "--batch-size", str(batch_size), stdout=out)
+        return out.getvalue()
+
+    def test_imports_tree_and_rebuilds_derived_data(self):
+        ids = {name: str(uuid.uuid4()) for name in ("org", "thread", "post", "c1", "c2", "c3")}
+        records = [
+            {"type": "organization", "uuid": ids["org"], "name": "Debate Club Archive", "org_type": "club"},
+            {"type": "thread", "uuid": ids["thread"], "organization": ids["org"], "created_by": "archivist",
+             "title": "Motions"},
+            {"type": "post", "uuid": ids["post"], "thread": ids["thread"], "author": "archivist",
+             "title": "Debate Club", "content": "Parliamentary rounds", "visibility": "public",
+             "created_at": "2019-03-01T10:00:00"},
+            {"type": "comment", "uuid": ids["c1"], "post": ids["post"], "author": "archivist", "content": "First"},
+            {"type": "comment", "uuid": ids["c2"], "post": ids["post"], "author": "archivist", "content": "Reply",
+             "parent": ids["c1"]},
+            {"type": "comment", "uuid": ids["c3"], "post": ids["post"], "author": "archivist", "content": "Deeper",
+             "parent": ids["c2"]},
+            {"type": "comment", "post": ids["post"], "author": "nobody", "content": "Orphan"},
+            {"type": "post", "thread": ids["thread"], "author": "archivist", "title": "Bad date",
+             "created_at": "2019-13-01T00:00:00"},
+            {"type": "post", "thread": ids["thread"], "author": "archivist", "title": "Bad choice",
+             "visibility": "everyone"},
+            {"type": "post", "thread": ids["thread"], "author": "archivist", "title": "Bad flag",
+             "is_pinned": "maybe"},
+            {"type": "organization", "name": "Bad type", "org_type": "guild"},
+        ]
+        output = self._import(records)
+        self.assertIn("rows/s", output)
+        self.assertIn("skipped (unknown reference): 1", output)
+        self.assertIn("skipped (invalid json): 1", output)
+        self.assertIn("skipped (invalid created_at): 1", output)
+        self.assertIn("skipped (invalid visibility): 1", output)
+        self.assertIn("skipped (invalid is_pinned): 1", output)
+        self.assertIn("skipped (invalid org_type): 1", output)
+        self.assertIn("post: 1 created", output)
+
+        org = Organization.objects.get(uuid=ids["org"])
+        post = Post.objects.get(uuid=ids["post"])
+        self.assertEqual(org.slug, "debate-club-archive")
+        self.assertEqual(post.slug, "debate-club")
+        self.assertEqual(post.created_at.year, 2019)
+        self.assertEqual(post.thread.post_count, 1)
+        self.assertEqual(post.comment_count, 3)
+        c1, c2, c3 = (Comment.objects.get(uuid=ids[name]) for name in ("c1", "c2", "c3"))
+        self.assertEqual((c3.parent_id, c3.level), (c2.pk, 2))
+        self.assertEqual(c3.path, c1.path + c2.path[-8:] + c3.path[-8:])
+        self.assertEqual(list(search_index.search(Post.objects.all(), "parliamentary")), [post])
+
+        # Running the same archive again imports nothing new
+        self.assertIn("skipped (already imported): 6", self._import(records))
+        self.assertEqual(Comment.objects.count(), 3)
+
+
+class GenerateDatasetTest(TestCase):
+    options = ["--users", "40", "--organizations", "4", "--threads", "6", "--posts", "30", "--comments", "200",
+               "--votes", "150", "--batch-size", "25"]
+
+    def _generate(self, seed="7"):
+        out = StringIO()
+        call_command("generate_dataset", *self.options, "--seed", seed, stdout=out)
+        return out.getvalue()
+
+    def _snapshot(self):
+        return (
+            list(User.objects.order_by("pk").values_list("username", "department", "student_id")),
+            list(Post.objects.order_by("pk").values_list("title", "slug", "visibility", "created_at")),
+            list(Comment.objects.order_by("pk").values_list("path", "level", "content")),
+            list(Vote.objects.order_by("pk").values_list("user__username", "object_id", "vote_type")),
+        )
+
+    def test_generates_consistent_dataset(self):
+        self.assertIn("Generated", self._generate())
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Profile.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertGreater(User.objects.values("department").distinct().count(), 1)
+        self.assertGreater(Comment.objects.filter(level__gt=1).count(), 0)
+
+        post = Post.objects.order_by("-comment_count").first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        self.assertEqual(post.thread.post_count, post.thread.posts.count())
+        for comment in Comment.objects.filter(parent__isnull=False).select_related("parent")[:50]:
+            self.assertEqual(comment.path[:-8], comment.parent.path)
+            self.assertEqual(comment.level, comment.parent.level + 1)
+        self.assertEqual(len(set(Post.objects.values_list("slug", flat=True))), 30)
+
+        with self.assertRaisesMessage(CommandError, "already exists"):
+            self._generate()
+
+    def test_same_seed_same_rows(self):
+        self._generate()
+        first = self._snapshot()
+        for model in (Vote, Organization, User):
+            model.objects.all().delete()
+        self._generate()
+        second = self._snapshot()
+        self.assertEqual((first[0], first[2], first[3]), (second[0], second[2], second[3]))
+        # Timestamps are relative to the current time
+        self.assertEqual([row[:3] for row in first[1]], [row[:3] for row in second[1]])
+
+
+class LoadTestTest(LiveServerTestCase):
+    def test_drives_every_route(self):
+        config = DatasetConfig(users=5, organizations=2, threads=3, posts=20, comments=40, votes=30)
+        DatasetGenerator(config).generate()
+        results = LoadTest(self.live_server_url, concurrency=2, duration=2).run()
+        self.assertEqual(results["concurrency"], 2)
+        self.assertEqual(set(results["routes"]), {route.name for route in ROUTES})
+        for name, route in results["routes"].items():
+            self.assertEqual(route["errors"], 0, name)
+            self.assertLessEqual(route["p50"], route["p99"])
+        self.assertEqual(compare(results, results)[0].count("(slower)"), 0)
+        # The synthetic users' sessions are gone
+        self.assertFalse(Session.objects.exists())
+
+    def test_redirects_to_login_are_errors(self):
+        load_test = LoadTest(self.live_server_url)
+        routes = {route.name: route for route in ROUTES}
+        vote, page = routes["vote"], routes["post-detail"]
+
+        def response(status, location=""):
+            return SimpleNamespace(status=status, getheader=lambda name, default: location or default)
+
+        self.assertTrue(load_test._succeeded(vote, response(302, "/posts/some-post/")))
+        self.assertFalse(load_test._succeeded(vote, response(302, "/accounts/login/?next=/vote/")))
+        self.assertFalse(load_test._succeeded(page, response(302, "/posts/some-post/")))
+        self.assertFalse(load_test._succeeded(page, response(404)))
+
+    def test_percentile(self):
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99)], [50.0, 95.0, 99.0])
+        self.assertEqual(percentile([], 50), 0.0)
@@ -0,0 +1,200 @@
+"""In-memory prefix index answering the HTMX search typeahead.
+
+Each process keeps, per category, a sorted array of ``(word, id)`` pairs built
+from usernames, student ids and names, organization names and thread titles,
+plus a compact tuple per object with what the dropdown displays. A lookup is a
+bisection followed by a short scan, with no database access.
+
+Writes to the indexed models only bump a version in the shared ``versions``
+cache (see ``apps.campus.signals`` and ``shared.fragments``). A lookup that sees
+a newer version than its process's index queues a rebuild in a background
+worker and answers from the current index meanwhile, so results lag writes by
+one rebuild. Only the first lookup of a process builds inline. With the
+``TYPEAHEAD_REBUILD_ASYNC`` setting off the rebuild runs inline in the lookup.
+"""
+
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.threads.models import Thread
+from shared.fragments import bump_version, count_lookup, get_version
+
+TYPEAHEAD_VERSION = ("campus-typeahead", "all")
+TYPEAHEAD_LIMIT = 5
+# Upper bound on index entries scanned for one prefix, e.g. a single letter
+MAX_SCAN = 2000
+DESCRIPTION_CHARS = 160
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def words(*values) -> set[str]:
+    return {word for value in values if value for word in WORD_RE.findall(value.lower())}
+
+
+class PrefixIndex:
+    """Sorted ``(word, id)`` pairs answering word-prefix lookups by bisection."""
+
+    def __init__(self, entries):
+        entries = sorted(set(entries))
+        self.words = [word for word, _ in entries]
+        self.ids = array("q", (pk for _, pk in entries))
+
+    def __len__(self):
+        return len(self.words)
+
+    def lookup(self, prefix: str):
+        """Yield ids of entries whose word starts with ``prefix``, in word order."""
+        start = bisect_left(self.words, prefix)
+        for position in range(start, min(len(self.words), start + MAX_SCAN)):
+            if not self.words[position].startswith(prefix):
+                break
+            yield self.ids[position]
+
+
+@dataclass(frozen=True)
+class Category:
+    queryset: Callable
+    fields: tuple[str, ...]
+    searchable: tuple[str, ...]
+    build: Callable[[dict], object]
+
+
+def _build_thread(row: dict) -> Thread:
+    organization = Organization(pk=row.pop("organization_id"), name=row.pop("organization__name"))
+    thread = Thread(**row)
+    thread.organization = organization
+    return thread
+
+
+CATEGORIES = {
+    "users": Category(
+        lambda: User.objects.all(),
+        ("id", "username", "first_name", "last_name", "department", "student_id"),
+        ("username", "student_id", "first_name", "last_name"),
+        lambda row: User(**row),
+    ),
+    "organizations": Category(
+        lambda: Organization.objects.filter(is_deleted=False),
+        ("id", "name", "slug", "org_type", "description"),
+        ("name",),
+        lambda row: Organization(**row),
+    ),
+    "threads": Category(
+        lambda: Thread.objects.filter(is_deleted=False),
+        ("id", "title", "slug", "description", "organization_id", "organization__name"),
+        ("title",),
+        _build_thread,
+    ),
+}
+
+
+# Fields whose change makes a cached index stale
+TYPEAHEAD_FIELDS = {field for category in CATEGORIES.values() for field in category.fields}
+
+
+class CategoryIndex:
+    def __init__(self, category: Category):
+        self.category = category
+        self.records = {}
+        entries = []
+        for row in category.queryset().values_list(*category.fields).iterator(chunk_size=2000):
+            record = dict(zip(category.fields, row))
+            if record.get("description"):
+                record["description"] = record["description"][:DESCRIPTION_CHARS]
+            self.records[record["id"]] = tuple(record.values())
+            entries.extend((word, record["id"]) for word in words(*(record[f] for f in category.searchable)))
+        self.prefixes = PrefixIndex(entries)
+
+    def _record(self, pk) -> dict:
+        return dict(zip(self.category.fields, self.records[pk]))
+
+    def search(self, terms: list[str], limit: int) -> list:
+        """Objects having a word starting with every term, at most ``limit`` of them."""
+        first, rest = terms[0], terms[1:]
+        found, seen = [], set()
+        for pk in self.prefixes.lookup(first):
+            if pk in seen:
+                continue
+            seen.add(pk)
+            record = self._record(pk)
+            if rest:
+                record_words = words(*(record[f] for f in self.category.searchable))
+                if not all(any(word.startswith(term) for word in record_words) for term in rest):
+                    continue
+            found.append(self.category.build(record))
+            if len(found) >= limit:
+                break
+        return found
+
+
+class TypeaheadIndex:
+    def __init__(self, version):
+        self.version = version
+        self.categories = {name: CategoryIndex(category) for name, category in CATEGORIES.items()}
+
+    def search(self, query: str, limit: int = TYPEAHEAD_LIMIT) -> dict[str, list]:
+        # Longest term first: it narrows the scanned range the most
+        terms = sorted(WORD_RE.findall(query.lower()), key=len, reverse=True)
+        if not terms:
+            return {name: [] for name in self.categories}
+        return {name: index.search(terms, limit) for name, index in self.categories.items()}
+
+
+_index: TypeaheadIndex | None = None
+_index_lock = threading.Lock()
+# Version of the rebuild queued in the background worker, if any
+_queued_version = None
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="typeahead-rebuild")
+
+
+def _rebuild(version) -> TypeaheadIndex:
+    global _index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = TypeaheadIndex(version)
+        return _index
+
+
+def _rebuild_in_background(version) -> None:
+    global _queued_version
+    try:
+        _rebuild(version)
+    finally:
+        _queued_version = None
+        close_old_connections()
+
+
+def _queue_rebuild(version) -> None:
+    global _queued_version
+    if _queued_version == version:
+        return
+    _queued_version = version
+    _executor.submit(_rebuild_in_background, version)
+
+
+def get_typeahead_index() -> TypeaheadIndex:
+    """The process-wide index; a stale one is answered from while it is rebuilt."""
+    version = get_version(*TYPEAHEAD_VERSION)
+    index = _index
+    count_lookup(index is not None and index.version == version)
+    if index is None or not settings.TYPEAHEAD_REBUILD_ASYNC:
+        return index if index is not None and index.version == version else _rebuild(version)
+    if index.version != version:
+        # Queued once the reading transaction, if any, is over
+        transaction.on_commit(lambda: _queue_rebuild(version))
+    return index
+
+
+def invalidate_typeahead() -> None:
+    bump_version(*TYPEAHEAD_VERSION)
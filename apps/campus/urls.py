@@ -9,6 +9,7 @@ from .views import (
     about,
     home,
     search,
+    search_results,
 )
 from .views_members import (
     OrganizationMembersListView,
@@ -21,6 +22,7 @@ urlpatterns = [
     path("", home, name="campus-home"),
     path("about/", about, name="campus-about"),
     path("search/", search, name="campus-search"),
+    path("search/<slug:category>/", search_results, name="campus-search-results"),
     path("orgs/", OrganizationListView.as_view(), name="org-list"),
     path("orgs/create/", OrganizationCreateView.as_view(), name="org-create"),
     path("orgs/<slug:slug>/", OrganizationDetailView.as_view(), name="org-detail"),
@@ -1,11 +1,24 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.http import Http404, HttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 
+from apps.posts.feeds import (
+    FEED_PAGE_TEMPLATE,
+    LATEST_ORDERING,
+    POPULAR_ORDERING,
+    feed_context,
+    is_feed_page_request,
+    paginate_feed,
+)
 from apps.posts.models import Post
+from apps.posts.timeline import home_timeline_page
 from apps.threads.models import Thread
+from apps.campus import search_index
 from apps.campus.models import Organization, OrganizationMembership
+from apps.campus.search_cache import cached_search, normalize_query, take_ticket
+from apps.campus.typeahead import get_typeahead_index
 from apps.accounts.models import User
 from apps.campus.forms import OrganizationForm
 
@@ -13,21 +26,22 @@ from apps.campus.forms import OrganizationForm
 def home(request):
     tab = request.GET.get("tab", "home")
 
-    # Use the custom manager to filter posts based on user visibility
-    queryset = Post.objects.visible_to_user(request.user)
-    if tab == "popular":
-        posts = queryset.order_by(
-            "-upvotes",
-            "downvotes",
-            "-view_count",
-            "-comment_count",
-            "-created_at",
-        )
+    if tab == "home" and request.user.is_authenticated:
+        # Materialized timeline of the user's threads
+        page = home_timeline_page(request.user, request.GET.get("cursor"))
+        feed = feed_context(request, page)
     else:
-        # 'home' and 'all' default ordering
-        posts = queryset.order_by("-is_pinned", "-created_at")
+        # Use the custom manager to filter posts based on user visibility
+        queryset = Post.objects.visible_to_user(request.user).select_related(
+            "thread", "author"
+        )
+        # 'all' (and 'home' for visitors) use the latest ordering
+        ordering = POPULAR_ORDERING if tab == "popular" else LATEST_ORDERING
+        feed = paginate_feed(request, queryset, ordering)
 
-    context = {"posts": posts, "active_tab": tab}
+    context = {"active_tab": tab, **feed}
+    if is_feed_page_request(request):
+        return render(request, FEED_PAGE_TEMPLATE, context)
     return render(request, "campus/home.html", context)
 
 
@@ -35,54 +49,43 @@ def about(request):
     return render(request, "campus/about.html")
 
 
+# Sections of the full search results page, in display order
+SEARCH_CATEGORIES = {
+    "users": "Users",
+    "organizations": "Organizations",
+    "threads": "Threads",
+    "posts": "Posts",
+}
+
+
+def _search_queryset(request, category):
+    """Rows of ``category`` the viewer may find; posts keep the viewer's visibility rules."""
+    if category == "posts":
+        return Post.objects.visible_to_user(request.user).select_related("thread", "author")
+    if category == "threads":
+        return Thread.objects.select_related("organization")
+    if category == "organizations":
+        return Organization.objects.all()
+    return User.objects.all()
+
+
 def search(request):
     if request.htmx:
-        query = request.POST.get("query", "")
-        print(f"Query: {query}")
+        query = normalize_query(request.POST.get("query", ""))
         if query:
-            # Search across multiple models
-            from django.db.models import Q
-
-            # Search posts
-            posts = (
-                Post.objects.visible_to_user(request.user)
-                .filter(Q(title__icontains=query) | Q(content__icontains=query))
-                .select_related("thread", "author", "thread__organization")
-                .distinct()
-            )[:5]  # Limit results for HTMX
-
-            # Search threads
-            threads = (
-                Thread.objects.filter(
-                    Q(title__icontains=query) | Q(description__icontains=query)
-                )
-                .select_related("organization", "created_by")
-                .distinct()
-            )[:5]
-
-            # Search organizations
-            organizations = (
-                Organization.objects.filter(
-                    Q(name__icontains=query) | Q(description__icontains=query)
-                ).distinct()
-            )[:5]
-
-            # Search users
-            users = (
-                User.objects.filter(
-                    Q(username__icontains=query)
-                    | Q(first_name__icontains=query)
-                    | Q(last_name__icontains=query)
-                    | Q(student_id__icontains=query)
-                ).distinct()
-            )[:5]
-
+            # Typeahead is answered from the in-memory prefix index; posts are on the full results page
+            index = get_typeahead_index()
+            results = cached_search(
+                request, "typeahead", query, lambda: index.search(query), take_ticket(request),
+                version=index.version,
+            )
+            if results is None:
+                # A newer query from this client is on its way; keep the current dropdown
+                return HttpResponse(status=204)
             context = {
-                "posts": posts,
-                "threads": threads,
-                "organizations": organizations,
-                "users": users,
-                "search_query": query,
+                **results,
+                "posts": [],
+                "search_query": request.POST["query"].strip(),
                 "is_htmx": True,
             }
             return render(request, "partials/_search_results.html", context)
@@ -102,53 +105,47 @@ def search(request):
             )
     else:
         # Handle non-HTMX requests (e.g., direct URL access)
-        query = request.GET.get("query", "")
-        if query:
-            # Search across multiple models
-            from django.db.models import Q
-
-            # Search posts
-            posts = (
-                Post.objects.visible_to_user(request.user)
-                .filter(Q(title__icontains=query) | Q(content__icontains=query))
-                .select_related("thread", "author", "thread__organization")
-                .distinct()
-            )
-
-            # Search threads
-            threads = (
-                Thread.objects.filter(
-                    Q(title__icontains=query) | Q(description__icontains=query)
-                )
-                .select_related("organization", "created_by")
-                .distinct()
-            )
-
-            # Search organizations
-            organizations = Organization.objects.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
-            ).distinct()
-
-            # Search users
-            users = User.objects.filter(
-                Q(username__icontains=query)
-                | Q(first_name__icontains=query)
-                | Q(last_name__icontains=query)
-                | Q(student_id__icontains=query)
-            ).distinct()
-
+        query = request.GET.get("query", "").strip()
+        if normalize_query(query):
+            # Each category is a section loading its own pages via search_results
             context = {
-                "posts": posts,
-                "threads": threads,
-                "organizations": organizations,
-                "users": users,
                 "search_query": query,
+                "categories": SEARCH_CATEGORIES.items(),
                 "is_htmx": False,
             }
             return render(request, "campus/search.html", context)
         return redirect("campus-home")
 
 
+def search_results(request, category):
+    """One page of full-text results for a category of the search results page."""
+    if category not in SEARCH_CATEGORIES:
+        raise Http404("Unknown search category")
+    query = normalize_query(request.GET.get("query", ""))
+    cursor = request.GET.get("cursor") or ""
+    queryset = _search_queryset(request, category)
+    page = cached_search(
+        request,
+        f"results:{category}:{cursor}",
+        query,
+        lambda: search_index.search_page(queryset, query, cursor),
+        version=search_index.index_version(queryset.model),
+    )
+    next_page_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params["cursor"] = page.next_cursor
+        next_page_url = f"{request.path}?{params.urlencode()}"
+    context = {
+        "category": category,
+        "label": SEARCH_CATEGORIES[category],
+        "results": page.object_list,
+        "is_first_page": not cursor,
+        "next_page_url": next_page_url,
+    }
+    return render(request, "campus/_search_result_page.html", context)
+
+
 class OrganizationListView(ListView):
     model = Organization
     paginate_by = 20
@@ -162,6 +159,11 @@ class OrganizationDetailView(DetailView):
     slug_url_kwarg = "slug"
     template_name = "campus/organization_detail.html"
 
+    def get_template_names(self):
+        if is_feed_page_request(self.request):
+            return [FEED_PAGE_TEMPLATE]
+        return super().get_template_names()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         membership = None
@@ -193,22 +195,15 @@ class OrganizationDetailView(DetailView):
 
         # Posts from threads under this organization with sorting tabs
         # Only show posts to active members
-        posts = Post.objects.none()  # Default to empty queryset
+        feed = {"posts": [], "next_page_url": None}
         if is_member:
             tab = self.request.GET.get("tab", "popular")
             posts_qs = Post.objects.visible_to_organization(
                 organization
             ).select_related("thread", "author")
-            if tab == "latest":
-                posts = posts_qs.order_by("-is_pinned", "-created_at")
-            else:  # popular (default)
-                posts = posts_qs.order_by(
-                    "-upvotes",
-                    "downvotes",
-                    "-view_count",
-                    "-comment_count",
-                    "-created_at",
-                )
+            # popular is the default tab
+            ordering = LATEST_ORDERING if tab == "latest" else POPULAR_ORDERING
+            feed = paginate_feed(self.request, posts_qs, ordering)
 
         # Leadership and staff groupings
         active_memberships = OrganizationMembership.objects.select_related(
@@ -243,7 +238,7 @@ class OrganizationDetailView(DetailView):
                 "is_staff": is_staff,
                 "pending_requests_count": pending_requests_count,
                 "threads": threads,
-                "posts": posts,
+                **feed,
                 "active_tab": tab if is_member else "popular",
                 "thread_count": threads.count(),
                 "post_count": post_count,
@@ -22,7 +22,7 @@ class OrganizationPendingRequestsView(LoginRequiredMixin, UserPassesTestMixin, L
 
     def get_queryset(self):
         return (
-            OrganizationMembership.objects.select_related("user")
+            OrganizationMembership.objects.select_related("user__profile")
             .filter(organization=self.get_org(), status="pending")
             .order_by("-created_at")
         )
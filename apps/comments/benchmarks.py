@@ -0,0 +1,24 @@
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.comments.models import MAX_COMMENT_DEPTH, Comment
+from apps.posts.models import Post
+from apps.threads.models import Thread
+from shared.benchmarks import benchmark
+
+
+@benchmark("comments.Comment.save (reply at maximum depth)", number=20)
+def comment_save_at_depth():
+    author = User.objects.create_user(username="commenter")
+    org = Organization.objects.create(name="Benchmark Association", description="Benchmarks", org_type="association")
+    thread = Thread.objects.create(title="General", organization=org, created_by=author)
+    post = Post.objects.create(title="Deep thread", content="Body", thread=thread, author=author)
+    parent = None
+    for _ in range(MAX_COMMENT_DEPTH):
+        parent = Comment.objects.create(post=post, author=author, parent=parent, content="Deeper")
+
+    def run():
+        # As the reply view does: the parent is loaded fresh, the branch above it lazily
+        reply = Comment(post=post, author=author, parent=Comment.objects.get(pk=parent.pk), content="Reply")
+        reply.save()
+
+    return run
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.campus.reconciliation import counter_specs
+from shared.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comment_count from the comments table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        spec = next(spec for spec in counter_specs() if spec.label == "post.comment_count")
+        report = reconcile(spec, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Repaired comment_count on {report.repaired} posts."))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 08:26
+
+from django.db import migrations, models
+
+from apps.comments.models import MAX_COMMENT_DEPTH, encode_path_segment
+
+UNVISITED_LEVEL = 10**6
+BATCH_SIZE = 1000
+
+
+def encode_paths(apps, schema_editor):
+    """Rewrite every path breadth-first, one depth at a time, in pk batches."""
+    Comment = apps.get_model("comments", "Comment")
+    Comment.objects.update(level=UNVISITED_LEVEL)
+    depth = 0
+    while True:
+        if depth == 0:
+            pending = Comment.objects.filter(parent__isnull=True)
+        else:
+            # Past the maximum depth, replies are re-attached to their grandparent
+            pending = Comment.objects.filter(parent__level=min(depth, MAX_COMMENT_DEPTH) - 1)
+        pending = pending.select_related("parent__parent").order_by("pk")
+        found = False
+        last_pk = 0
+        while batch := list(pending.filter(pk__gt=last_pk)[:BATCH_SIZE]):
+            found = True
+            last_pk = batch[-1].pk
+            for comment in batch:
+                if comment.parent is not None and comment.parent.level >= MAX_COMMENT_DEPTH - 1:
+                    comment.parent = comment.parent.parent
+                comment.level = comment.parent.level + 1 if comment.parent else 0
+                comment.path = (comment.parent.path if comment.parent else "") + encode_path_segment(comment.pk)
+            Comment.objects.bulk_update(batch, ["parent", "level", "path"])
+        if not found:
+            break
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, max_length=512),
+        ),
+        migrations.RunPython(encode_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0002_encoded_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="counters_changed_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,6 +1,26 @@
-from django.db import models
+from django.db import models, transaction
 from shared.models import BaseModel
 
+# Materialized path: the fixed-width base-36 ids of every ancestor and the comment
+# itself, so sorting by path walks the tree depth-first and a subtree is one range
+PATH_SEGMENT_WIDTH = 8
+PATH_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+MAX_COMMENT_DEPTH = 64
+
+
+def encode_path_segment(pk: int) -> str:
+    digits = []
+    while pk:
+        pk, remainder = divmod(pk, len(PATH_ALPHABET))
+        digits.append(PATH_ALPHABET[remainder])
+    return "".join(reversed(digits)).rjust(PATH_SEGMENT_WIDTH, "0")
+
+
+def subtree_range(path: str) -> dict:
+    """Lookups selecting ``path`` and all of its descendants with an index range scan."""
+    # "~" sorts after every character of PATH_ALPHABET
+    return {"path__gte": path, "path__lt": path + "~"}
+
 
 class Comment(BaseModel):
     """Nested comments system"""
@@ -19,6 +39,8 @@ class Comment(BaseModel):
     # Engagement
     upvotes = models.PositiveIntegerField(default=0)
     downvotes = models.PositiveIntegerField(default=0)
+    # Last vote counter change; see Post.counters_changed_at
+    counters_changed_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     # Status
     is_deleted = models.BooleanField(default=False)
@@ -26,7 +48,7 @@ class Comment(BaseModel):
 
     # Hierarchy
     level = models.PositiveIntegerField(default=0)  # For nested depth
-    path = models.CharField(max_length=500, blank=True)  # Materialized path
+    path = models.CharField(max_length=PATH_SEGMENT_WIDTH * MAX_COMMENT_DEPTH, blank=True)  # Materialized path
 
     class Meta:
         db_table = "comments"
@@ -37,20 +59,31 @@ class Comment(BaseModel):
             models.Index(fields=["path"]),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored soft-delete state so signals can detect transitions
+        instance._loaded_is_deleted = instance.__dict__.get("is_deleted")
+        return instance
+
     def save(self, *args, **kwargs):
-        if self.parent:
-            self.level = self.parent.level + 1
-            # Limit path length to prevent database field overflow
-            new_path = f"{self.parent.path}/{self.parent.id}"
-            if len(new_path) > 500:  # Max length of path field
-                # Truncate path if it gets too long
-                self.path = new_path[-500:]
-            else:
-                self.path = new_path
+        # Replies beyond the maximum depth continue the deepest allowed branch
+        while self.parent and self.parent.level >= MAX_COMMENT_DEPTH - 1:
+            self.parent = self.parent.parent
+        self.level = self.parent.level + 1 if self.parent else 0
+        if self.pk is None:
+            # The path ends with our own id, which only exists after the insert
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                self.path = self.build_path()
+                Comment.objects.filter(pk=self.pk).update(path=self.path)
         else:
-            self.level = 0
-            self.path = ""
-        super().save(*args, **kwargs)
+            self.path = self.build_path()
+            super().save(*args, **kwargs)
+
+    def build_path(self) -> str:
+        prefix = self.parent.path if self.parent else ""
+        return prefix + encode_path_segment(self.pk)
 
     @property
     def score(self):
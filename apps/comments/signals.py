@@ -0,0 +1,34 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.posts.ranking import refresh_hot_scores
+
+
+def _adjust_comment_count(post_id, delta: int) -> None:
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F("comment_count") + delta)
+    refresh_hot_scores([post_id])
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance: Comment, created, **kwargs):
+    """Keep Post.comment_count equal to the number of non-deleted comments"""
+    was_deleted = getattr(instance, "_loaded_is_deleted", None)
+    if created:
+        if not instance.is_deleted:
+            _adjust_comment_count(instance.post_id, 1)
+    elif was_deleted is not None and was_deleted != instance.is_deleted:
+        _adjust_comment_count(instance.post_id, -1 if instance.is_deleted else 1)
+    # The instance may be saved again, e.g. soft-deleted right after it was created
+    instance._loaded_is_deleted = instance.is_deleted
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance: Comment, **kwargs):
+    if not instance.is_deleted:
+        _adjust_comment_count(instance.post_id, -1)
@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.comments.models import PATH_SEGMENT_WIDTH, Comment, encode_path_segment, subtree_range
+from apps.comments.tree import load_comment_tree
+from apps.posts.models import Post
+from apps.threads.models import Thread
+
+
+class CommentCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="commenter", password="pass")
+        org = Organization.objects.create(name="Drama Club", description="Plays", org_type="club")
+        thread = Thread.objects.create(title="Rehearsals", organization=org, created_by=cls.user)
+        cls.post = Post.objects.create(
+            title="Casting", content="Body", thread=thread, author=cls.user, visibility="public"
+        )
+
+    def _count(self):
+        self.post.refresh_from_db()
+        return self.post.comment_count
+
+    def test_create_soft_delete_and_delete_keep_count(self):
+        parent = Comment.objects.create(post=self.post, author=self.user, content="First")
+        Comment.objects.create(post=self.post, author=self.user, content="Reply", parent=parent)
+        self.assertEqual(self._count(), 2)
+
+        comment = Comment.objects.get(pk=parent.pk)
+        comment.is_deleted = True
+        comment.save()
+        self.assertEqual(self._count(), 1)
+        comment.is_deleted = False
+        comment.save()
+        self.assertEqual(self._count(), 2)
+
+        # Deleting the parent cascades to its reply
+        comment.delete()
+        self.assertEqual(self._count(), 0)
+
+    def test_soft_delete_right_after_create(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content="Oops")
+        self.assertEqual(self._count(), 1)
+        comment.is_deleted = True
+        comment.save()
+        self.assertEqual(self._count(), 0)
+
+    def test_backfill_repairs_drift(self):
+        Comment.objects.create(post=self.post, author=self.user, content="First")
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        call_command("backfill_comment_counts", stdout=StringIO())
+        self.assertEqual(self._count(), 1)
+
+
+class CommentTreeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader")
+        org = Organization.objects.create(name="Film Club", description="Films", org_type="club")
+        thread = Thread.objects.create(title="Screenings", organization=org, created_by=cls.user)
+        cls.post = Post.objects.create(
+            title="Tonight", content="Body", thread=thread, author=cls.user, visibility="public"
+        )
+
+    def _add_branch(self, depth):
+        parent = None
+        for level in range(depth):
+            parent = Comment.objects.create(post=self.post, author=self.user, content=f"L{level}", parent=parent)
+
+    def _render_queries(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("post-detail", kwargs={"slug": self.post.slug}))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_tree_is_linked_in_order(self):
+        self._add_branch(3)
+        first, second = (
+            Comment.objects.create(post=self.post, author=self.user, content=text) for text in ("A", "B")
+        )
+        tree = load_comment_tree(self.post)
+        self.assertEqual(len(tree.comments), 5)
+        self.assertEqual([c.content for c in tree.roots], ["B", "A", "L0"])
+        self.assertEqual([c.content for c in tree.roots[2].children[0].children], ["L2"])
+
+    def test_paths_are_fixed_width_and_sort_depth_first(self):
+        self._add_branch(3)
+        root, child, grandchild = Comment.objects.order_by("pk")
+        sibling = Comment.objects.create(post=self.post, author=self.user, content="S", parent=root)
+        self.assertEqual(root.path, encode_path_segment(root.pk))
+        self.assertEqual(len(grandchild.path), 3 * PATH_SEGMENT_WIDTH)
+        self.assertTrue(grandchild.path.startswith(child.path))
+        ordered = list(Comment.objects.order_by("path"))
+        self.assertEqual(ordered, [root, child, grandchild, sibling])
+        subtree = Comment.objects.filter(**subtree_range(child.path)).order_by("path")
+        self.assertEqual(list(subtree), [child, grandchild])
+
+    def test_deep_branches_and_old_roots_load_lazily(self):
+        self._add_branch(4)
+        for text in ("A", "B"):
+            Comment.objects.create(post=self.post, author=self.user, content=text)
+        tree = load_comment_tree(self.post, roots=2, depth=2)
+        self.assertEqual([c.content for c in tree.roots], ["B", "A"])
+        older = load_comment_tree(self.post, before=tree.next_before, roots=2, depth=2)
+        (branch,) = older.roots
+        self.assertEqual(branch.children[0].hidden_replies, 1)
+        self.assertIsNone(older.next_before)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("comment-replies", kwargs={"pk": branch.children[0].pk}))
+        self.assertContains(response, "L2")
+        self.assertContains(response, "L3")
+        response = self.client.get(
+            reverse("comment-page", kwargs={"slug": self.post.slug}), {"before": tree.next_before}
+        )
+        self.assertContains(response, "L0")
+        self.assertNotContains(response, ">B<")
+
+    def test_render_cost_does_not_grow_with_comments(self):
+        self._add_branch(2)
+        self._render_queries()  # warm the content type cache
+        baseline = self._render_queries()
+        for _ in range(5):
+            self._add_branch(4)
+        self.assertEqual(self._render_queries(), baseline)
@@ -0,0 +1,144 @@
+"""Load comment trees with path range queries and link them in memory.
+
+A post page renders the newest ``COMMENT_ROOTS_PER_PAGE`` top-level comments with
+their replies down to ``COMMENT_RENDER_DEPTH`` levels. Deeper branches and older
+top-level comments are fetched on demand, each with a single range scan over
+``Comment.path``.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+
+from django.db.models import Count
+from django.urls import reverse
+
+from apps.comments.models import Comment, encode_path_segment, subtree_range
+from apps.votes.buffer import apply_pending_counts
+from apps.votes.loaders import attach_viewer_state
+from shared.fragments import register_fragment_objects
+
+COMMENT_ROOTS_PER_PAGE = 20
+COMMENT_RENDER_DEPTH = 6
+
+
+@dataclass
+class CommentTree:
+    roots: list[Comment]
+    comments: list[Comment] = field(default_factory=list)
+    # Oldest loaded top-level comment id when older ones remain ("load more comments")
+    next_before: int | None = None
+
+
+def build_comment_tree(comments) -> list[Comment]:
+    """Link ``comments`` into a tree in one pass and return the top-level ones.
+
+    Every comment gets a ``children`` list, kept in the order of ``comments``.
+    Comments whose parent is not in ``comments`` are returned as top-level.
+    """
+    by_id = {}
+    for comment in comments:
+        comment.children = []
+        by_id[comment.pk] = comment
+    roots = []
+    for comment in by_id.values():
+        parent = by_id.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            # Reuse the loaded parent so templates never fetch it again
+            comment.parent = parent
+            parent.children.append(comment)
+    return roots
+
+
+def _fetch(post, max_level: int, **lookups) -> list[Comment]:
+    comments = list(
+        Comment.objects.filter(post=post, level__lt=max_level, **lookups)
+        .select_related("author", "author__profile")
+        # Reverse depth-first order lists siblings newest first
+        .order_by("-path")
+    )
+    for comment in comments:
+        comment.post = post
+    return comments
+
+
+def _count_hidden_replies(comments, max_level: int) -> None:
+    """Set ``hidden_replies`` on comments whose replies were cut off at ``max_level``."""
+    frontier = [comment.pk for comment in comments if comment.level == max_level - 1]
+    hidden = {}
+    if frontier:
+        hidden = dict(
+            Comment.objects.filter(parent_id__in=frontier)
+            .values("parent_id")
+            .order_by()
+            .annotate(total=Count("pk"))
+            .values_list("parent_id", "total")
+        )
+    for comment in comments:
+        comment.hidden_replies = hidden.get(comment.pk, 0)
+
+
+def load_comment_tree(
+    post, before: int | None = None, roots: int = COMMENT_ROOTS_PER_PAGE, depth: int = COMMENT_RENDER_DEPTH
+) -> CommentTree:
+    """Load one page of ``post``'s top-level comments with their replies.
+
+    Top-level paths are their own encoded id, so the subtrees of the ``roots``
+    newest top-level comments older than ``before`` form one contiguous path range.
+    """
+    newest = Comment.objects.filter(post=post, parent__isnull=True)
+    if before is not None:
+        newest = newest.filter(pk__lt=before)
+    root_ids = list(newest.order_by("-pk").values_list("pk", flat=True)[: roots + 1])
+    if not root_ids:
+        return CommentTree(roots=[])
+
+    next_before = root_ids[roots - 1] if len(root_ids) > roots else None
+    lookups = {"path__gte": encode_path_segment(root_ids[:roots][-1])}
+    if before is not None:
+        lookups["path__lt"] = encode_path_segment(before)
+    comments = _fetch(post, depth, **lookups)
+    _count_hidden_replies(comments, depth)
+    return CommentTree(build_comment_tree(comments), comments, next_before)
+
+
+def load_replies(comment, depth: int = COMMENT_RENDER_DEPTH) -> CommentTree:
+    """Load the replies below ``comment``, ``depth`` levels deep, in one range query."""
+    max_level = comment.level + 1 + depth
+    subtree = _fetch(comment.post, max_level, **subtree_range(comment.path))
+    _count_hidden_replies(subtree, max_level)
+    build_comment_tree(subtree)
+    root = next(c for c in subtree if c.pk == comment.pk)
+    return CommentTree(root.children, [c for c in subtree if c.pk != comment.pk])
+
+
+def comment_tree_version(post, tree: CommentTree) -> str:
+    """Version of a rendered page of comments, derived from the loaded rows.
+
+    Covers everything the cached HTML shows outside its slots: each comment's
+    edits (``updated_at``), its hidden reply count, its author's name and avatar
+    (the profile is saved whenever the user is) and the "load more" link. Every
+    worker computes the same version from the same data, so nothing has to be
+    invalidated.
+    """
+    state = [post.slug, tree.next_before]
+    for comment in tree.comments:
+        profile = getattr(comment.author, "profile", None)
+        state.append((comment.pk, comment.updated_at, comment.hidden_replies, profile and profile.updated_at))
+    return hashlib.md5(repr(state).encode(), usedforsecurity=False).hexdigest()
+
+
+def comment_tree_context(request, post, tree: CommentTree) -> dict:
+    """Template context for a page of comments, with the viewer's votes attached."""
+    apply_pending_counts(tree.comments)
+    attach_viewer_state(request, comments=tree.comments)
+    next_comments_url = None
+    if tree.next_before is not None:
+        next_comments_url = f"{reverse('comment-page', kwargs={'slug': post.slug})}?before={tree.next_before}"
+    register_fragment_objects(request, tree.comments)
+    return {
+        "comments": tree.roots,
+        "next_comments_url": next_comments_url,
+        "comment_tree_version": comment_tree_version(post, tree),
+    }
@@ -6,4 +6,6 @@ urlpatterns = [
     path(
         "create/<slug:slug>/", views.CommentCreateView.as_view(), name="comment-create"
     ),
+    path("post/<slug:slug>/", views.comment_page, name="comment-page"),
+    path("<int:pk>/replies/", views.comment_replies, name="comment-replies"),
 ]
@@ -1,11 +1,13 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404
 from django.urls import reverse
 from django.views.generic import CreateView
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, render
 
 from apps.posts.models import Post
 
 from .models import Comment
+from .tree import comment_tree_context, load_comment_tree, load_replies
 
 # Create your views here.
 
@@ -39,3 +41,30 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
 
     def get_success_url(self):
         return reverse("post-detail", kwargs={"slug": self.object.post.slug})
+
+
+def _visible_post_or_404(request, **lookup):
+    post = get_object_or_404(Post, **lookup)
+    if not post.can_user_view(request.user):
+        raise Http404("Post not found or you don't have permission to view it.")
+    return post
+
+
+def comment_page(request, slug):
+    """Older top-level comments of a post with their replies (HTMX "load more")."""
+    post = _visible_post_or_404(request, slug=slug)
+    try:
+        before = int(request.GET["before"])
+    except (KeyError, ValueError):
+        before = None
+    context = comment_tree_context(request, post, load_comment_tree(post, before=before))
+    return render(request, "comments/_comment_page.html", context)
+
+
+def comment_replies(request, pk):
+    """Replies below a comment whose branch was cut off ("continue this thread")."""
+    comment = get_object_or_404(Comment, pk=pk)
+    comment.post = _visible_post_or_404(request, pk=comment.post_id)
+    context = comment_tree_context(request, comment.post, load_replies(comment))
+    context["parent"] = comment
+    return render(request, "comments/_comment_replies.html", context)
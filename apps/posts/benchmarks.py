@@ -0,0 +1,85 @@
+from apps.accounts.models import User
+from apps.campus.models import Organization, OrganizationMembership
+from apps.posts.models import Post
+from apps.posts.visibility import _REQUEST_ATTR
+from apps.threads.models import Thread, ThreadMembership
+from shared.benchmarks import benchmark
+
+COLLIDING_SLUGS = 50
+FEED_POSTS = 200
+
+
+def _thread(name="Benchmark Club"):
+    author = User.objects.create_user(username=f"{name.lower().replace(' ', '-')}-author")
+    org = Organization.objects.create(name=name, description="Benchmarks", org_type="club")
+    return Thread.objects.create(title="General", organization=org, created_by=author), author
+
+
+def _member_of(count: int):
+    """A user with active memberships in ``count`` organizations and one thread of each, with posts."""
+    user = User.objects.create_user(username=f"member-of-{count}")
+    author = User.objects.create_user(username=f"author-{count}")
+    orgs = Organization.objects.bulk_create(
+        Organization(name=f"Org {count}-{i}", slug=f"org-{count}-{i}", org_type="club") for i in range(count)
+    )
+    threads = Thread.objects.bulk_create(
+        Thread(title="General", slug=f"general-{count}-{i}", organization=org, created_by=author)
+        for i, org in enumerate(orgs)
+    )
+    OrganizationMembership.objects.bulk_create(
+        OrganizationMembership(user=user, organization=org, status="active") for org in orgs
+    )
+    ThreadMembership.objects.bulk_create(
+        ThreadMembership(user=user, thread=thread, status="active") for thread in threads
+    )
+    visibilities = ("public", "organization", "thread")
+    Post.objects.bulk_create(
+        Post(
+            title=f"Post {i}",
+            slug=f"post-{count}-{i}",
+            content="Body",
+            thread=threads[i % count],
+            author=author,
+            visibility=visibilities[i % 3],
+        )
+        for i in range(FEED_POSTS)
+    )
+    return user
+
+
+@benchmark("posts.Post.save (colliding slug)", number=20)
+def post_save_colliding_slug():
+    thread, author = _thread()
+    Post.objects.bulk_create(
+        Post(title="Weekly update", slug="weekly-update" + (f"-{i}" if i else ""), thread=thread, author=author)
+        for i in range(COLLIDING_SLUGS)
+    )
+    return lambda: Post.objects.create(title="Weekly update", content="Body", thread=thread, author=author)
+
+
+def _visible_to_user(count: int):
+    user = _member_of(count)
+
+    def run():
+        # A new request: the memoized context is gone, the cached one is still there
+        user.__dict__.pop(_REQUEST_ATTR, None)
+        return list(Post.objects.visible_to_user(user)[:20])
+
+    return run
+
+
+@benchmark("posts.PostManager.visible_to_user (1 membership)", number=50)
+def visible_to_user_one_membership():
+    return _visible_to_user(1)
+
+
+@benchmark("posts.PostManager.visible_to_user (200 memberships)", number=50)
+def visible_to_user_many_memberships():
+    return _visible_to_user(200)
+
+
+@benchmark("posts.Post.can_user_view", number=2000)
+def can_user_view():
+    user = _member_of(200)
+    post = Post.objects.select_related("thread__organization").filter(visibility="thread").last()
+    return lambda: post.can_user_view(user)
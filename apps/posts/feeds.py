@@ -0,0 +1,45 @@
+from apps.votes.buffer import apply_pending_counts
+from apps.votes.loaders import attach_viewer_state
+from shared.fragments import register_fragment_objects
+from shared.pagination import KeysetPaginator
+
+FEED_PAGE_SIZE = 20
+
+# Keyset orderings for post listings. Each one ends with ``-id`` so that the
+# cursor identifies a unique position even when the other columns tie.
+LATEST_ORDERING = ("-is_pinned", "-created_at", "-id")
+# Popular feeds walk the (visibility|thread, -hot_score, -id) indexes
+POPULAR_ORDERING = ("-hot_score", "-id")
+RECENT_ORDERING = ("-created_at", "-id")
+
+FEED_PAGE_TEMPLATE = "posts/_post_feed_page.html"
+
+
+def is_feed_page_request(request) -> bool:
+    """True when HTMX asks for the next page of a feed rather than the full view."""
+    return bool(getattr(request, "htmx", False)) and "cursor" in request.GET
+
+
+def paginate_feed(request, queryset, ordering, per_page: int = FEED_PAGE_SIZE) -> dict:
+    """Return template context for one keyset page of ``queryset``.
+
+    The context holds ``posts`` (the rows of the page) and ``next_page_url``, the
+    URL of the following page with every other query parameter preserved.
+    """
+    page = KeysetPaginator(queryset, ordering, per_page=per_page).get_page(
+        request.GET.get("cursor")
+    )
+    return feed_context(request, page)
+
+
+def feed_context(request, page) -> dict:
+    """Template context for an already fetched ``KeysetPage`` of posts."""
+    apply_pending_counts(page.object_list)
+    attach_viewer_state(request, posts=page.object_list)
+    next_page_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params["cursor"] = page.next_cursor
+        next_page_url = f"{request.path}?{params.urlencode()}"
+    register_fragment_objects(request, page.object_list)
+    return {"posts": page.object_list, "next_page_url": next_page_url}
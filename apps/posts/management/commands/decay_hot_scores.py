@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.posts.models import Post
+from apps.posts.ranking import HOT_FIELDS, HOT_WINDOW_DAYS
+
+
+class Command(BaseCommand):
+    help = "Re-decay the stored hot score of recent posts. Run periodically (e.g. every 10 minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=HOT_WINDOW_DAYS,
+            help="Only posts newer than this are re-scored; older posts are zeroed.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+
+        updated = 0
+        batch = []
+        recent = Post.objects.filter(created_at__gte=cutoff).only("pk", *HOT_FIELDS)
+        for post in recent.iterator(chunk_size=batch_size):
+            post.hot_score = post.compute_hot_score(now=now)
+            batch.append(post)
+            if len(batch) >= batch_size:
+                updated += Post.objects.bulk_update(batch, ["hot_score"])
+                batch = []
+        if batch:
+            updated += Post.objects.bulk_update(batch, ["hot_score"])
+
+        # Scores outside the window are negligible; flatten them so they sort below fresh posts
+        expired = Post.objects.filter(created_at__lt=cutoff).exclude(hot_score=0).update(hot_score=0)
+
+        self.stdout.write(self.style.SUCCESS(f"Re-scored {updated} posts, expired {expired}."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.timeline import backfill_timeline
+from apps.threads.models import ThreadMembership
+
+
+class Command(BaseCommand):
+    help = "Seed home timelines from the latest posts of every active thread membership."
+
+    def handle(self, *args, **options):
+        memberships = (
+            ThreadMembership.objects.filter(status="active")
+            .order_by("pk")
+            .values_list("user_id", "thread_id")
+        )
+        count = 0
+        for user_id, thread_id in memberships.iterator(chunk_size=1000):
+            backfill_timeline(user_id, thread_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Backfilled timelines for {count} memberships."))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 08:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+from apps.posts.ranking import hot_score
+
+
+def backfill_hot_score(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    now = timezone.now()
+    posts = list(Post.objects.only("upvotes", "downvotes", "comment_count", "view_count", "created_at"))
+    for post in posts:
+        post.hot_score = hot_score(
+            post.upvotes, post.downvotes, post.comment_count, post.view_count, post.created_at, now=now
+        )
+    Post.objects.bulk_update(posts, ["hot_score"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_visibility_post_posts_visibil_081a5d_idx'),
+        ('threads', '0003_alter_threadmembership_role'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, help_text='Time-decayed popularity, see apps.posts.ranking'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['visibility', '-hot_score', '-id'], name='posts_visibil_be85ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['thread', '-hot_score', '-id'], name='posts_thread__6a39c4_idx'),
+        ),
+        migrations.RunPython(backfill_hot_score, migrations.RunPython.noop),
+    ]
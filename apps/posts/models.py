@@ -1,7 +1,8 @@
 from django.db import models
 from django.urls import reverse
-from django.utils.text import slugify
+from apps.posts.ranking import hot_score
 from shared.models import BaseModel
+from shared.slugs import UniqueSlugMixin
 
 
 class PostManager(models.Manager):
@@ -12,29 +13,20 @@ class PostManager(models.Manager):
         Return posts that are visible to the given user
         """
         if user.is_authenticated:
-            # Get user's organization memberships
-            from apps.campus.models import OrganizationMembership
+            # Active organization and thread memberships, cached per user
+            from apps.posts.visibility import get_visibility_context
 
-            user_orgs = OrganizationMembership.objects.filter(
-                user=user, status="active"
-            ).values_list("organization_id", flat=True)
-
-            # Get user's thread memberships
-            from apps.threads.models import ThreadMembership
-
-            user_threads = ThreadMembership.objects.filter(
-                user=user, status="active"
-            ).values_list("thread_id", flat=True)
+            visibility = get_visibility_context(user)
 
             # Filter out deleted posts and ensure thread/organization relationships exist
             return self.filter(
                 models.Q(visibility="public")
                 | models.Q(
                     visibility="organization",
-                    thread__organization_id__in=user_orgs,
+                    thread__organization_id__in=sorted(visibility.org_ids),
                     thread__organization__isnull=False,
                 )
-                | models.Q(visibility="thread", thread_id__in=user_threads)
+                | models.Q(visibility="thread", thread_id__in=sorted(visibility.thread_ids))
             ).exclude(is_deleted=True)
         else:
             # Anonymous users can only see public posts
@@ -61,7 +53,7 @@ class PostManager(models.Manager):
         )
 
 
-class Post(BaseModel):
+class Post(UniqueSlugMixin, BaseModel):
     """Forum posts"""
 
     POST_TYPES = [
@@ -81,6 +73,8 @@ class Post(BaseModel):
 
     title = models.CharField(max_length=300)
     slug = models.SlugField(max_length=350, unique=True, blank=True)
+    slug_fallback = "post"
+    slug_max_length = 240
     content = models.TextField()
     post_type = models.CharField(max_length=10, choices=POST_TYPES, default="text")
     visibility = models.CharField(
@@ -101,6 +95,11 @@ class Post(BaseModel):
     downvotes = models.PositiveIntegerField(default=0)
     comment_count = models.PositiveIntegerField(default=0)
     view_count = models.PositiveIntegerField(default=0)
+    hot_score = models.FloatField(
+        default=0, help_text="Time-decayed popularity, see apps.posts.ranking"
+    )
+    # Last vote counter change; updated_at is left alone so votes do not reorder feeds
+    counters_changed_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     # Status fields
     is_pinned = models.BooleanField(default=False)
@@ -120,61 +119,37 @@ class Post(BaseModel):
             models.Index(fields=["-is_pinned", "-updated_at"]),
             models.Index(fields=["post_type"]),
             models.Index(fields=["visibility"]),
+            models.Index(fields=["visibility", "-hot_score", "-id"]),
+            models.Index(fields=["thread", "-hot_score", "-id"]),
         ]
 
-    def save(self, *args, **kwargs):
-        base_slug = slugify(self.title) if not self.slug else self.slug
-        if not base_slug:
-            base_slug = "post"
-        base_slug = base_slug[:240]
-
-        if not self.slug:
-            slug_candidate = base_slug
-        else:
-            slug_candidate = self.slug
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember where the post was visible so signals can tell who stops seeing it
+        instance._loaded_scope = (instance.__dict__.get("visibility"), instance.__dict__.get("thread_id"))
+        return instance
 
+    def save(self, *args, **kwargs):
         if self._state.adding:
-            counter = 1
-            max_attempts = 100
-            while (
-                Post.objects.filter(slug=slug_candidate).exists()
-                and counter <= max_attempts
-            ):
-                slug_candidate = f"{base_slug}-{counter}"
-                counter += 1
-            if counter > max_attempts:
-                # Fallback to UUID if we hit the limit
-                import uuid
-
-                slug_candidate = f"{base_slug}-{uuid.uuid4().hex[:8]}"
-            self.slug = slug_candidate
-        else:
-            # Ensure slug remains unique on updates
-            if Post.objects.exclude(pk=self.pk).filter(slug=slug_candidate).exists():
-                counter = 1
-                slug_candidate = base_slug
-                max_attempts = 100
-                while (
-                    Post.objects.exclude(pk=self.pk)
-                    .filter(slug=slug_candidate)
-                    .exists()
-                    and counter <= max_attempts
-                ):
-                    slug_candidate = f"{base_slug}-{counter}"
-                    counter += 1
-                if counter > max_attempts:
-                    # Fallback to UUID if we hit the limit
-                    import uuid
-
-                    slug_candidate = f"{base_slug}-{uuid.uuid4().hex[:8]}"
-                self.slug = slug_candidate
-
+            self.hot_score = self.compute_hot_score()
         super().save(*args, **kwargs)
 
     @property
     def score(self):
         return self.upvotes - self.downvotes
 
+    def compute_hot_score(self, now=None):
+        """Hot score for the post's current counters (does not save it)"""
+        return hot_score(
+            self.upvotes,
+            self.downvotes,
+            self.comment_count,
+            self.view_count,
+            self.created_at,
+            now=now,
+        )
+
     def can_user_view(self, user):
         """
         Check if a user can view this post based on visibility settings
@@ -198,21 +173,17 @@ class Post(BaseModel):
         if self.visibility == "organization" and not self.thread.organization:
             return False
 
+        from apps.posts.visibility import get_visibility_context
+
+        visibility = get_visibility_context(user)
+
         # Organization visibility - user must be active member of the organization
         if self.visibility == "organization":
-            from apps.campus.models import OrganizationMembership
-
-            return OrganizationMembership.objects.filter(
-                organization=self.thread.organization, user=user, status="active"
-            ).exists()
+            return self.thread.organization_id in visibility.org_ids
 
         # Thread visibility - user must be active member of the thread
         if self.visibility == "thread":
-            from apps.threads.models import ThreadMembership
-
-            return ThreadMembership.objects.filter(
-                thread=self.thread, user=user, status="active"
-            ).exists()
+            return self.thread_id in visibility.thread_ids
 
         return False
 
@@ -223,6 +194,24 @@ class Post(BaseModel):
         return self.title
 
 
+class TimelineEntry(models.Model):
+    """Materialized home timeline row: a post pushed to one thread member"""
+
+    user = models.ForeignKey(
+        "accounts.User", on_delete=models.CASCADE, related_name="+"
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    # Copy of post.created_at so the timeline is read from this table alone
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "post_timelines"
+        unique_together = ["user", "post"]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"]),
+        ]
+
+
 class PostMedia(BaseModel):
     """Media attachments for posts"""
 
@@ -0,0 +1,47 @@
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.utils import timezone
+
+# Hot score = engagement points / (age in hours + 2) ** GRAVITY
+# Points never stop mattering, but age keeps old posts from holding the top forever.
+GRAVITY = 1.5
+COMMENT_WEIGHT = 0.5
+VIEW_WEIGHT = 0.01
+
+# Beyond this age a post's score is negligible and the decay job stops touching it
+HOT_WINDOW_DAYS = 30
+
+HOT_FIELDS = ("upvotes", "downvotes", "comment_count", "view_count", "created_at")
+
+
+def hot_score(upvotes, downvotes, comment_count, view_count, created_at, now=None) -> float:
+    """Return the decayed ranking score used by the popular feeds."""
+    now = now or timezone.now()
+    created_at = created_at or now
+    points = 1 + upvotes - downvotes + COMMENT_WEIGHT * comment_count + VIEW_WEIGHT * view_count
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    return points / (age_hours + 2) ** GRAVITY
+
+
+def hot_score_expression(created_at, now=None, **counters):
+    """``hot_score`` as an SQL expression over the counter columns of one post.
+
+    ``counters`` replaces some columns with other expressions (e.g. the counter
+    plus a delta), so the score can be written in the same UPDATE as the new
+    counters. The age comes from ``created_at`` and is a constant.
+    """
+    now = now or timezone.now()
+    column = {field: counters.get(field, F(field)) for field in HOT_FIELDS if field != "created_at"}
+    points = Value(1.0) + column["upvotes"] - column["downvotes"]
+    points += Value(COMMENT_WEIGHT) * column["comment_count"] + Value(VIEW_WEIGHT) * column["view_count"]
+    age_hours = max((now - (created_at or now)).total_seconds(), 0) / 3600
+    return ExpressionWrapper(points / Value((age_hours + 2) ** GRAVITY), output_field=FloatField())
+
+
+def refresh_hot_scores(post_ids, now=None) -> None:
+    """Recompute the stored hot score of the given posts from their counters."""
+    from apps.posts.models import Post
+
+    posts = list(Post.objects.filter(pk__in=list(post_ids)).only("pk", *HOT_FIELDS))
+    for post in posts:
+        post.hot_score = post.compute_hot_score(now=now)
+    Post.objects.bulk_update(posts, ["hot_score"])
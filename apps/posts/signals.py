@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.posts.models import Post
+from apps.posts.timeline import schedule_fan_out
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance: Post, created, **kwargs):
+    """Push newly created posts onto thread members' home timelines"""
+    if created:
+        schedule_fan_out(instance)
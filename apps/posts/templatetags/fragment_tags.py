@@ -0,0 +1,120 @@
+import uuid
+
+from django import template
+
+from shared.fragments import (
+    fill_slots,
+    fragment_cache,
+    fragment_key,
+    fragments_enabled,
+    record,
+    resolve_ref,
+    slot_marker,
+    to_ref,
+)
+
+register = template.Library()
+
+# Context variable holding the slots of the fragment being rendered for the cache
+CAPTURE = "_fragment_capture"
+
+
+def _render_slot(context, template_name: str, values: dict) -> str:
+    slot_template = context.template.engine.get_template(template_name)
+    with context.push(**values):
+        return slot_template.render(context)
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, parts):
+        self.nodelist = nodelist
+        self.name = name
+        self.parts = parts
+
+    def render(self, context):
+        request = context.get("request")
+        # Nested fragments render inline; their slots belong to the outer fragment
+        if request is None or CAPTURE in context or not fragments_enabled():
+            return self.nodelist.render(context)
+
+        cache = fragment_cache()
+        key = fragment_key(self.name.resolve(context), [part.resolve(context) for part in self.parts])
+        cached = cache.get(key)
+        if cached is not None:
+            html, token, slots = cached
+            try:
+                values = [
+                    {name: resolve_ref(request, ref) for name, ref in refs.items()} for _, refs in slots
+                ]
+            except LookupError:
+                # A slot object was not registered by the view; render afresh
+                pass
+            else:
+                record("hit")
+                return fill_slots(
+                    html, token, lambda i: _render_slot(context, slots[i][0], values[i])
+                )
+
+        record("miss")
+        token = uuid.uuid4().hex
+        slots, values = [], []
+        with context.push({CAPTURE: (token, slots, values)}):
+            html = self.nodelist.render(context)
+        # Expiry and eviction follow the TIMEOUT/MAX_ENTRIES of the fragments cache
+        cache.set(key, (html, token, slots))
+        return fill_slots(html, token, lambda i: _render_slot(context, slots[i][0], values[i]))
+
+
+class FragmentSlotNode(template.Node):
+    def __init__(self, template_name, extra_context):
+        self.template_name = template_name
+        self.extra_context = extra_context
+
+    def render(self, context):
+        template_name = self.template_name.resolve(context)
+        values = {name: var.resolve(context) for name, var in self.extra_context.items()}
+        capture = context.get(CAPTURE)
+        if capture is None:
+            return _render_slot(context, template_name, values)
+        token, slots, live_values = capture
+        slots.append((template_name, {name: to_ref(value) for name, value in values.items()}))
+        live_values.append(values)
+        return slot_marker(token, len(slots) - 1)
+
+
+@register.tag
+def cachedfragment(parser, token):
+    """Cache the enclosed HTML under a name and version parts.
+
+    Usage::
+
+        {% cachedfragment "post-card" post.uuid post.updated_at %} ... {% endcachedfragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(("endcachedfragment",))
+    parser.delete_first_token()
+    return CachedFragmentNode(
+        nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]]
+    )
+
+
+@register.tag
+def fragment_slot(parser, token):
+    """Render a template for every request, even inside a cached fragment.
+
+    Usage::
+
+        {% fragment_slot "campus/vote.html" post=post %}
+
+    Model instances are looked up by primary key in the objects the view
+    registered, other values are cached as they are.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a template name.")
+    extra_context = template.base.token_kwargs(bits[2:], parser)
+    if len(extra_context) != len(bits) - 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' only accepts name=value arguments.")
+    return FragmentSlotNode(parser.compile_filter(bits[1]), extra_context)
@@ -0,0 +1,312 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.comments.models import Comment
+from apps.posts.feeds import LATEST_ORDERING, POPULAR_ORDERING
+from apps.posts.models import Post, TimelineEntry
+from apps.posts.ranking import hot_score
+from apps.posts.timeline import home_timeline_page, trim_timelines
+from apps.threads.models import Thread, ThreadMembership
+from apps.votes.models import Vote
+from shared.fragments import (
+    forget_local_versions,
+    fragment_stats,
+    get_version,
+    reset_fragment_stats,
+    version_cache,
+)
+from shared.pagination import KeysetPaginator
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author", password="pass")
+        org = Organization.objects.create(name="Robotics Club", description="Robots", org_type="club")
+        cls.thread = Thread.objects.create(title="General", organization=org, created_by=cls.user)
+        for i in range(25):
+            Post.objects.create(
+                title=f"Post {i}",
+                content="Body",
+                thread=cls.thread,
+                author=cls.user,
+                visibility="public",
+                upvotes=i % 4,
+                is_pinned=i == 7,
+            )
+
+    def _walk(self, ordering, per_page=7):
+        paginator = KeysetPaginator(Post.objects.all(), ordering, per_page=per_page)
+        seen, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            seen.extend(post.pk for post in page)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_pages_cover_latest_ordering_without_gaps(self):
+        expected = list(Post.objects.order_by(*LATEST_ORDERING).values_list("pk", flat=True))
+        self.assertEqual(self._walk(LATEST_ORDERING), expected)
+
+    def test_pages_cover_popular_ordering_without_gaps(self):
+        expected = list(Post.objects.order_by(*POPULAR_ORDERING).values_list("pk", flat=True))
+        self.assertEqual(self._walk(POPULAR_ORDERING), expected)
+
+    def test_invalid_cursor_restarts_from_first_page(self):
+        paginator = KeysetPaginator(Post.objects.all(), LATEST_ORDERING, per_page=5)
+        self.assertEqual(
+            [p.pk for p in paginator.get_page("not-a-cursor")],
+            [p.pk for p in paginator.get_page()],
+        )
+
+    def test_home_htmx_request_returns_next_page_partial(self):
+        response = self.client.get("/")
+        next_url = response.context["next_page_url"]
+        self.assertIsNotNone(next_url)
+        response = self.client.get(next_url, HTTP_HX_REQUEST="true")
+        self.assertTemplateUsed(response, "posts/_post_feed_page.html")
+        self.assertTemplateNotUsed(response, "campus/home.html")
+        self.assertEqual(len(response.context["posts"]), 5)
+
+
+class VisibilityContextTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="pass")
+        cls.org = Organization.objects.create(name="Debate Society", description="Debates", org_type="society")
+        cls.thread = Thread.objects.create(title="Motions", organization=cls.org, created_by=cls.author)
+        cls.post = Post.objects.create(
+            title="Members only", content="Body", thread=cls.thread, author=cls.author, visibility="thread"
+        )
+
+    def setUp(self):
+        cache.clear()
+        forget_local_versions()
+        self.reader = User.objects.create_user(username="reader", password="pass")
+
+    def _visible_ids(self):
+        # A fresh instance stands in for a new request
+        user = User.objects.get(pk=self.reader.pk)
+        return list(Post.objects.visible_to_user(user).values_list("pk", flat=True))
+
+    def test_context_is_reused_across_requests(self):
+        self._visible_ids()
+        user = User.objects.get(pk=self.reader.pk)
+        # Only the two feed queries run; no membership lookups
+        with self.assertNumQueries(2):
+            list(Post.objects.visible_to_user(user))
+            list(Post.objects.visible_to_user(user))
+
+    def test_membership_change_invalidates_context(self):
+        self.assertEqual(self._visible_ids(), [])
+        membership = ThreadMembership.objects.create(user=self.reader, thread=self.thread, status="active")
+        self.assertEqual(self._visible_ids(), [self.post.pk])
+        membership.delete()
+        self.assertEqual(self._visible_ids(), [])
+
+
+class HotScoreTest(TestCase):
+    def test_hot_score_decays_with_age(self):
+        now = timezone.now()
+        fresh = hot_score(10, 0, 0, 0, now, now=now)
+        old = hot_score(10, 0, 0, 0, now - timedelta(days=2), now=now)
+        self.assertGreater(fresh, old)
+
+    def test_recent_modest_post_outranks_stale_popular_post(self):
+        now = timezone.now()
+        stale = hot_score(500, 0, 40, 0, now - timedelta(days=365), now=now)
+        recent = hot_score(5, 0, 1, 0, now - timedelta(hours=3), now=now)
+        self.assertGreater(recent, stale)
+
+
+@override_settings(TIMELINE_FANOUT_ASYNC=False)
+class HomeTimelineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="pass")
+        cls.member = User.objects.create_user(username="member", password="pass")
+        org = Organization.objects.create(name="Photography Club", description="Photos", org_type="club")
+        cls.thread = Thread.objects.create(title="Gallery", organization=org, created_by=cls.author)
+        cls.other = Thread.objects.create(title="Elsewhere", organization=org, created_by=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def _create_post(self, thread, title="Post"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(title=title, content="Body", thread=thread, author=self.author)
+
+    def test_new_post_is_pushed_to_active_members_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ThreadMembership.objects.create(user=self.member, thread=self.thread, status="active")
+        post = self._create_post(self.thread)
+        self._create_post(self.other)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.member).values_list("post_id", flat=True)), [post.pk]
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.author).exists())
+
+    def test_joining_backfills_and_home_tab_reads_timeline(self):
+        posts = [self._create_post(self.thread, f"Post {i}") for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            ThreadMembership.objects.create(user=self.member, thread=self.thread, status="active")
+        page = home_timeline_page(User.objects.get(pk=self.member.pk), per_page=2)
+        self.assertEqual([p.pk for p in page], [posts[2].pk, posts[1].pk])
+        page = home_timeline_page(User.objects.get(pk=self.member.pk), page.next_cursor, per_page=2)
+        self.assertEqual([p.pk for p in page], [posts[0].pk])
+        self.assertFalse(page.has_next)
+
+    def test_backfill_runs_only_when_membership_becomes_active(self):
+        membership = ThreadMembership.objects.create(user=self.member, thread=self.thread, status="pending")
+        with mock.patch("apps.threads.signals.schedule_backfill") as schedule:
+            membership.status = "active"
+            membership.save()
+            membership.role = "moderator"
+            membership.save()
+            ThreadMembership.objects.get(pk=membership.pk).save()
+        schedule.assert_called_once_with(membership)
+
+    def test_timelines_are_trimmed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ThreadMembership.objects.create(user=self.member, thread=self.thread, status="active")
+        for i in range(4):
+            self._create_post(self.thread, f"Post {i}")
+        trim_timelines([self.member.pk], max_length=2)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.member).count(), 2)
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.voter = User.objects.create_user(username="voter")
+        org = Organization.objects.create(name="Hiking Club", description="Trails", org_type="club")
+        thread = Thread.objects.create(title="Routes", organization=org, created_by=cls.author)
+        cls.post = Post.objects.create(
+            title="Ridge walk", content="Body", thread=thread, author=cls.author, visibility="public"
+        )
+        Vote.objects.create(
+            user=cls.voter, content_type=ContentType.objects.get_for_model(Post), object_id=cls.post.pk, vote_type=1
+        )
+
+    def setUp(self):
+        caches["fragments"].clear()
+        reset_fragment_stats()
+
+    def _get(self, user, url):
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_cached_post_card_keeps_per_user_slots(self):
+        self._get(self.voter, "/?tab=all")
+        author_html = self._get(self.author, "/?tab=all")
+        voter_html = self._get(self.voter, "/?tab=all")
+        self.assertEqual(fragment_stats(), {"hits": 2, "misses": 1})
+        self.assertIn(reverse("post-update", kwargs={"slug": self.post.slug}), author_html)
+        self.assertNotIn(reverse("post-update", kwargs={"slug": self.post.slug}), voter_html)
+        self.assertIn("text-success", voter_html)
+        self.assertNotIn("text-success", author_html)
+        self.assertNotIn("fragment-slot", voter_html)
+
+    def test_comment_write_invalidates_comment_tree(self):
+        url = reverse("post-detail", kwargs={"slug": self.post.slug})
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.author, content="Bring water")
+        self._get(self.voter, url)
+        self._get(self.voter, url)
+        self.assertEqual(fragment_stats(), {"hits": 1, "misses": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.voter, content="And snacks")
+        self.assertIn("And snacks", self._get(self.voter, url))
+        self.assertEqual(fragment_stats()["misses"], 2)
+
+    def test_author_change_invalidates_comment_tree(self):
+        url = reverse("post-detail", kwargs={"slug": self.post.slug})
+        Comment.objects.create(post=self.post, author=self.author, content="Bring water")
+        self._get(self.voter, url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = "Rafi"
+        author.save()
+        self._get(self.voter, url)
+        self.assertEqual(fragment_stats(), {"hits": 0, "misses": 2})
+
+    def test_version_bump_reaches_other_workers(self):
+        before = get_version("test", 1)
+        # Another worker bumps the shared counter; this one notices once its copy expires
+        version_cache().incr("fragment:version:test:1")
+        self.assertEqual(get_version("test", 1), before)
+        forget_local_versions()
+        self.assertEqual(get_version("test", 1), before + 1)
+
+
+class SlugAllocatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="writer")
+        cls.org = Organization.objects.create(name="Chess Club", description="", org_type="club")
+        cls.thread = Thread.objects.create(title="Openings", organization=cls.org, created_by=cls.user)
+
+    def _post(self, title, **fields):
+        return Post.objects.create(title=title, content="...", thread=self.thread, author=self.user, **fields)
+
+    def _slug_lookups(self, queries):
+        return sum(1 for query in queries if query["sql"].startswith("SELECT") and '."slug"' in query["sql"])
+
+    def test_allocates_lowest_free_suffix_in_one_query(self):
+        self.assertEqual(self._post("Sicilian Defence").slug, "sicilian-defence")
+        self.assertEqual(self._post("Sicilian defence!").slug, "sicilian-defence-1")
+        self._post("Sicilian Defence", slug="sicilian-defence-3")
+        self._post("Sicilian Defence Najdorf")
+        post = Post(title="Sicilian Defence", content="...", thread=self.thread, author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        self.assertEqual(post.slug, "sicilian-defence-2")
+        self.assertEqual(self._slug_lookups(queries), 1)
+        # An index range, not a LIKE scan
+        self.assertFalse(any(" LIKE " in query["sql"] for query in queries))
+        self.assertEqual(self._post("???").slug, "post")
+
+    def test_organizations_and_threads_get_unique_slugs(self):
+        other = Organization.objects.create(name="Chess club!", description="", org_type="club")
+        self.assertEqual([self.org.slug, other.slug], ["chess-club", "chess-club-1"])
+        thread = Thread.objects.create(title="openings", organization=self.org, created_by=self.user)
+        self.assertEqual(thread.slug, "openings-1")
+
+    def test_unchanged_slug_is_not_checked(self):
+        post = Post.objects.get(pk=self._post("Endgames").pk)
+        post.title = "Rook endgames"
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+            self.org.save(update_fields=["member_count"])
+        self.assertEqual(post.slug, "endgames")
+        self.assertEqual(self._slug_lookups(queries), 0)
+
+        post.slug = "openings"
+        post.save()
+        self.assertEqual(post.slug, "openings")
+        post.slug = self._post("Gambits").slug
+        post.save()
+        self.assertEqual(post.slug, "gambits-1")
+
+    def test_retries_when_another_writer_takes_the_slug(self):
+        taken = self._post("Blitz")
+        post = Post(title="Blitz", content="...", thread=self.thread, author=self.user)
+        # The first allocation misses the row another writer just committed
+        with mock.patch("shared.slugs.next_free_slug", side_effect=[taken.slug, "blitz-1"]) as allocate:
+            post.save()
+        self.assertEqual(allocate.call_count, 2)
+        self.assertEqual(Post.objects.get(pk=post.pk).slug, "blitz-1")
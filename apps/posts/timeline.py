@@ -0,0 +1,188 @@
+"""Fan-out-on-write home timelines.
+
+When a post is created its id is pushed into ``TimelineEntry`` rows for every
+active member of its thread, so reading the home feed is one range scan over
+``(user, -created_at, -post)``. Threads with more than ``FANOUT_MAX_MEMBERS``
+active members are skipped on write and merged in at read time instead.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from apps.posts.feeds import FEED_PAGE_SIZE, RECENT_ORDERING
+from apps.posts.models import Post, TimelineEntry
+from apps.posts.visibility import get_visibility_context
+from apps.threads.models import ThreadMembership
+from shared.pagination import KeysetPage, KeysetPaginator
+
+TIMELINE_MAX_LENGTH = 500
+FANOUT_BATCH_SIZE = 500
+FANOUT_MAX_MEMBERS = 5000
+LARGE_THREADS_CACHE_KEY = "posts:timeline:large-threads"
+LARGE_THREADS_CACHE_TIMEOUT = 60 * 10
+
+TIMELINE_ORDERING = ("-created_at", "-post_id")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="timeline-fanout")
+
+
+def _run_off_request(func, *args) -> None:
+    """Run ``func`` after the current transaction commits, in the background worker.
+
+    With the ``TIMELINE_FANOUT_ASYNC`` setting off it runs inline instead.
+    """
+
+    def task():
+        try:
+            func(*args)
+        finally:
+            close_old_connections()
+
+    if settings.TIMELINE_FANOUT_ASYNC:
+        transaction.on_commit(lambda: _executor.submit(task))
+    else:
+        transaction.on_commit(lambda: func(*args))
+
+
+def large_thread_ids() -> frozenset[int]:
+    """Ids of threads too large to fan out on write (cached)."""
+    ids = cache.get(LARGE_THREADS_CACHE_KEY)
+    if ids is None:
+        ids = frozenset(
+            ThreadMembership.objects.filter(status="active")
+            .values("thread_id")
+            .annotate(members=Count("id"))
+            .filter(members__gt=FANOUT_MAX_MEMBERS)
+            .values_list("thread_id", flat=True)
+        )
+        cache.set(LARGE_THREADS_CACHE_KEY, ids, LARGE_THREADS_CACHE_TIMEOUT)
+    return ids
+
+
+def trim_timelines(user_ids, max_length: int = TIMELINE_MAX_LENGTH) -> int:
+    """Delete entries beyond the newest ``max_length`` for each of ``user_ids``.
+
+    Only the timelines over the cap are ranked and trimmed; for the rest this is
+    one count over the ``(user, ...)`` index.
+    """
+    over_cap = list(
+        TimelineEntry.objects.filter(user_id__in=list(user_ids))
+        .values("user_id")
+        .annotate(length=Count("pk"))
+        .filter(length__gt=max_length)
+        .values_list("user_id", flat=True)
+    )
+    if not over_cap:
+        return 0
+    overflow = (
+        TimelineEntry.objects.filter(user_id__in=over_cap)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("user_id"),
+                order_by=[F("created_at").desc(), F("post_id").desc()],
+            )
+        )
+        .filter(position__gt=max_length)
+        .values_list("pk", flat=True)
+    )
+    deleted, _ = TimelineEntry.objects.filter(pk__in=list(overflow)).delete()
+    return deleted
+
+
+def fan_out_post(post_id) -> int:
+    """Push a post onto the timelines of its thread's active members."""
+    post = Post.objects.filter(pk=post_id, is_deleted=False).only("pk", "thread_id", "created_at").first()
+    if post is None or post.thread_id in large_thread_ids():
+        return 0
+
+    members = (
+        ThreadMembership.objects.filter(thread_id=post.thread_id, status="active")
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+    )
+    pushed = 0
+    batch = []
+    for user_id in members.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            pushed += _push(post, batch)
+            batch = []
+    if batch:
+        pushed += _push(post, batch)
+    return pushed
+
+
+def _push(post, user_ids) -> int:
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post.pk, created_at=post.created_at) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    trim_timelines(user_ids)
+    return len(user_ids)
+
+
+def backfill_timeline(user_id, thread_id) -> None:
+    """Seed a member's timeline with the latest posts of a thread they just joined."""
+    if thread_id in large_thread_ids():
+        return
+    recent = (
+        Post.objects.filter(thread_id=thread_id, is_deleted=False)
+        .order_by(*RECENT_ORDERING)
+        .values_list("pk", "created_at")[:TIMELINE_MAX_LENGTH]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=pk, created_at=created_at) for pk, created_at in recent],
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def schedule_fan_out(post) -> None:
+    _run_off_request(fan_out_post, post.pk)
+
+
+def schedule_backfill(membership) -> None:
+    _run_off_request(backfill_timeline, membership.user_id, membership.thread_id)
+
+
+def home_timeline_page(user, cursor: str | None = None, per_page: int = FEED_PAGE_SIZE) -> KeysetPage:
+    """Return one page of the user's home timeline as ``Post`` objects.
+
+    Materialized entries are read with a single index range scan. Posts from the
+    user's large threads (not fanned out) are read directly and merged in, using
+    the same ``(created_at, id)`` cursor.
+    """
+    post_paginator = KeysetPaginator(Post.objects.all(), RECENT_ORDERING, per_page=per_page)
+    entries = KeysetPaginator(
+        TimelineEntry.objects.filter(user=user), TIMELINE_ORDERING, per_page=per_page
+    ).get_page(cursor)
+    candidates = [(entry.created_at, entry.post_id) for entry in entries]
+    has_more = entries.has_next
+
+    large_threads = get_visibility_context(user).thread_ids & large_thread_ids()
+    if large_threads:
+        direct = KeysetPaginator(
+            Post.objects.filter(thread_id__in=sorted(large_threads)), RECENT_ORDERING, per_page=per_page
+        ).get_page(cursor)
+        candidates = sorted(
+            {*candidates, *((post.created_at, post.pk) for post in direct)}, reverse=True
+        )
+        has_more = has_more or direct.has_next or len(candidates) > per_page
+        candidates = candidates[:per_page]
+
+    # Re-check visibility on the handful of ids: memberships may have ended since fan-out
+    ids = [post_id for _, post_id in candidates]
+    posts_by_id = Post.objects.visible_to_user(user).select_related("thread", "author").in_bulk(ids)
+    posts = [posts_by_id[post_id] for post_id in ids if post_id in posts_by_id]
+
+    next_cursor = None
+    if has_more and candidates:
+        last_created_at, last_id = candidates[-1]
+        next_cursor = post_paginator.cursor_for(Post(pk=last_id, created_at=last_created_at))
+    return KeysetPage(posts, next_cursor)
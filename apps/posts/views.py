@@ -1,10 +1,12 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
 
+from apps.comments.tree import comment_tree_context, load_comment_tree
 from apps.posts.models import Post
 from apps.threads.models import Thread, ThreadMembership
 from apps.campus.models import OrganizationMembership
-from apps.votes.models import Vote
+from apps.votes.buffer import apply_pending_counts
+from apps.votes.loaders import attach_viewer_state
 from apps.posts.forms import PostForm
 
 
@@ -105,10 +107,10 @@ class PostDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Show only top-level comments here; replies are rendered recursively
-        context["comments"] = self.object.comments.filter(parent__isnull=True).order_by(
-            "-created_at"
-        )
+        # First page of the comment tree in one range query; replies render from ``children``
+        context.update(comment_tree_context(self.request, self.object, load_comment_tree(self.object)))
+        apply_pending_counts([self.object])
+        attach_viewer_state(self.request, posts=[self.object])
         # Sidebar data to match thread detail
         thread = self.object.thread
         context["thread"] = thread
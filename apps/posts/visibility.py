@@ -0,0 +1,74 @@
+import hashlib
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from apps.campus.models import OrganizationMembership
+from apps.threads.models import ThreadMembership
+from shared.fragments import bump_version, get_version
+
+VISIBILITY_CACHE_TIMEOUT = 60 * 15
+VISIBILITY_VERSION = "posts-visibility"
+_REQUEST_ATTR = "_visibility_context"
+
+
+@dataclass(frozen=True)
+class VisibilityContext:
+    """Organization and thread ids a user is an active member of"""
+
+    org_ids: frozenset[int]
+    thread_ids: frozenset[int]
+
+
+def _cache_key(user_id) -> str:
+    return f"posts:visibility:{user_id}:{get_version(VISIBILITY_VERSION, user_id)}"
+
+
+def _build_visibility_context(user) -> VisibilityContext:
+    org_ids = OrganizationMembership.objects.filter(
+        user=user, status="active"
+    ).values_list("organization_id", flat=True)
+    thread_ids = ThreadMembership.objects.filter(
+        user=user, status="active"
+    ).values_list("thread_id", flat=True)
+    return VisibilityContext(org_ids=frozenset(org_ids), thread_ids=frozenset(thread_ids))
+
+
+def get_visibility_context(user) -> VisibilityContext | None:
+    """Return the membership sets used for post visibility checks.
+
+    The context is memoized on the user instance, so it is built at most once per
+    request, and shared between requests through the cache under a per-user
+    version kept in the shared ``versions`` cache. A membership change bumps the
+    version (see the membership signals), which retires the context in every
+    worker. Anonymous users have no context.
+    """
+    if not user.is_authenticated:
+        return None
+    context = getattr(user, _REQUEST_ATTR, None)
+    if context is None:
+        key = _cache_key(user.pk)
+        context = cache.get(key)
+        if context is None:
+            context = _build_visibility_context(user)
+            cache.set(key, context, VISIBILITY_CACHE_TIMEOUT)
+        setattr(user, _REQUEST_ATTR, context)
+    return context
+
+
+def invalidate_visibility_context(user_id) -> None:
+    """Retire the cached visibility context of a user after a membership change."""
+    bump_version(VISIBILITY_VERSION, user_id)
+
+
+def visibility_variant(user) -> str:
+    """Short key naming what ``user`` may see, for caches of visibility-filtered lists.
+
+    Anonymous users share ``"public"``; members of the same organizations and
+    threads share one digest.
+    """
+    if not (user and user.is_authenticated):
+        return "public"
+    visibility = get_visibility_context(user)
+    ids = repr((sorted(visibility.org_ids), sorted(visibility.thread_ids)))
+    return hashlib.md5(ids.encode(), usedforsecurity=False).hexdigest()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ThreadsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.threads"
+
+    def ready(self):
+        # Ensure signals are registered
+        from . import signals  # noqa: F401
@@ -0,0 +1,32 @@
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.threads.forms import ThreadForm
+from apps.threads.models import Thread
+from shared.benchmarks import benchmark
+
+COLLIDING_SLUGS = 50
+
+
+@benchmark("threads.Thread.save (colliding slug)", number=20)
+def thread_save_colliding_slug():
+    author = User.objects.create_user(username="thread-author")
+    org = Organization.objects.create(name="Benchmark Society", description="Benchmarks", org_type="society")
+    Thread.objects.bulk_create(
+        Thread(title="General", slug="general" + (f"-{i}" if i else ""), organization=org, created_by=author)
+        for i in range(COLLIDING_SLUGS)
+    )
+    return lambda: Thread.objects.create(title="General", organization=org, created_by=author)
+
+
+@benchmark("shared.DaisyUIFormMixin.apply_daisy_ui_classes", number=500)
+def apply_daisy_ui_classes():
+    form = ThreadForm(initial={"organization": 1})
+    widgets = [(field.widget, dict(field.widget.attrs)) for field in form.fields.values()]
+
+    def run():
+        # Start from the declared attrs again, as a freshly built form would
+        for widget, attrs in widgets:
+            widget.attrs = dict(attrs)
+        form.apply_daisy_ui_classes()
+
+    return run
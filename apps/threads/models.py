@@ -1,10 +1,10 @@
 from django.db import models
-from django.utils.text import slugify
 from django.urls import reverse
 from shared.models import BaseModel
+from shared.slugs import UniqueSlugMixin
 
 
-class Thread(BaseModel):
+class Thread(UniqueSlugMixin, BaseModel):
     """Discussion threads/categories"""
 
     THREAD_TYPES = [
@@ -19,6 +19,7 @@ class Thread(BaseModel):
 
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=250, unique=True, blank=True)
+    slug_fallback = "thread"
     description = models.TextField(blank=True)
     thread_type = models.CharField(
         max_length=20, choices=THREAD_TYPES, default="general"
@@ -40,54 +41,6 @@ class Thread(BaseModel):
             models.Index(fields=["-is_pinned", "-updated_at"]),
         ]
 
-    def save(self, *args, **kwargs):
-        base_slug = slugify(self.title) if not self.slug else self.slug
-        if not base_slug:
-            base_slug = "thread"
-        base_slug = base_slug[:230]
-
-        if not self.slug:
-            slug_candidate = base_slug
-        else:
-            slug_candidate = self.slug
-
-        if self._state.adding:
-            counter = 1
-            max_attempts = 100
-            while (
-                Thread.objects.filter(slug=slug_candidate).exists()
-                and counter <= max_attempts
-            ):
-                slug_candidate = f"{base_slug}-{counter}"
-                counter += 1
-            if counter > max_attempts:
-                # Fallback to UUID if we hit the limit
-                import uuid
-
-                slug_candidate = f"{base_slug}-{uuid.uuid4().hex[:8]}"
-            self.slug = slug_candidate
-        else:
-            if Thread.objects.exclude(pk=self.pk).filter(slug=slug_candidate).exists():
-                counter = 1
-                slug_candidate = base_slug
-                max_attempts = 100
-                while (
-                    Thread.objects.exclude(pk=self.pk)
-                    .filter(slug=slug_candidate)
-                    .exists()
-                    and counter <= max_attempts
-                ):
-                    slug_candidate = f"{base_slug}-{counter}"
-                    counter += 1
-                if counter > max_attempts:
-                    # Fallback to UUID if we hit the limit
-                    import uuid
-
-                    slug_candidate = f"{base_slug}-{uuid.uuid4().hex[:8]}"
-                self.slug = slug_candidate
-
-        super().save(*args, **kwargs)
-
     def get_absolute_url(self):
         return reverse("thread-detail", kwargs={"thread_name": self.slug})
 
@@ -127,3 +80,10 @@ class ThreadMembership(BaseModel):
             models.Index(fields=["thread", "status", "role"]),
             models.Index(fields=["user", "status", "role"]),
         ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signals can detect a membership becoming active
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
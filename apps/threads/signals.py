@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.posts.timeline import schedule_backfill
+from apps.posts.visibility import invalidate_visibility_context
+from apps.threads.models import ThreadMembership
+
+
+@receiver([post_save, post_delete], sender=ThreadMembership)
+def invalidate_member_visibility(sender, instance: ThreadMembership, **kwargs):
+    invalidate_visibility_context(instance.user_id)
+
+
+@receiver(post_save, sender=ThreadMembership)
+def backfill_member_timeline(sender, instance: ThreadMembership, created, **kwargs):
+    """Seed the timeline when a membership becomes active, not on every save of an active one."""
+    was_active = not created and getattr(instance, "_loaded_status", None) == "active"
+    if instance.status == "active" and not was_active:
+        schedule_backfill(instance)
+    instance._loaded_status = instance.status
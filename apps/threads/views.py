@@ -8,6 +8,13 @@ from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
 from .forms import ThreadForm
 from .models import Thread, ThreadMembership
 from apps.campus.models import OrganizationMembership
+from apps.posts.feeds import (
+    FEED_PAGE_TEMPLATE,
+    LATEST_ORDERING,
+    POPULAR_ORDERING,
+    is_feed_page_request,
+    paginate_feed,
+)
 from apps.posts.models import Post
 
 class ThreadOrgSelectView(LoginRequiredMixin, TemplateView):
@@ -36,6 +43,11 @@ class ThreadDetailView(DetailView):
 
         return response
 
+    def get_template_names(self):
+        if is_feed_page_request(self.request):
+            return [FEED_PAGE_TEMPLATE]
+        return super().get_template_names()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         thread = self.object
@@ -70,22 +82,14 @@ class ThreadDetailView(DetailView):
             can_join_org = True
 
         # Only show posts and full content to thread members
-        posts = []
+        feed = {"posts": [], "next_page_url": None}
         tab = "popular"
         if is_thread_member:
             tab = self.request.GET.get("tab", "popular")
             # Only show posts in this thread
             posts_qs = Post.objects.filter(thread=thread).select_related("thread", "author")
-            if tab == "latest":
-                posts = posts_qs.order_by("-is_pinned", "-created_at")
-            else:
-                posts = posts_qs.order_by(
-                    "-upvotes",
-                    "downvotes",
-                    "-view_count",
-                    "-comment_count",
-                    "-created_at",
-                )
+            ordering = LATEST_ORDERING if tab == "latest" else POPULAR_ORDERING
+            feed = paginate_feed(self.request, posts_qs, ordering)
 
         # Sidebar data: admins, moderators, member count
         admin_memberships = (
@@ -108,7 +112,7 @@ class ThreadDetailView(DetailView):
                 "is_thread_member": is_thread_member,
                 "can_join_org": can_join_org,
                 "can_join_thread": can_join_thread,
-                "posts": posts,
+                **feed,
                 "active_tab": tab,
                 "admin_memberships": admin_memberships,
                 "moderator_memberships": moderator_memberships,
@@ -0,0 +1,31 @@
+from itertools import cycle
+
+from django.test import RequestFactory
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.posts.models import Post
+from apps.threads.models import Thread
+from apps.votes.views import vote
+from shared.benchmarks import benchmark
+
+# Insert, remove, insert, switch, switch back, remove: every branch of cast_vote
+ACTIONS = ("up", "up", "down", "up", "down", "down")
+
+
+@benchmark("votes.vote (state machine)", number=60)
+def vote_state_machine():
+    voter = User.objects.create_user(username="voter")
+    org = Organization.objects.create(name="Benchmark Committee", description="Benchmarks", org_type="committee")
+    thread = Thread.objects.create(title="General", organization=org, created_by=voter)
+    post = Post.objects.create(title="Vote on me", content="Body", thread=thread, author=voter, visibility="public")
+    factory = RequestFactory()
+    actions = cycle(ACTIONS)
+
+    def run():
+        form = {"model": "post", "object_id": post.pk, "action": next(actions), "next": "/"}
+        request = factory.post("/v/vote/", form)
+        request.user = voter
+        return vote(request)
+
+    return run
@@ -0,0 +1,73 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.posts.models import Post
+from apps.posts.ranking import hot_score_expression
+
+from .models import Vote
+
+COUNTER_FIELDS = {1: "upvotes", -1: "downvotes"}
+MAX_VOTE_ATTEMPTS = 3
+
+
+def _write_vote(votes, lookup: dict, current, value: int) -> dict[str, int] | None:
+    """Move the vote from ``current`` to the click on ``value``; None if the write did not apply."""
+    if current == value:
+        deleted, _ = votes.filter(vote_type=value).delete()
+        return {COUNTER_FIELDS[value]: -1} if deleted else None
+    if current == -value:
+        # update() skips auto_now; incremental reconciliation finds changed votes by updated_at
+        switched = votes.filter(vote_type=-value).update(vote_type=value, updated_at=timezone.now())
+        return {COUNTER_FIELDS[value]: 1, COUNTER_FIELDS[-value]: -1} if switched else None
+    try:
+        with transaction.atomic():
+            Vote.objects.create(**lookup, vote_type=value)
+    except IntegrityError:
+        return None
+    return {COUNTER_FIELDS[value]: 1}
+
+
+def cast_vote(user, content_type, object_id, value: int) -> dict[str, int]:
+    """Apply one click on the up/down button and return the counter deltas.
+
+    Clicking the current vote removes it, clicking the opposite one switches it,
+    otherwise a new vote is inserted. The current vote is read first so exactly
+    one write follows. The write is conditional on the state that was read, and
+    its row count tells whether it applied, so concurrent requests for the same
+    ``(user, content_type, object_id)`` cannot double count; when it did not
+    apply (or the insert hit the unique key) the state is read again.
+    """
+    lookup = {"user": user, "content_type": content_type, "object_id": object_id}
+    votes = Vote.objects.filter(**lookup)
+    for _ in range(MAX_VOTE_ATTEMPTS):
+        current = votes.values_list("vote_type", flat=True).first()
+        deltas = _write_vote(votes, lookup, current, value)
+        if deltas is not None:
+            return deltas
+    raise IntegrityError("Vote kept conflicting with concurrent requests")
+
+
+def apply_counter_delta(target, deltas: dict[str, int]) -> None:
+    """Add ``deltas`` to the vote counters of ``target`` in a single UPDATE.
+
+    Uses database-side ``F()`` arithmetic so concurrent votes never overwrite each
+    other, and ``update()`` so ``updated_at`` (used by feed orderings) is untouched.
+    ``counters_changed_at`` is set instead, which records removed votes too for
+    ``reconcile_counters --since``. For a post the hot score is recomputed from the
+    new counters in the same statement; ``target`` only needs its ``pk`` and
+    ``created_at`` loaded.
+    """
+    changes = {
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items()
+        if delta
+    }
+    if not changes:
+        return
+    changes["counters_changed_at"] = timezone.now()
+    Model = type(target)
+    if Model is Post:
+        changes["hot_score"] = hot_score_expression(target.created_at, **changes)
+    Model.objects.filter(pk=target.pk).update(**changes)
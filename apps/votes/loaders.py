@@ -0,0 +1,64 @@
+from django.contrib.contenttypes.models import ContentType
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.votes.models import Vote
+
+_STATE_ATTR = "_viewer_vote_state"
+
+
+def _state(request) -> dict:
+    state = getattr(request, _STATE_ATTR, None)
+    if state is None:
+        state = {"votes": {}}
+        setattr(request, _STATE_ATTR, state)
+    return state
+
+
+def _viewer(request):
+    user = getattr(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def prefetch_votes(request, model, object_ids) -> None:
+    """Load the viewer's votes on ``object_ids`` of ``model`` in a single query.
+
+    The result is remembered on the request so ``viewer_vote`` (and the
+    ``user_vote`` template tag) can answer without touching the database.
+    """
+    user = _viewer(request)
+    object_ids = [pk for pk in object_ids if pk is not None]
+    if user is None or not object_ids:
+        return
+    ct = ContentType.objects.get_for_model(model)
+    found = dict(
+        Vote.objects.filter(user=user, content_type=ct, object_id__in=object_ids).values_list(
+            "object_id", "vote_type"
+        )
+    )
+    votes = _state(request)["votes"]
+    for pk in object_ids:
+        votes[(ct.pk, pk)] = found.get(pk, 0)
+
+
+def viewer_vote(request, obj) -> int | None:
+    """Prefetched vote of the viewer on ``obj``: 1, -1, 0, or None if not prefetched."""
+    if hasattr(obj, "viewer_vote"):
+        return obj.viewer_vote
+    ct = ContentType.objects.get_for_model(obj.__class__)
+    return _state(request)["votes"].get((ct.pk, obj.pk))
+
+
+def attach_viewer_state(request, posts=(), comments=()) -> None:
+    """Fetch the viewer's votes for a page of objects and attach them.
+
+    Costs one query per content type regardless of how many objects are
+    rendered. Each post and comment gets a ``viewer_vote`` attribute.
+    """
+    if _viewer(request) is None:
+        return
+    posts, comments = list(posts), list(comments)
+    prefetch_votes(request, Post, [p.pk for p in posts])
+    prefetch_votes(request, Comment, [c.pk for c in comments])
+    for obj in posts + comments:
+        obj.viewer_vote = viewer_vote(request, obj)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.votes.buffer import flush_vote_deltas, pending_count
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold staged write-behind vote deltas into post and comment counters. "
+        "Runs once with --once, otherwise keeps flushing every --interval-ms or "
+        "as soon as --max-votes deltas are pending."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Flush once and exit.")
+        parser.add_argument("--interval-ms", type=int, default=1000)
+        parser.add_argument("--max-votes", type=int, default=500)
+        parser.add_argument("--poll-ms", type=int, default=100)
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            self.stdout.write(f"Flushed {flush_vote_deltas()} vote deltas.")
+            return
+        try:
+            self._flush_continuously(options["interval_ms"] / 1000, options["poll_ms"] / 1000, options["max_votes"])
+        except KeyboardInterrupt:
+            self.stdout.write(f"Flushed {flush_vote_deltas()} vote deltas before exit.")
+
+    def _flush_continuously(self, interval, poll, max_votes):
+        poll = min(poll, interval)
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(poll)
+            if time.monotonic() - last_flush < interval and pending_count() < max_votes:
+                continue
+            folded = flush_vote_deltas()
+            last_flush = time.monotonic()
+            if folded:
+                self.stdout.write(f"Flushed {folded} vote deltas.")
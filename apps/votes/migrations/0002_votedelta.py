@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 08:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('votes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('upvotes', models.SmallIntegerField(default=0)),
+                ('downvotes', models.SmallIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'db_table': 'vote_deltas',
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='vote_deltas_content_a08bc7_idx')],
+            },
+        ),
+    ]
@@ -38,3 +38,18 @@ class SavedPost(BaseModel):
     class Meta:
         db_table = "saved_posts"
         unique_together = ["user", "post"]
+
+
+class VoteDelta(models.Model):
+    """Pending counter change staged by write-behind voting, see apps.votes.buffer"""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    upvotes = models.SmallIntegerField(default=0)
+    downvotes = models.SmallIntegerField(default=0)
+
+    class Meta:
+        db_table = "vote_deltas"
+        indexes = [
+            models.Index(fields=["content_type", "object_id"]),
+        ]
@@ -1,5 +1,6 @@
 from django import template
 from django.contrib.contenttypes.models import ContentType
+from apps.votes.loaders import viewer_vote
 from apps.votes.models import Vote
 
 register = template.Library()
@@ -11,6 +12,10 @@ def user_vote(context, obj):
     request = context.get("request")
     if not request or not hasattr(request, "user") or not request.user.is_authenticated:
         return 0
+    # Use the page-level prefetch when the view ran attach_viewer_state
+    prefetched = viewer_vote(request, obj)
+    if prefetched is not None:
+        return prefetched
     ct = ContentType.objects.get_for_model(obj.__class__)
     v = Vote.objects.filter(
         user=request.user, content_type=ct, object_id=obj.pk
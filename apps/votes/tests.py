@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User
+from apps.campus.models import Organization
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.threads.models import Thread
+from apps.votes.buffer import apply_pending_counts, flush_vote_deltas
+from apps.votes.counters import apply_counter_delta, cast_vote
+from apps.votes.models import Vote, VoteDelta
+
+
+class BatchedVoteStateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="voter", password="pass")
+        org = Organization.objects.create(name="Chess Club", description="Chess", org_type="club")
+        thread = Thread.objects.create(title="Openings", organization=org, created_by=cls.user)
+        post_ct = ContentType.objects.get_for_model(Post)
+        comment_ct = ContentType.objects.get_for_model(Comment)
+        cls.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f"Post {i}", content="Body", thread=thread, author=cls.user, visibility="public"
+            )
+            cls.posts.append(post)
+            Vote.objects.create(user=cls.user, content_type=post_ct, object_id=post.pk, vote_type=1 if i % 2 else -1)
+        cls.post = cls.posts[0]
+        parent = None
+        for i in range(8):
+            parent = Comment.objects.create(post=cls.post, author=cls.user, content=f"Reply {i}", parent=parent)
+            Vote.objects.create(user=cls.user, content_type=comment_ct, object_id=parent.pk, vote_type=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _vote_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q["sql"] for q in ctx.captured_queries if 'FROM "votes"' in q["sql"]]
+
+    def test_feed_fetches_votes_once(self):
+        response, queries = self._vote_queries("/?tab=all")
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, "text-success")
+        self.assertContains(response, "text-error")
+
+    def test_post_detail_fetches_comment_votes_once(self):
+        response, queries = self._vote_queries(self.post.get_absolute_url())
+        # One query for the post, one for every comment in the tree
+        self.assertEqual(len(queries), 2)
+
+
+class ConcurrentVoteTest(TransactionTestCase):
+    voters = 12
+
+    def setUp(self):
+        author = User.objects.create_user(username="author", password="pass")
+        org = Organization.objects.create(name="Cycling Club", description="Bikes", org_type="club")
+        thread = Thread.objects.create(title="Rides", organization=org, created_by=author)
+        self.post = Post.objects.create(
+            title="Popular", content="Body", thread=thread, author=author, visibility="public"
+        )
+        self.users = [User.objects.create_user(username=f"voter{i}") for i in range(self.voters)]
+
+    def _vote(self, user, action):
+        client = Client()
+        client.force_login(user)
+        try:
+            return client.post(
+                reverse("vote"), {"model": "post", "object_id": self.post.pk, "action": action, "next": "/"}
+            ).status_code
+        finally:
+            connections.close_all()
+
+    def test_parallel_votes_are_all_counted(self):
+        # Two thirds upvote, the rest downvote, then the downvoters switch to an upvote
+        actions = [(user, "up" if i % 3 else "down") for i, user in enumerate(self.users)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            codes = list(pool.map(lambda args: self._vote(*args), actions))
+        self.assertEqual(set(codes), {302})
+        switches = [(user, "up") for user, action in actions if action == "down"]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda args: self._vote(*args), switches))
+
+        self.post.refresh_from_db()
+        post_ct = ContentType.objects.get_for_model(Post)
+        votes = Vote.objects.filter(content_type=post_ct, object_id=self.post.pk)
+        self.assertEqual(self.post.upvotes, votes.filter(vote_type=1).count())
+        self.assertEqual(self.post.downvotes, votes.filter(vote_type=-1).count())
+        self.assertEqual((self.post.upvotes, self.post.downvotes), (self.voters, 0))
+
+    def test_vote_does_not_touch_updated_at(self):
+        before = Post.objects.get(pk=self.post.pk).updated_at
+        self._vote(self.users[0], "up")
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.upvotes, post.updated_at), (1, before))
+
+    def test_switch_is_one_read_and_two_writes(self):
+        post_ct = ContentType.objects.get_for_model(Post)
+        Vote.objects.create(user=self.users[0], content_type=post_ct, object_id=self.post.pk, vote_type=-1)
+        Post.objects.filter(pk=self.post.pk).update(downvotes=1)
+        target = Post.objects.only("pk", "created_at").get(pk=self.post.pk)
+        # Read the vote, switch it, then counters and hot score in one UPDATE
+        with self.assertNumQueries(3):
+            apply_counter_delta(target, cast_vote(self.users[0], post_ct, self.post.pk, 1))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.upvotes, post.downvotes), (1, 0))
+        self.assertAlmostEqual(post.hot_score, post.compute_hot_score(), delta=1e-4)
+
+
+@override_settings(VOTE_WRITE_BEHIND=True)
+class WriteBehindVoteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="author")
+        org = Organization.objects.create(name="Film Society", description="Films", org_type="society")
+        thread = Thread.objects.create(title="Screenings", organization=org, created_by=author)
+        cls.post = Post.objects.create(title="Tonight", content="Body", thread=thread, author=author)
+        cls.voters = [User.objects.create_user(username=f"fan{i}") for i in range(3)]
+
+    def _vote(self, user, action):
+        self.client.force_login(user)
+        self.client.post(reverse("vote"), {"model": "post", "object_id": self.post.pk, "action": action})
+
+    def test_votes_are_staged_then_flushed_in_one_batch(self):
+        for user in self.voters:
+            self._vote(user, "up")
+        self._vote(self.voters[0], "down")
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes, self.post.downvotes), (0, 0))
+        apply_pending_counts([self.post])
+        self.assertEqual((self.post.upvotes, self.post.downvotes), (2, 1))
+
+        self.assertEqual(flush_vote_deltas(), 4)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.upvotes, self.post.downvotes), (2, 1))
+        self.assertFalse(VoteDelta.objects.exists())
+
+    def test_delta_staged_during_flush_is_kept(self):
+        for user in self.voters:
+            self._vote(user, "up")
+        # Free the lowest pk, as if its writer had not committed yet
+        late = VoteDelta.objects.order_by("pk").values().first()
+        VoteDelta.objects.filter(pk=late["id"]).delete()
+        get_for_id = ContentType.objects.get_for_id
+
+        def commit_late_delta(pk):
+            VoteDelta.objects.get_or_create(**late)
+            return get_for_id(pk)
+
+        with mock.patch.object(ContentType.objects, "get_for_id", side_effect=commit_late_delta):
+            self.assertEqual(flush_vote_deltas(), 2)
+        self.assertEqual(list(VoteDelta.objects.values_list("pk", flat=True)), [late["id"]])
+        self.assertEqual(flush_vote_deltas(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvotes, 3)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
@@ -8,7 +9,9 @@ from django.views.decorators.http import require_POST
 from apps.comments.models import Comment
 from apps.posts.models import Post
 
-from .models import SavedPost, Vote
+from .buffer import buffer_counter_delta
+from .counters import apply_counter_delta, cast_vote
+from .models import SavedPost
 
 
 def _get_model_and_ct(model_name: str):
@@ -39,60 +42,15 @@ def vote(request):
     except (TypeError, ValueError):
         return JsonResponse({"error": "Invalid object id"}, status=400)
 
-    target = get_object_or_404(Model, pk=pk)
-
-    previous = Vote.objects.filter(user=request.user, content_type=ct, object_id=pk).first()
-
-    def dec_up():
-        if hasattr(target, "upvotes") and target.upvotes > 0:
-            target.upvotes -= 1
-
-    def dec_down():
-        if hasattr(target, "downvotes") and target.downvotes > 0:
-            target.downvotes -= 1
-
-    def inc_up():
-        if hasattr(target, "upvotes"):
-            target.upvotes += 1
-
-    def inc_down():
-        if hasattr(target, "downvotes"):
-            target.downvotes += 1
-
-    if action in {"up", "down"}:
-        new_value = 1 if action == "up" else -1
-        if not previous:
-            Vote.objects.create(
-                user=request.user, content_type=ct, object_id=pk, vote_type=new_value
-            )
-            if new_value == 1:
-                inc_up()
-            else:
-                inc_down()
-        else:
-            if previous.vote_type == new_value:
-                # toggle off - remove the vote
-                if new_value == 1:
-                    dec_up()
-                else:
-                    dec_down()
-                previous.delete()
-            else:
-                # switch vote
-                if new_value == 1:
-                    inc_up()
-                    dec_down()
-                else:
-                    inc_down()
-                    dec_up()
-                previous.vote_type = new_value
-                previous.save(update_fields=["vote_type"])
-    else:
+    if action not in {"up", "down"}:
         return JsonResponse({"error": "Unsupported action"}, status=400)
+    target = Model.objects.filter(pk=pk).only("pk", "created_at").first()
+    if target is None:
+        raise Http404("Vote target not found")
 
-    target.save(update_fields=[
-        f for f in ["upvotes", "downvotes", "updated_at"] if hasattr(target, f)
-    ])
+    deltas = cast_vote(request.user, ct, pk, 1 if action == "up" else -1)
+    record_delta = buffer_counter_delta if settings.VOTE_WRITE_BEHIND else apply_counter_delta
+    record_delta(target, deltas)
 
     # Always redirect back to the page for consistent behavior
     return redirect(request.POST.get("next") or request.META.get("HTTP_REFERER", "/"))
@@ -41,6 +41,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its timings cover the whole stack; removes itself unless REQUEST_TIMING is on
+    "shared.timing.RequestTimingMiddleware",
+    # Repeated-query (N+1) detection per NPLUSONE; removes itself when off
+    "shared.nplusone.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,6 +58,43 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "config.urls"
 
+# Push new posts onto member timelines in a background thread after the commit
+# (see apps.posts.timeline); off runs the fan-out inline, e.g. in tests and scripts
+TIMELINE_FANOUT_ASYNC = config("TIMELINE_FANOUT_ASYNC", default=True, cast=bool)
+
+# Rebuild the search typeahead index in a background thread after writes to
+# users, organizations or threads, answering from the previous index meanwhile
+# (see apps.campus.typeahead); off rebuilds inline on the next lookup
+TYPEAHEAD_REBUILD_ASYNC = config("TYPEAHEAD_REBUILD_ASYNC", default=True, cast=bool)
+
+# Stage vote counter changes and apply them in batches with
+# `manage.py flush_vote_buffer` instead of writing the post/comment row per vote
+VOTE_WRITE_BEHIND = config("VOTE_WRITE_BEHIND", default=False, cast=bool)
+
+# Server-Timing header and a log line with SQL, template and cache timings for a
+# sampled share of requests (see shared.timing). Turning it on wraps
+# Template.render for the life of the process, which costs unsampled renders one
+# context variable lookup. The header, which exposes query counts and timings, goes
+# to staff users and DEBUG only unless REQUEST_TIMING_HEADER is on
+REQUEST_TIMING = config("REQUEST_TIMING", default=False, cast=bool)
+REQUEST_TIMING_SAMPLE_RATE = config("REQUEST_TIMING_SAMPLE_RATE", default=1.0, cast=float)
+REQUEST_TIMING_HEADER = config("REQUEST_TIMING_HEADER", default=False, cast=bool)
+
+# N+1 query detection (see shared.nplusone): "off", "log" (staging) or "strict"
+# (raise, failing the test that made the request)
+NPLUSONE = config("NPLUSONE", default="off")
+NPLUSONE_THRESHOLD = config("NPLUSONE_THRESHOLD", default=5, cast=int)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "shared.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "shared.nplusone": {"handlers": ["console"], "level": "WARNING", "propagate": False},
+    },
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -82,9 +123,44 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Take the write lock at BEGIN so concurrent writers queue on the
+            # busy timeout instead of failing with "database is locked"
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # A file-backed test database lets tests exercise concurrent connections
+        # (an in-memory shared-cache database fails with "table is locked")
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ruetconnect",
+    },
+    # Rendered HTML fragments (see shared.fragments); kept apart so they never evict other entries
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ruetconnect-fragments",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # Version counters invalidating cached data (see shared.fragments). Every worker
+    # must see the same counters, so this backend has to be shared between processes;
+    # the database backend needs `manage.py createcachetable` once.
+    "versions": {
+        "BACKEND": config("VERSION_CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": config("VERSION_CACHE_LOCATION", default="cache_versions"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+FRAGMENT_CACHE_ENABLED = config("FRAGMENT_CACHE_ENABLED", default=True, cast=bool)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
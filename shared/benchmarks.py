@@ -0,0 +1,111 @@
+"""Micro-benchmarks for model-layer hot paths.
+
+Benchmarks live in ``benchmarks.py`` modules of the installed apps and register
+themselves with ``@benchmark``. A benchmark is a function that prepares its data
+and returns the callable to time::
+
+    @benchmark("posts.can_user_view", number=1000)
+    def can_user_view():
+        post, user = ...
+        return lambda: post.can_user_view(user)
+
+Each benchmark runs in its own transaction, rolled back afterwards. The callable
+is timed ``rounds`` times, ``number`` calls per round, and the median time per
+call is kept. Results are saved as a JSON baseline; a later run regresses when a
+median exceeds its baseline by more than the threshold.
+"""
+
+import gc
+import json
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import transaction
+from django.utils.module_loading import autodiscover_modules
+
+ROUNDS = 7
+THRESHOLD = 0.25
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    prepare: Callable[[], Callable[[], object]]
+    number: int = 100
+
+
+_registry: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, number: int = 100):
+    """Register the decorated function, which returns the callable to time, as ``name``."""
+
+    def register(prepare):
+        _registry[name] = Benchmark(name, prepare, number)
+        return prepare
+
+    return register
+
+
+def get_benchmarks() -> dict[str, Benchmark]:
+    autodiscover_modules("benchmarks")
+    return dict(sorted(_registry.items()))
+
+
+def measure(bench: Benchmark, rounds: int = ROUNDS) -> dict:
+    """Time ``bench`` and return its median, minimum and maximum seconds per call."""
+    timings = []
+    with transaction.atomic():
+        func = bench.prepare()
+        func()  # warm up caches and lazy imports
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                started = time.perf_counter()
+                for _ in range(bench.number):
+                    func()
+                timings.append((time.perf_counter() - started) / bench.number)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+            transaction.set_rollback(True)
+    return {"median": statistics.median(timings), "min": min(timings), "max": max(timings), "number": bench.number}
+
+
+def run_benchmarks(names=None, rounds: int = ROUNDS, log=None) -> dict:
+    """Measure the registered benchmarks, or only those whose name starts with one of ``names``."""
+    results = {}
+    for name, bench in get_benchmarks().items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        results[name] = measure(bench, rounds)
+        if log:
+            log(f"{name}: {results[name]['median'] * 1e6:.1f} µs")
+    return results
+
+
+def regressions(baseline: dict, results: dict, threshold: float = THRESHOLD) -> list[str]:
+    """Benchmarks whose median is more than ``threshold`` slower than in ``baseline``."""
+    slower = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["median"] > before["median"] * (1 + threshold):
+            slower.append(f"{name}: {before['median'] * 1e6:.1f} -> {result['median'] * 1e6:.1f} µs")
+    return slower
+
+
+def load_baseline(path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as baseline:
+            return json.load(baseline)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results: dict) -> None:
+    with open(path, "w", encoding="utf-8") as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+        baseline.write("\n")
@@ -0,0 +1,204 @@
+"""Versioned HTML fragment cache with per-request slots.
+
+``{% cachedfragment %}`` (``fragment_tags`` library) stores rendered HTML under a
+key built from object versions derived from the data, e.g. a post's
+``updated_at`` or a digest of the comments on a page; stale entries are never
+read again and age out of the dedicated ``fragments`` cache, which may be local
+to each worker. Per-user or per-request parts (vote state,
+forms carrying the CSRF token, owner links, relative times) are declared with
+``{% fragment_slot %}``: the cached HTML keeps a marker and the slot is rendered
+for every request. Model instances passed to slots are stored by reference and
+resolved from the objects the view registered with ``register_fragment_objects``.
+
+Caches that cannot derive their key from the data they show use version counters
+(``get_version`` and ``bump_version``) kept in the ``versions`` cache, which must
+be shared between workers.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.db.models import Model
+
+FRAGMENT_CACHE_ALIAS = "fragments"
+VERSION_CACHE_ALIAS = "versions"
+VERSION_TIMEOUT = 60 * 60 * 24
+# Seconds a worker trusts a version it read before asking the shared cache again
+VERSION_LOCAL_TTL = 2
+
+_OBJECTS_ATTR = "_fragment_objects"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+_lookups = ContextVar("cache_lookups", default=None)
+
+_local_versions = {}
+_versions_lock = threading.Lock()
+
+
+def fragment_cache():
+    try:
+        return caches[FRAGMENT_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return cache
+
+
+def fragments_enabled() -> bool:
+    return getattr(settings, "FRAGMENT_CACHE_ENABLED", True)
+
+
+def fragment_key(name: str, parts) -> str:
+    digest = hashlib.md5(repr(list(parts)).encode(), usedforsecurity=False).hexdigest()
+    return f"fragment:{name}:{digest}"
+
+
+# Versions
+
+
+def version_cache():
+    try:
+        return caches[VERSION_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return cache
+
+
+def _version_key(name: str, pk) -> str:
+    return f"fragment:version:{name}:{pk}"
+
+
+def get_version(name: str, pk) -> int:
+    """Current version of ``name`` for object ``pk``.
+
+    Versions live in the ``versions`` cache, shared by every worker, so a bump in
+    one invalidates the caches of all. A worker reuses a version it read for up
+    to ``VERSION_LOCAL_TTL`` seconds. A missing version starts from the clock, so
+    a version that was evicted can never match data cached under an older one.
+    """
+    return get_versions(name, [pk])[0]
+
+
+def get_versions(name: str, pks) -> list[int]:
+    """Current versions of ``name`` for each of ``pks``, read in one round trip."""
+    keys = [_version_key(name, pk) for pk in pks]
+    now = time.monotonic()
+    with _versions_lock:
+        local = {key: _local_versions.get(key) for key in keys}
+    versions = {key: value[0] for key, value in local.items() if value and now - value[1] < VERSION_LOCAL_TTL}
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        fetched = _read_shared_versions(missing)
+        versions.update(fetched)
+        with _versions_lock:
+            _local_versions.update((key, (version, now)) for key, version in fetched.items())
+    return [versions[key] for key in keys]
+
+
+def _read_shared_versions(keys) -> dict:
+    shared = version_cache()
+    versions = shared.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = time.time_ns()
+            shared.add(key, version, VERSION_TIMEOUT)
+            versions[key] = shared.get(key, version)
+    return versions
+
+
+def bump_version(name: str, pk) -> None:
+    key = _version_key(name, pk)
+    shared = version_cache()
+    try:
+        shared.incr(key)
+    except ValueError:
+        shared.set(key, time.time_ns(), VERSION_TIMEOUT)
+    with _versions_lock:
+        _local_versions.pop(key, None)
+
+
+def forget_local_versions() -> None:
+    """Drop the versions this worker remembers, so the next reads go to the shared cache."""
+    with _versions_lock:
+        _local_versions.clear()
+
+
+# Hit/miss counters
+
+
+def record(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+    count_lookup(outcome == "hit")
+
+
+def fragment_stats() -> dict[str, int]:
+    """Hit/miss counts of the fragment cache in this process."""
+    with _stats_lock:
+        stats = Counter(_stats)
+    return {"hits": stats["hit"], "misses": stats["miss"]}
+
+
+def count_lookup(hit: bool) -> None:
+    """Count a lookup in any cache against the ``counting_lookups`` block in progress."""
+    lookups = _lookups.get()
+    if lookups is not None:
+        lookups["hits" if hit else "misses"] += 1
+
+
+@contextmanager
+def counting_lookups():
+    """Count the hits and misses of all cache lookups made in the block, e.g. one request."""
+    lookups = Counter()
+    token = _lookups.set(lookups)
+    try:
+        yield lookups
+    finally:
+        _lookups.reset(token)
+
+
+def reset_fragment_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+# Slot objects
+
+
+def register_fragment_objects(request, objects) -> None:
+    """Make ``objects`` available to slots of cached fragments in this request."""
+    registry = getattr(request, _OBJECTS_ATTR, None)
+    if registry is None:
+        registry = {}
+        setattr(request, _OBJECTS_ATTR, registry)
+    for obj in objects:
+        registry[(obj._meta.label, obj.pk)] = obj
+
+
+def to_ref(value):
+    if isinstance(value, Model):
+        return ("object", value._meta.label, value.pk)
+    return ("value", value)
+
+
+def resolve_ref(request, ref):
+    """Return the value behind ``ref``; ``LookupError`` if the object is not registered."""
+    if ref[0] == "value":
+        return ref[1]
+    return getattr(request, _OBJECTS_ATTR, {})[ref[1:]]
+
+
+def slot_marker(token: str, index: int) -> str:
+    return f"<!--fragment-slot:{token}:{index}-->"
+
+
+def fill_slots(html: str, token: str, render_slot) -> str:
+    """Replace the slot markers of ``token`` with ``render_slot(index)``."""
+    # The token is random per stored fragment, so user content cannot forge markers
+    return re.sub(rf"<!--fragment-slot:{token}:(\d+)-->", lambda m: render_slot(int(m.group(1))), html)
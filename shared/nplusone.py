@@ -0,0 +1,165 @@
+"""Detect N+1 queries: the same statement run again and again in one request.
+
+``detect_n_plus_one`` hooks ``connection.execute_wrapper`` and groups the
+statements by shape: literals, parameters and ``IN`` lists are replaced so that
+``WHERE id = 1`` and ``WHERE id = 2`` count as one. When a shape runs more than
+``threshold`` times, the stack of that query is inspected for its origin: the
+innermost template node being rendered (``comment_card.html:12 {% user_vote
+comment %}``) and the innermost frame of project code.
+
+``NPlusOneMiddleware`` runs the detector on every request according to the
+``NPLUSONE`` setting: ``"off"`` (the default; the middleware removes itself),
+``"log"`` to log a warning on the ``shared.nplusone`` logger per repeated shape,
+or ``"strict"`` to raise ``NPlusOneError``, which fails the test that made the
+request. ``NPLUSONE_THRESHOLD`` sets the number of runs allowed per shape.
+"""
+
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node, TokenType
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD = 5
+MODES = ("off", "log", "strict")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+# Transaction bookkeeping repeats by design
+_IGNORED_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+_TOKEN_FORMATS = {TokenType.BLOCK: "{%% %s %%}", TokenType.VAR: "{{ %s }}"}
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def normalize_sql(sql: str) -> str:
+    """The shape of ``sql``: the statement with every value replaced by ``?``."""
+    shape = _STRING_RE.sub("?", sql)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _PLACEHOLDER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(...)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+def _template_origin(frame) -> str | None:
+    while frame is not None:
+        node = frame.f_locals.get("self")
+        token = getattr(node, "token", None) if isinstance(node, Node) else None
+        if token is not None:
+            name = getattr(node.origin, "template_name", None) or "<template>"
+            text = _TOKEN_FORMATS.get(token.token_type, "%s") % token.contents
+            return f"{name}:{token.lineno} {text}"
+        frame = frame.f_back
+    return None
+
+
+def _code_origin(frame) -> str | None:
+    root = str(settings.BASE_DIR) + os.sep
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        # Frames of execute_wrapper hooks (this module's, shared.timing's) are skipped
+        is_hook = "execute" in frame.f_locals and "many" in frame.f_locals
+        if filename.startswith(root) and "site-packages" not in filename and not is_hook:
+            return f"{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def query_origin(frame=None) -> str:
+    """Where the query being run from ``frame`` (the caller by default) comes from."""
+    frame = frame or sys._getframe(1)
+    origins = [origin for origin in (_template_origin(frame), _code_origin(frame)) if origin]
+    return " via ".join(origins) or "unknown"
+
+
+@dataclass
+class RepeatedQuery:
+    shape: str
+    count: int
+    origin: str
+
+    def __str__(self):
+        return f"{self.count}x {self.shape[:300]}\n    at {self.origin}"
+
+
+class QueryShapeCounter:
+    """``execute_wrapper`` hook counting statements by shape."""
+
+    def __init__(self, threshold: int = THRESHOLD):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_IGNORED_PREFIXES):
+            shape = normalize_sql(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == self.threshold + 1:
+                # Only a shape that repeats pays for the stack walk
+                self.origins[shape] = query_origin(sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def repeated(self) -> list[RepeatedQuery]:
+        return [
+            RepeatedQuery(shape, self.counts[shape], origin)
+            for shape, origin in sorted(self.origins.items(), key=lambda item: -self.counts[item[0]])
+        ]
+
+
+def report(repeated: list[RepeatedQuery], label: str, strict: bool) -> None:
+    if not repeated:
+        return
+    if strict:
+        raise NPlusOneError(f"Repeated queries in {label}:\n" + "\n".join(str(query) for query in repeated))
+    for query in repeated:
+        logger.warning("N+1 in %s: %s", label, query, extra={"label": label, "count": query.count})
+
+
+@contextmanager
+def _counting(counter: QueryShapeCounter):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+@contextmanager
+def detect_n_plus_one(threshold: int = THRESHOLD, strict: bool = True, label: str = "block"):
+    """Report statement shapes run more than ``threshold`` times inside the block."""
+    with _counting(QueryShapeCounter(threshold)) as counter:
+        yield counter
+    report(counter.repeated(), label, strict)
+
+
+class NPlusOneMiddleware:
+    def __init__(self, get_response):
+        mode = getattr(settings, "NPLUSONE", "off")
+        if mode not in MODES:
+            raise ImproperlyConfigured(f"NPLUSONE must be one of {', '.join(MODES)}, not {mode!r}")
+        if mode == "off":
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = mode == "strict"
+        self.threshold = getattr(settings, "NPLUSONE_THRESHOLD", THRESHOLD)
+
+    def __call__(self, request):
+        with _counting(QueryShapeCounter(self.threshold)) as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        report(counter.repeated(), (match.view_name if match else None) or request.path, self.strict)
+        return response
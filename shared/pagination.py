@@ -0,0 +1,101 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded for the given ordering."""
+
+
+def encode_cursor(values) -> str:
+    """Encode a list of serialized key values into an opaque, URL-safe cursor token."""
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> list:
+    """Decode a cursor token produced by ``encode_cursor``."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(values, list):
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+class KeysetPage:
+    """A single page of results returned by ``KeysetPaginator``"""
+
+    def __init__(self, object_list, next_cursor: str | None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Cursor based paginator that seeks past the last row instead of using OFFSET.
+
+    ``ordering`` is a sequence of ``order_by`` style field names on the queryset's
+    model. It must end with a unique column (usually ``-id``) so that every row has
+    a distinct position. No COUNT query is issued; one extra row is fetched to know
+    whether a next page exists.
+    """
+
+    def __init__(self, queryset, ordering, per_page: int = 20):
+        self.ordering = tuple(ordering)
+        self.keys = [
+            (name.lstrip("-"), name.startswith("-")) for name in self.ordering
+        ]
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+        self._fields = [queryset.model._meta.get_field(name) for name, _ in self.keys]
+
+    def _seek_filter(self, values) -> Q:
+        """Build the predicate selecting rows strictly after ``values``."""
+        condition = Q()
+        for index, (name, descending) in enumerate(self.keys):
+            lookup = {prev_name: values[i] for i, (prev_name, _) in enumerate(self.keys[:index])}
+            lookup[f"{name}__{'lt' if descending else 'gt'}"] = values[index]
+            condition |= Q(**lookup)
+        return condition
+
+    def _parse_cursor(self, token: str) -> list:
+        values = decode_cursor(token)
+        if len(values) != len(self.keys):
+            raise InvalidCursor("Cursor does not match ordering")
+        try:
+            return [field.to_python(value) for field, value in zip(self._fields, values)]
+        except (ValidationError, TypeError) as exc:
+            raise InvalidCursor("Cursor does not match ordering") from exc
+
+    def cursor_for(self, obj) -> str:
+        # value_to_string keeps full precision (e.g. datetime microseconds)
+        return encode_cursor([field.value_to_string(obj) for field in self._fields])
+
+    def get_page(self, cursor: str | None = None) -> KeysetPage:
+        """Return the page following ``cursor``; invalid cursors restart at the top."""
+        queryset = self.queryset
+        if cursor:
+            try:
+                queryset = queryset.filter(self._seek_filter(self._parse_cursor(cursor)))
+            except InvalidCursor:
+                pass
+        rows = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = self.cursor_for(rows[-1])
+        return KeysetPage(rows, next_cursor)
@@ -0,0 +1,74 @@
+"""SQL query budgets for views.
+
+A ``QueryBudget`` names a view, how to build its URL from the objects of a
+dataset, and the most queries one request may run. ``count_queries`` requests
+every budgeted view with the test client and records how many queries each
+ran; ``budget_violations`` compares the counts of the same views on a small and
+on a larger dataset. A count over its budget, or one that grows with the
+dataset, points at a query run per row (an N+1).
+
+The budgets (``shared.tests.QUERY_BUDGETS``) cover every named URL that renders
+data except:
+
+- form and confirmation pages, which show one object and no lists, so their
+  queries do not grow with the data: ``comment-create``, ``org-create``,
+  ``org-edit``, ``org-join``, ``org-membership-edit``, ``post-create``,
+  ``post-update``, ``post-delete``, ``thread-create``, ``thread-join``,
+  ``thread-update``, ``thread-delete`` and ``user-update``;
+- POST-only actions answering with a redirect or JSON:
+  ``org-membership-action``, ``vote`` and ``toggle-save-post``.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from shared.fragments import VERSION_CACHE_ALIAS, forget_local_versions
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    name: str
+    max_queries: int
+    # (targets) -> URL, where targets holds the dataset's objects the view is requested for
+    url: Callable
+    method: str = "get"
+    data: dict = field(default_factory=dict)
+    headers: dict = field(default_factory=dict)
+
+
+def count_queries(client, budgets, targets) -> dict[str, int]:
+    """Queries run by one request to each view, starting from empty caches.
+
+    The shared version counters are not a cache of data: each view is requested
+    once beforehand so they exist, and a measured request reads each of them once.
+    """
+    counts = {}
+    for budget in budgets:
+        url = budget.url(targets)
+        forget_local_versions()
+        getattr(client, budget.method)(url, budget.data, headers=budget.headers)
+        for alias in caches:
+            if alias != VERSION_CACHE_ALIAS:
+                caches[alias].clear()
+        forget_local_versions()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, budget.method)(url, budget.data, headers=budget.headers)
+        if response.status_code >= 400:
+            raise AssertionError(f"{budget.name} answered {response.status_code}")
+        counts[budget.name] = len(queries)
+    return counts
+
+
+def budget_violations(budgets, small: dict[str, int], large: dict[str, int]) -> list[str]:
+    problems = []
+    for budget in budgets:
+        before, after = small[budget.name], large[budget.name]
+        if after > before:
+            problems.append(f"{budget.name}: {before} queries on the small dataset, {after} on the large one")
+        if max(before, after) > budget.max_queries:
+            problems.append(f"{budget.name}: {max(before, after)} queries, budget {budget.max_queries}")
+    return problems
@@ -0,0 +1,104 @@
+"""Verify and repair denormalized counter columns.
+
+A ``CounterSpec`` pairs a stored counter column with a SQL expression computing
+its true value for each row (usually a correlated aggregate subquery).
+``reconcile`` walks the target table in primary-key batches, compares the two
+in the database and rewrites only the rows that drifted, so memory stays
+bounded by the batch size regardless of table size.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.db.models import Expression, F, Q, QuerySet
+
+
+@dataclass
+class CounterSpec:
+    """One denormalized counter: ``model.field`` should equal ``actual``.
+
+    ``changed_since`` optionally returns a ``Q`` on the target model selecting
+    rows whose sources changed after a timestamp; it is used by incremental runs.
+    ``on_repair`` is called with the primary keys of each repaired batch, e.g. to
+    refresh values derived from the counter.
+    """
+
+    label: str
+    model: type
+    field: str
+    actual: Callable[[], Expression]
+    changed_since: Callable[..., Q] | None = None
+    on_repair: Callable[[list], None] | None = None
+
+
+@dataclass
+class DriftReport:
+    label: str
+    scanned: int = 0
+    drifted: int = 0
+    repaired: int = 0
+    total_drift: int = 0
+    samples: list = field(default_factory=list)
+
+    def __str__(self):
+        line = (
+            f"{self.label}: scanned {self.scanned}, drifted {self.drifted} "
+            f"(total |drift| {self.total_drift}), repaired {self.repaired}"
+        )
+        if self.samples:
+            details = ", ".join(f"pk={pk} {stored}->{actual}" for pk, stored, actual in self.samples)
+            line += f"; e.g. {details}"
+        return line
+
+
+MAX_SAMPLES = 5
+
+
+def _candidate_rows(spec: CounterSpec, since) -> QuerySet:
+    rows = spec.model._default_manager.all()
+    if since is not None:
+        condition = Q(updated_at__gte=since) if hasattr(spec.model, "updated_at") else Q()
+        if spec.changed_since is not None:
+            condition |= spec.changed_since(since)
+        rows = rows.filter(condition)
+    return rows
+
+
+def reconcile(spec: CounterSpec, *, dry_run: bool = False, since=None, batch_size: int = 5000) -> DriftReport:
+    """Compare ``spec`` against its source tables and repair drifted rows.
+
+    With ``since`` only rows touched (or whose sources were touched) after that
+    timestamp are checked. Hard-deleted source rows leave no timestamp behind, so
+    run a full pass periodically as well.
+    """
+    report = DriftReport(spec.label)
+    candidates = _candidate_rows(spec, since).order_by("pk")
+    pk_name = spec.model._meta.pk.name
+    last_pk = None
+    while True:
+        batch = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        last_pk = pks[-1]
+        report.scanned += len(pks)
+
+        drifted = list(
+            spec.model._default_manager.filter(pk__in=pks)
+            .annotate(actual_value=spec.actual())
+            .exclude(**{spec.field: F("actual_value")})
+            .values_list(pk_name, spec.field, "actual_value")
+        )
+        if not drifted:
+            continue
+        report.drifted += len(drifted)
+        report.total_drift += sum(abs(stored - actual) for _, stored, actual in drifted)
+        report.samples.extend(drifted[: MAX_SAMPLES - len(report.samples)])
+        if not dry_run:
+            drifted_pks = [pk for pk, _, _ in drifted]
+            report.repaired += spec.model._default_manager.filter(pk__in=drifted_pks).update(
+                **{spec.field: spec.actual()}
+            )
+            if spec.on_repair is not None:
+                spec.on_repair(drifted_pks)
+    return report
@@ -0,0 +1,116 @@
+"""Unique slug allocation for models with a ``slug`` field.
+
+A new or changed slug costs one query: the base and the slugs in the index range
+``base-...`` are fetched and the lowest free ``-N`` suffix is picked in memory. The row is then
+written in a savepoint; if a concurrent writer took the slug first, the unique
+constraint rejects the write and allocation runs again. Saves that keep the slug
+loaded from the database do not query at all. ``allocate_slugs`` does the same
+for a batch of rows about to be bulk inserted.
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+
+
+def slug_base(text: str, fallback: str, max_length: int) -> str:
+    return (slugify(text) or fallback)[:max_length]
+
+
+def _lowest_free(base: str, taken: set[str]) -> str:
+    if base not in taken:
+        return base
+    prefix = f"{base}-"
+    used = {
+        int(slug[len(prefix):]) for slug in taken if slug.startswith(prefix) and slug[len(prefix):].isdigit()
+    }
+    suffix = 1
+    while suffix in used:
+        suffix += 1
+    return f"{prefix}{suffix}"
+
+
+def _slugs_with_prefix(queryset, base: str) -> set[str]:
+    """``base`` and its ``base-N`` variants used in ``queryset``.
+
+    A range rather than ``startswith``, which compiles to a ``LIKE`` that cannot
+    use the slug index; ``~`` sorts after every character a slug may contain.
+    """
+    prefix = f"{base}-"
+    rows = queryset.filter(Q(slug=base) | Q(slug__gt=prefix, slug__lt=f"{prefix}~")).order_by()
+    return {slug for slug in rows.values_list("slug", flat=True) if slug == base or slug[len(prefix):].isdigit()}
+
+
+def next_free_slug(queryset, base: str) -> str:
+    """``base`` or ``base-N`` with the lowest ``N`` no row of ``queryset`` uses."""
+    return _lowest_free(base, _slugs_with_prefix(queryset, base))
+
+
+def allocate_slugs(queryset, bases) -> list[str]:
+    """Unique slugs for rows about to be bulk inserted, one per base, in order.
+
+    One query checks every base; only bases that are taken or repeated cost a
+    prefix query of their own.
+    """
+    bases = list(bases)
+    taken = set(queryset.filter(slug__in=set(bases)).order_by().values_list("slug", flat=True))
+    repeated = {base for base, count in Counter(bases).items() if count > 1}
+    for base in taken | repeated:
+        taken |= _slugs_with_prefix(queryset, base)
+    slugs = []
+    for base in bases:
+        slug = _lowest_free(base, taken)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class UniqueSlugMixin:
+    """Fill ``slug`` from ``slug_source`` on save and keep it unique.
+
+    An explicitly set slug is used as the base instead. Put the mixin before the
+    model base class so its ``save`` wraps the actual write.
+    """
+
+    slug_source = "title"
+    slug_fallback = "item"
+    # Longest base, leaving room for the suffix within the field's max_length
+    slug_max_length = 230
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_slug = instance.__dict__.get("slug")
+        return instance
+
+    def _slug_needs_allocation(self, update_fields) -> bool:
+        if update_fields is not None and "slug" not in update_fields:
+            return False
+        if self._state.adding or not self.slug:
+            return True
+        if "slug" in self.get_deferred_fields():
+            return False
+        return self.slug != getattr(self, "_loaded_slug", None)
+
+    def save(self, *args, **kwargs):
+        if not self._slug_needs_allocation(kwargs.get("update_fields")):
+            return super().save(*args, **kwargs)
+
+        base = slug_base(self.slug or getattr(self, self.slug_source), self.slug_fallback, self.slug_max_length)
+        others = type(self)._default_manager.exclude(pk=self.pk) if self.pk else type(self)._default_manager.all()
+        for attempt in range(MAX_ATTEMPTS):
+            self.slug = next_free_slug(others, base)
+            try:
+                with transaction.atomic(using=kwargs.get("using")):
+                    super().save(*args, **kwargs)
+            except IntegrityError:
+                # Only a lost race for the slug is retried
+                if attempt == MAX_ATTEMPTS - 1 or not others.filter(slug=self.slug).exists():
+                    raise
+            else:
+                self._loaded_slug = self.slug
+                return
@@ -0,0 +1,201 @@
+import re
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import User
+from apps.campus.dataset import DatasetConfig, DatasetGenerator
+from apps.campus.models import Organization, OrganizationMembership
+from apps.comments.models import Comment
+from apps.comments.tree import COMMENT_RENDER_DEPTH
+from apps.posts.models import Post
+from apps.threads.models import Thread
+from apps.votes.models import Vote
+from shared.benchmarks import regressions, run_benchmarks
+from shared.fragments import forget_local_versions
+from shared.nplusone import NPlusOneError, detect_n_plus_one, normalize_sql
+from shared.query_budget import QueryBudget, budget_violations, count_queries
+
+
+class BenchmarkTest(TestCase):
+    def test_runs_and_compares_with_baseline(self):
+        results = run_benchmarks(["posts.Post.can_user_view", "votes."], rounds=1)
+        self.assertEqual(set(results), {"posts.Post.can_user_view", "votes.vote (state machine)"})
+        # Benchmark data is rolled back
+        self.assertFalse(Post.objects.exists())
+
+        baseline = {name: {**result, "median": result["median"] / 2} for name, result in results.items()}
+        self.assertEqual(len(regressions(baseline, results, threshold=0.5)), 2)
+        self.assertEqual(regressions(baseline, results, threshold=1.5), [])
+        self.assertEqual(regressions({}, results), [])
+
+
+# Most queries one request to each view may run, from empty caches, as a member of the busiest organization
+QUERY_BUDGETS = (
+    QueryBudget("campus-home", 18, lambda t: reverse("campus-home")),
+    QueryBudget("campus-home:all", 16, lambda t: reverse("campus-home") + "?tab=all"),
+    QueryBudget("campus-home:popular", 16, lambda t: reverse("campus-home") + "?tab=popular"),
+    QueryBudget("post-detail", 20, lambda t: t.post.get_absolute_url()),
+    QueryBudget("comment-page", 7, lambda t: reverse("comment-page", args=[t.post.slug])),
+    QueryBudget("comment-replies", 7, lambda t: reverse("comment-replies", args=[t.comment.pk])),
+    QueryBudget("thread-detail", 17, lambda t: t.thread.get_absolute_url()),
+    QueryBudget("org-list", 16, lambda t: reverse("org-list")),
+    QueryBudget("org-detail", 19, lambda t: t.organization.get_absolute_url()),
+    QueryBudget("org-members", 8, lambda t: reverse("org-members", args=[t.organization.slug])),
+    QueryBudget("user-posts", 17, lambda t: reverse("user-posts", args=[t.author.username])),
+    QueryBudget("user-comments", 16, lambda t: reverse("user-comments", args=[t.author.username])),
+    QueryBudget("user-upvoted", 17, lambda t: reverse("user-upvoted", args=[t.viewer.username])),
+    QueryBudget("user-downvoted", 17, lambda t: reverse("user-downvoted", args=[t.viewer.username])),
+    QueryBudget("user-detail", 0, lambda t: reverse("user-detail", args=[t.author.username])),
+    QueryBudget("org-pending-requests", 20, lambda t: reverse("org-pending-requests", args=[t.organization.slug])),
+    QueryBudget("thread-select-org", 3, lambda t: reverse("thread-select-org")),
+    QueryBudget("campus-about", 14, lambda t: reverse("campus-about")),
+    QueryBudget(
+        "campus-search", 6, lambda t: reverse("campus-search"), "post", {"query": "lab"}, {"HX-Request": "true"}
+    ),
+    QueryBudget("campus-search-results", 9, lambda t: reverse("campus-search-results", args=["posts"]) + "?query=lab"),
+)
+
+
+class QueryBudgetTest(TestCase):
+    sizes = (
+        DatasetConfig(users=30, organizations=3, threads=6, posts=60, comments=200, votes=300),
+        DatasetConfig(users=90, organizations=6, threads=18, posts=180, comments=600, votes=900),
+    )
+
+    def _targets(self):
+        organization = Organization.objects.annotate(members=Count("organizationmembership")).order_by("-members")[0]
+        viewer = OrganizationMembership.objects.get(organization=organization, role="president").user
+        post = Post.objects.filter(visibility="public").order_by("-comment_count", "pk")[0]
+        # A branch deeper than the render depth below the newest comment, so both sizes cut one off
+        comment = parent = post.comments.filter(level=0).order_by("-pk")[0]
+        for _ in range(COMMENT_RENDER_DEPTH + 1):
+            parent = Comment.objects.create(post=post, author=viewer, parent=parent, content="Deeper")
+        # At least one request to review, so both sizes render the pending list
+        applicant = User.objects.exclude(organizationmembership__organization=organization).order_by("pk")[0]
+        OrganizationMembership.objects.create(user=applicant, organization=organization, status="pending")
+        return SimpleNamespace(
+            viewer=viewer,
+            organization=organization,
+            post=post,
+            comment=comment,
+            thread=Thread.objects.filter(threadmembership__user=viewer).order_by("-post_count", "pk")[0],
+            author=User.objects.annotate(n=Count("posts")).order_by("-n", "pk")[0],
+        )
+
+    def _measure(self, config):
+        for model in (Vote, Organization, User):
+            model.objects.all().delete()
+        DatasetGenerator(config).generate()
+        targets = self._targets()
+        self.client.force_login(targets.viewer)
+        return count_queries(self.client, QUERY_BUDGETS, targets)
+
+    def test_views_stay_within_budget(self):
+        small, large = (self._measure(config) for config in self.sizes)
+        self.assertEqual(budget_violations(QUERY_BUDGETS, small, large), [])
+
+
+class RequestTimingTest(TestCase):
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("campus-home")).headers)
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_server_timing_header_and_log_line(self):
+        user = User.objects.create_user(username="timed", is_staff=True)
+        self.client.force_login(user)
+        with self.assertLogs("shared.timing", "INFO") as logs, CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("campus-home") + "?tab=all")
+        timing = response.headers["Server-Timing"]
+        self.assertRegex(timing, r"^total;dur=[\d.]+, sql;dur=[\d.]+;desc=\"\d+ queries\", tpl;dur=[\d.]+, cache;")
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertNotIn("tpl;dur=0.0,", timing)
+        self.assertIn("url_name=campus-home method=GET status=200", logs.output[0])
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_header_is_for_staff_unless_enabled(self):
+        self.client.force_login(User.objects.create_user(username="member"))
+        with self.assertLogs("shared.timing", "INFO"):
+            response = self.client.get(reverse("campus-about"))
+        self.assertNotIn("Server-Timing", response.headers)
+        with override_settings(REQUEST_TIMING_HEADER=True), self.assertLogs("shared.timing", "INFO"):
+            # A new client loads the middleware with the new setting
+            self.assertIn("Server-Timing", self.client_class().get(reverse("campus-about")).headers)
+
+    @override_settings(REQUEST_TIMING=True, TYPEAHEAD_REBUILD_ASYNC=False)
+    def test_cache_metric_counts_search_and_typeahead_lookups(self):
+        cache.clear()
+        forget_local_versions()
+        self.client.force_login(User.objects.create_user(username="searcher", is_staff=True))
+
+        def lookups():
+            with self.assertLogs("shared.timing", "INFO"):
+                response = self.client.post(reverse("campus-search"), {"query": "Chess"}, HTTP_HX_REQUEST="true")
+            counts = re.search(r'cache;desc="(\d+) hits, (\d+) misses"', response.headers["Server-Timing"])
+            return int(counts[1]), int(counts[2])
+
+        # The typeahead index and the search result, missed once then reused
+        self.assertEqual(lookups(), (0, 2))
+        self.assertEqual(lookups(), (2, 0))
+
+    @override_settings(REQUEST_TIMING=True, REQUEST_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_measured(self):
+        with self.assertNoLogs("shared.timing"):
+            response = self.client.get(reverse("campus-about"))
+        self.assertNotIn("Server-Timing", response.headers)
+
+
+class NPlusOneTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="looper")
+        org = Organization.objects.create(name="Loop Club", org_type="club")
+        thread = Thread.objects.create(title="Loops", organization=org, created_by=self.user)
+        self.posts = [
+            Post.objects.create(title=f"Loop {i}", content="Body", thread=thread, author=self.user)
+            for i in range(4)
+        ]
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def _render_votes(self):
+        # Without attach_viewer_state every tag looks its vote up on its own
+        template = Template("{% load vote_tags %}{% for post in posts %}{% user_vote post %}{% endfor %}")
+        return template.render(Context({"posts": self.posts, "request": self.request}))
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM posts WHERE id = %s AND title = 'it''s' AND pk IN (%s, %s)"),
+            normalize_sql("SELECT *  FROM posts WHERE id = 7 AND title = 'x' AND pk IN (%s)"),
+        )
+
+    def test_strict_mode_reports_template_and_code(self):
+        with self.assertRaises(NPlusOneError) as raised, detect_n_plus_one(threshold=2, label="votes"):
+            self._render_votes()
+        message = str(raised.exception)
+        self.assertIn("Repeated queries in votes:\n4x SELECT", message)
+        self.assertIn('"votes"', message)
+        self.assertIn("{% user_vote post %}", message)
+        self.assertIn("apps/votes/templatetags/vote_tags.py", message)
+
+        with detect_n_plus_one(threshold=4):
+            self._render_votes()
+
+    def test_log_mode(self):
+        with self.assertLogs("shared.nplusone", "WARNING") as logs, detect_n_plus_one(threshold=2, strict=False):
+            self._render_votes()
+        self.assertIn("N+1 in block: 4x", logs.output[0])
+
+    @override_settings(NPLUSONE="strict", NPLUSONE_THRESHOLD=0)
+    def test_middleware(self):
+        with self.assertRaisesMessage(NPlusOneError, "Repeated queries in campus-home"):
+            self.client.get(reverse("campus-home"))
+        with override_settings(NPLUSONE_THRESHOLD=5):
+            # A new client loads the middleware with the new setting
+            self.assertEqual(self.client_class().get(reverse("campus-home")).status_code, 200)
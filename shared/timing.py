@@ -0,0 +1,152 @@
+"""Per-request timing breakdown.
+
+``RequestTimingMiddleware`` measures a sampled share of requests: total time,
+time and number of SQL queries (through ``connection.execute_wrapper``),
+template render time and cache hits and misses. The cache numbers cover every
+lookup counted with ``shared.fragments.count_lookup``: HTML fragments, sidebar
+lists, search results and the typeahead index, where a stale index is a miss.
+The numbers go to a ``Server-Timing`` response header, shown by browser
+devtools, and to one log line per request on the ``shared.timing`` logger,
+tagged with the URL name.
+
+Settings:
+
+- ``REQUEST_TIMING``: off by default; when off the middleware removes itself
+  from the stack at startup and costs nothing.
+- ``REQUEST_TIMING_SAMPLE_RATE``: share of requests measured, 0 to 1.
+- ``REQUEST_TIMING_HEADER``: whether every measured response carries the
+  header; off by default, when only staff users and ``DEBUG`` get it, as it
+  shows how much work a page does.
+
+Template time is taken in ``django.template.base.Template.render``, patched
+once when the middleware is enabled and left in place for the life of the
+process: swapping it per request would race between threads. Renders outside a
+measured request pay one context variable lookup. Only the outermost render of
+a request counts, so included templates are not added twice.
+"""
+
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+from shared.fragments import counting_lookups
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timer", default=None)
+
+
+@dataclass
+class RequestTimer:
+    sql: float = 0.0
+    queries: int = 0
+    templates: float = 0.0
+    template_depth: int = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``execute_wrapper`` hook timing every query on the connection."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        timer = _current.get()
+        if timer is None:
+            return render(self, context)
+        timer.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timer.template_depth -= 1
+            if not timer.template_depth:
+                timer.templates += time.perf_counter() - started
+
+    wrapper.timed = True
+    return wrapper
+
+
+def _instrument_templates() -> None:
+    if not getattr(Template.render, "timed", False):
+        Template.render = _timed_render(Template.render)
+
+
+def server_timing(metrics: dict) -> str:
+    """``Server-Timing`` header value for the metrics of one request."""
+    return ", ".join(
+        [
+            f"total;dur={metrics['total_ms']:.1f}",
+            f'sql;dur={metrics["sql_ms"]:.1f};desc="{metrics["sql_count"]} queries"',
+            f"tpl;dur={metrics['template_ms']:.1f}",
+            f'cache;desc="{metrics["cache_hits"]} hits, {metrics["cache_misses"]} misses"',
+        ]
+    )
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", 1.0)
+        self.header = getattr(settings, "REQUEST_TIMING_HEADER", False)
+        _instrument_templates()
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                lookups = stack.enter_context(counting_lookups())
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        metrics = {
+            "total_ms": total * 1000,
+            "sql_ms": timer.sql * 1000,
+            "sql_count": timer.queries,
+            "template_ms": timer.templates * 1000,
+            "cache_hits": lookups["hits"],
+            "cache_misses": lookups["misses"],
+        }
+        if self._shows_header(request):
+            response.headers["Server-Timing"] = server_timing(metrics)
+        self._log(request, response, metrics)
+        return response
+
+    def _shows_header(self, request) -> bool:
+        if self.header or settings.DEBUG:
+            return True
+        user = getattr(request, "user", None)
+        return bool(user and user.is_staff)
+
+    def _log(self, request, response, metrics: dict) -> None:
+        match = request.resolver_match
+        fields = {
+            "url_name": (match.view_name if match else None) or "-",
+            "method": request.method,
+            "status": response.status_code,
+            **{key: round(value, 1) if isinstance(value, float) else value for key, value in metrics.items()},
+        }
+        logger.info(" ".join(f"{key}={value}" for key, value in fields.items()), extra=fields)